@@ -0,0 +1,92 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Compare selecting topics with a name file by checking every name against
+every topic with the pattern matcher.
+
+Run with ``python benchmarks/bench_matchers.py``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from lsst.ts.kafka_tools.matchers import MATCH_MODES, NameMatcher
+
+CSCS = ["ATAOS", "ATDome", "MTM1M3", "MTM2", "MTMount", "ESS", "MTPtg", "Scheduler"]
+
+
+def make_topics(num_topics: int, rng: random.Random) -> list[str]:
+    return [
+        f"lsst.sal.{rng.choice(CSCS)}{i // 100}.logevent_item{i}"
+        for i in range(num_topics)
+    ]
+
+
+def nested_loop(topics: list[str], names: list[str]) -> list[str]:
+    selected = []
+    for topic in topics:
+        for name in names:
+            if name in topic:
+                selected.append(topic)
+    return selected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topics", type=int, default=100_000)
+    parser.add_argument("--names", type=int, default=10_000)
+    parser.add_argument(
+        "--nested-topics",
+        type=int,
+        default=2_000,
+        help="Topics for the nested loop, which is extrapolated from them.",
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    topics = make_topics(args.topics, rng)
+    names = rng.sample(topics, args.names)
+
+    start = time.perf_counter()
+    nested_loop(topics[: args.nested_topics], names)
+    nested_s = (time.perf_counter() - start) * args.topics / args.nested_topics
+    print(f"{'nested loop':>12}  {nested_s * 1000:>10.0f} ms (extrapolated)")
+
+    for mode in MATCH_MODES:
+        patterns = (
+            names if mode != "glob" else [f"lsst.sal.{x}*.logevent_*" for x in CSCS[:4]]
+        )
+        start = time.perf_counter()
+        matcher = NameMatcher(patterns, mode)
+        build_s = time.perf_counter() - start
+        selected = [x for x in topics if matcher.matches(x)]
+        total_s = time.perf_counter() - start
+        print(
+            f"{mode:>12}  {total_s * 1000:>10.0f} ms  (build {build_s * 1000:.0f} ms,"
+            f" {len(selected)} selected)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Compare filtering on decoded Avro values with header prefiltering, which
+rejects messages before their values are decoded.
+
+Run with ``python benchmarks/bench_prefilter.py``. Needs fastavro.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import pathlib
+import tempfile
+import time
+from unittest.mock import patch
+
+from lsst.ts.kafka_tools import topics
+from lsst.ts.kafka_tools.constants import PartitionRange
+from lsst.ts.kafka_tools.decoders import AvroDecoder, SchemaRegistry
+from lsst.ts.kafka_tools.filters import RecordFilter
+from lsst.ts.kafka_tools.mocks.mock_consumer import MockConsumer
+from lsst.ts.kafka_tools.mocks.mock_message import MockMessage
+from lsst.ts.kafka_tools.mocks.schema_registry import (
+    create_file_registry,
+    encode_avro,
+    heartbeat_schema,
+)
+
+TOPIC = "lsst.sal.ATAOS.logevent_heartbeat"
+
+
+def run(
+    num_messages: int, every: int, repeat: int, cache_dir: pathlib.Path
+) -> tuple[float, float, int]:
+    url = create_file_registry(cache_dir / "registry", {1: heartbeat_schema})
+    decoder = AvroDecoder(SchemaRegistry(url, cache_dir=cache_dir / "cache"))
+    logs = {
+        TOPIC: [
+            [
+                MockMessage(
+                    i,
+                    encode_avro(
+                        1,
+                        heartbeat_schema,
+                        {
+                            "private_sndStamp": 1.0,
+                            "private_seqNum": i,
+                            "heartbeat": True,
+                        },
+                    ),
+                    topic=TOPIC,
+                    offset=i,
+                    headers=[("selected", b"1" if i % every == 0 else b"0")],
+                )
+                for i in range(num_messages)
+            ]
+        ]
+    }
+    prange = PartitionRange(TOPIC, 0, 0, num_messages, 0, num_messages)
+    filters = {
+        "where": RecordFilter(where=f"private_seqNum % {every} == 0"),
+        "header": RecordFilter(headers=[("selected", b"1")]),
+    }
+    best = {name: float("inf") for name in filters}
+    matched = 0
+
+    with patch.object(
+        topics, "Consumer", side_effect=lambda conf: MockConsumer(conf, logs)
+    ):
+        for _ in range(repeat):
+            for name, record_filter in filters.items():
+                start = time.perf_counter()
+                with contextlib.closing(
+                    topics._iter_partition(
+                        {}, prange, 0, num_messages, 500, decoder, record_filter
+                    )
+                ) as it:
+                    matched = sum(1 for _ in it)
+                best[name] = min(best[name], time.perf_counter() - start)
+    return (
+        best["where"] / num_messages * 1e9,
+        best["header"] / num_messages * 1e9,
+        matched,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--every",
+        type=functools.partial(str.split, sep=","),
+        default="1,10,100,1000",
+        help="Select one message out of this many.",
+    )
+    args = parser.parse_args()
+
+    print(f"{'every':>6}  {'matched':>8}  {'where':>8}  {'header':>8}  (ns/msg)")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for every in args.every:
+            where_ns, header_ns, matched = run(
+                args.messages, int(every), args.repeat, pathlib.Path(tmpdir)
+            )
+            print(f"{every:>6}  {matched:>8}  {where_ns:>8.0f}  {header_ns:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
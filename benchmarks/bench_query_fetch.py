@@ -0,0 +1,90 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Compare the per-message cost of the topic query read path for several
+consume batch sizes against the in-memory mock consumer.
+
+Run with ``python benchmarks/bench_query_fetch.py``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import time
+from unittest.mock import patch
+
+from lsst.ts.kafka_tools import topics
+from lsst.ts.kafka_tools.constants import PartitionRange
+from lsst.ts.kafka_tools.mocks.mock_consumer import MockConsumer, create_topic_log
+
+TOPIC = "lsst.sal.MTM1M3.forceActuatorData"
+
+
+def run(num_messages: int, batch_size: int, repeat: int) -> tuple[float, int]:
+    logs = {
+        TOPIC: create_topic_log(
+            TOPIC, [[(i, b'{"value": 1.0}') for i in range(num_messages)]]
+        )
+    }
+    prange = PartitionRange(TOPIC, 0, 0, num_messages, 0, num_messages)
+    best = float("inf")
+    calls = 0
+    consumers: list[MockConsumer] = []
+
+    def make_consumer(conf: dict) -> MockConsumer:
+        consumer = MockConsumer(conf, logs)
+        consumers.append(consumer)
+        return consumer
+
+    with patch.object(topics, "Consumer", side_effect=make_consumer):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with contextlib.closing(
+                topics._iter_partition({}, prange, 0, num_messages, batch_size)
+            ) as it:
+                for _ in it:
+                    pass
+            best = min(best, time.perf_counter() - start)
+            calls = consumers[-1].consume_calls
+    return best / num_messages * 1e9, calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--batch-sizes",
+        type=functools.partial(str.split, sep=","),
+        default="1,10,100,500,1000",
+    )
+    args = parser.parse_args()
+
+    print(f"{'batch':>6}  {'calls':>8}  {'ns/msg':>8}")
+    for batch_size in args.batch_sizes:
+        ns_per_msg, calls = run(args.messages, int(batch_size), args.repeat)
+        print(f"{batch_size:>6}  {calls:>8}  {ns_per_msg:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
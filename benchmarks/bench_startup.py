@@ -0,0 +1,94 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Measure the startup of the kt command: the import time of the command
+line module and the wall time of ``kt --help``. Exits with an error if the
+medians exceed the budgets, so it can guard against startup regressions.
+
+Run with ``python benchmarks/bench_startup.py``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+HELP_CODE = "from lsst.ts.kafka_tools.cli import main; main(['--help'])"
+
+
+def import_ms() -> float:
+    """The cumulative import time of the command line module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import lsst.ts.kafka_tools.cli"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    match = re.search(
+        r"\|\s*(\d+)\s*\|\s*lsst\.ts\.kafka_tools\.cli\s*$", result.stderr
+    )
+    if match is None:
+        raise RuntimeError("No import time for lsst.ts.kafka_tools.cli.")
+    return int(match.group(1)) / 1000
+
+
+def help_ms() -> float:
+    """The wall time of a process running kt --help."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", HELP_CODE], capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=100.0)
+    parser.add_argument("--max-help-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    # The first run warms the bytecode and file system caches.
+    import_ms()
+    help_ms()
+    imports = [import_ms() for _ in range(args.runs)]
+    helps = [help_ms() for _ in range(args.runs)]
+
+    failed = False
+    for name, values, budget in (
+        ("import cli", imports, args.max_import_ms),
+        ("kt --help", helps, args.max_help_ms),
+    ):
+        median = statistics.median(values)
+        status = "ok" if median <= budget else "OVER BUDGET"
+        failed |= median > budget
+        print(
+            f"{name:>12}  {median:>8.1f} ms median, {min(values):.1f} ms min"
+            f"  (budget {budget:.0f} ms) {status}"
+        )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,16 +19,27 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from importlib.metadata import PackageNotFoundError, version
+from typing import Any
 
-try:
-    __version__ = version("kafka-tools")
-except PackageNotFoundError:
-    # package is not installed
-    __version__ = "0.0.0"
 
-version_info = __version__.split(".")
-"""The decomposed version, split across "``.``."
+def __getattr__(name: str) -> Any:
+    """Look up the version on first use.
 
-Use this for version comparison.
-"""
+    Reading the package metadata is slow, so it is skipped for imports that
+    do not need the version, like the start of the kt command.
+    """
+    if name not in ("__version__", "version_info"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        __version__ = version("kafka-tools")
+    except PackageNotFoundError:
+        # package is not installed
+        __version__ = "0.0.0"
+
+    # version_info is the decomposed version, split across "``.``".
+    # Use this for version comparison.
+    version_info = __version__.split(".")
+    globals().update(__version__=__version__, version_info=version_info)
+    return globals()[name]
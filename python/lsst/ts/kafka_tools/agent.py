@@ -0,0 +1,436 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Any, Callable
+
+from confluent_kafka.admin import ClusterMetadata
+
+from .constants import (
+    AGENT_LAG_INTERVAL,
+    AGENT_METADATA_INTERVAL,
+    AGENT_REQUEST_TIMEOUT,
+    METADATA_CACHE_TTL,
+)
+from .consumers import consumer_groups_lag_by_prefix
+from .helpers import generate_admin_client, get_cache_dir
+from .metadata import metadata_from_snapshot, metadata_to_snapshot
+from .type_hints import ScriptContext
+
+__all__ = [
+    "Agent",
+    "agent_group_lag",
+    "agent_socket_path",
+    "invalidate_agent_metadata",
+    "read_agent_metadata",
+    "request_agent",
+]
+
+# Data older than this many refresh intervals is not served, so a broken
+# refresh makes the clients fall back to direct calls.
+_MAX_AGE_INTERVALS = 3
+# Seconds before a failed refresh is tried again.
+_RETRY_INTERVAL = 5.0
+
+
+def agent_socket_path(site: str) -> pathlib.Path:
+    """Return the socket path of the agent of a site.
+
+    Parameters
+    ----------
+    site : str
+        The name of the site.
+
+    Returns
+    -------
+    pathlib.Path
+        The Unix socket in the package cache directory.
+    """
+    return get_cache_dir() / "agent" / f"{site}.sock"
+
+
+def request_agent(
+    site: str, op: str, timeout: float = AGENT_REQUEST_TIMEOUT, **params: Any
+) -> dict[str, Any] | None:
+    """Send a request to the agent of a site.
+
+    Parameters
+    ----------
+    site : str
+        The name of the site.
+    op : str
+        The operation: ``ping``, ``metadata``, ``lag``, ``invalidate`` or
+        ``stop``.
+    timeout : float, optional
+        Seconds to wait for the reply.
+    **params : Any
+        The parameters of the operation.
+
+    Returns
+    -------
+    dict[str, Any] or None
+        The reply, None if no agent is running, it does not answer in time
+        or it has no fresh data for the request.
+    """
+    path = agent_socket_path(site)
+    # Without a running agent, skip the connect attempt.
+    if not path.exists():
+        return None
+    request = json.dumps({"op": op, **params}).encode("utf-8") + b"\n"
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(request)
+            with sock.makefile("rb") as istream:
+                reply = json.loads(istream.readline())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(reply, dict) or not reply.get("ok"):
+        return None
+    return reply
+
+
+def read_agent_metadata(ctxobj: ScriptContext) -> ClusterMetadata | None:
+    """Get the cluster metadata of the context site from its agent.
+
+    The agent is skipped if the context asks for a ``refresh`` and its
+    metadata is not used once older than the ``metadata_ttl`` of the
+    context.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        The context object from the CLI invocation.
+
+    Returns
+    -------
+    ClusterMetadata or None
+        The topics and partitions, None if no agent has fresh metadata.
+    """
+    ttl = ctxobj.get("metadata_ttl", METADATA_CACHE_TTL)
+    if ctxobj.get("refresh", False) or ttl <= 0:
+        return None
+    reply = request_agent(ctxobj["site"], "metadata")
+    if reply is None or reply["age"] >= ttl:
+        return None
+    return metadata_from_snapshot(reply["data"])
+
+
+def invalidate_agent_metadata(site: str) -> None:
+    """Make the agent of a site fetch the metadata again after a change.
+
+    Parameters
+    ----------
+    site : str
+        The name of the site.
+    """
+    request_agent(site, "invalidate")
+
+
+def agent_group_lag(
+    ctxobj: ScriptContext, group_id: str | None = None, prefix: str | None = None
+) -> dict[str, Any] | None:
+    """Get consumer group lag from the agent of the context site.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        The context object from the CLI invocation.
+    group_id : str, optional
+        The consumer group to get the lag of.
+    prefix : str, optional
+        Get the lag of all groups with this prefix instead.
+
+    Returns
+    -------
+    dict[str, Any] or None
+        The lag in the form of `consumer_group_lag`, or of
+        `consumer_groups_lag_by_prefix` for a prefix. None if no agent has
+        fresh lag for the request.
+    """
+    params = {"prefix": prefix} if prefix is not None else {"group": group_id}
+    reply = request_agent(ctxobj["site"], "lag", **params)
+    return None if reply is None else reply["data"]
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: _AgentServer
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            reply = self.server.agent.handle(request)
+        except (ValueError, TypeError, KeyError) as e:
+            reply = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(reply, separators=(",", ":")).encode("utf-8"))
+        self.wfile.write(b"\n")
+
+
+class _AgentServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, agent: Agent) -> None:
+        self.agent = agent
+        super().__init__(path, _RequestHandler)
+
+
+class Agent:
+    """Keep the metadata and consumer group lag of a site in memory.
+
+    A background thread fetches the cluster metadata and the lag of all
+    consumer groups on their own intervals, over the shared AdminClient of
+    the site. Each metadata refresh fetches the full cluster metadata, there
+    are no incremental updates. `serve` answers requests for them on a Unix
+    socket.
+
+    Parameters
+    ----------
+    site : str
+        The name of the site.
+    metadata_interval : float, optional
+        Seconds between metadata refreshes.
+    lag_interval : float, optional
+        Seconds between consumer group lag refreshes.
+    """
+
+    def __init__(
+        self,
+        site: str,
+        metadata_interval: float = AGENT_METADATA_INTERVAL,
+        lag_interval: float = AGENT_LAG_INTERVAL,
+    ) -> None:
+        """Class constructor."""
+        self.site = site
+        self.metadata_interval = metadata_interval
+        self.lag_interval = lag_interval
+        self.ctxobj: ScriptContext = {"site": site, "timeout": 30000}
+        self.started = time.time()
+        self._metadata: dict[str, Any] | None = None
+        self._metadata_time = 0.0
+        self._lag: dict[str, dict[str, Any]] | None = None
+        self._lag_time = 0.0
+        self._metadata_due = 0.0
+        self._lag_due = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._server: _AgentServer | None = None
+
+    def refresh_metadata(self) -> None:
+        """Fetch the cluster metadata."""
+        md = generate_admin_client(self.site).list_topics()
+        snapshot = metadata_to_snapshot(md)
+        with self._lock:
+            self._metadata = snapshot
+            self._metadata_time = time.time()
+
+    def refresh_lag(self) -> None:
+        """Fetch the committed and end offsets of all consumer groups."""
+        result = consumer_groups_lag_by_prefix(self.ctxobj, "")
+        lag = {group["group_id"]: group for group in result["groups"]}
+        with self._lock:
+            self._lag = lag
+            self._lag_time = time.time()
+
+    def invalidate(self) -> None:
+        """Drop the metadata and fetch it again right away."""
+        with self._lock:
+            self._metadata = None
+            self._metadata_time = 0.0
+        self._metadata_due = 0.0
+        self._wake.set()
+
+    def _run_refresh(self, refresh: Callable[[], None], interval: float) -> float:
+        """Run a refresh, return the time of the next one."""
+        try:
+            refresh()
+        except Exception as e:
+            print(f"{refresh.__name__} failed: {e}", file=sys.stderr, flush=True)
+            interval = min(interval, _RETRY_INTERVAL)
+        return time.time() + interval
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.is_set():
+            now = time.time()
+            if self._metadata_due <= now:
+                self._metadata_due = self._run_refresh(
+                    self.refresh_metadata, self.metadata_interval
+                )
+            if self._lag_due <= now:
+                self._lag_due = self._run_refresh(self.refresh_lag, self.lag_interval)
+            next_due = min(self._metadata_due, self._lag_due)
+            self._wake.wait(max(0.0, next_due - time.time()))
+            self._wake.clear()
+
+    def _age(self, timestamp: float, interval: float) -> float | None:
+        age = time.time() - timestamp
+        return age if age < interval * _MAX_AGE_INTERVALS else None
+
+    def _lag_reply(self, request: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            lag = self._lag
+            age = self._age(self._lag_time, self.lag_interval)
+        if lag is None or age is None:
+            return {"ok": False}
+        if "prefix" in request:
+            prefix = request["prefix"]
+            groups = [lag[x] for x in sorted(lag) if x.startswith(prefix)]
+            data = {
+                "prefix": prefix,
+                "total_lag": sum(x["total_lag"] for x in groups),
+                "groups": groups,
+            }
+            return {"ok": True, "age": age, "data": data}
+        group = lag.get(request["group"])
+        if group is None:
+            # Possibly a new group, leave it to a direct call.
+            return {"ok": False}
+        return {"ok": True, "age": age, "data": group}
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Answer a request.
+
+        Parameters
+        ----------
+        request : dict[str, Any]
+            The request with its ``op`` and parameters.
+
+        Returns
+        -------
+        dict[str, Any]
+            The reply. ``ok`` is false if there is no fresh data.
+        """
+        op = request["op"]
+        if op == "ping":
+            with self._lock:
+                return {
+                    "ok": True,
+                    "site": self.site,
+                    "pid": os.getpid(),
+                    "uptime": time.time() - self.started,
+                    "metadata_age": self._age(
+                        self._metadata_time, self.metadata_interval
+                    ),
+                    "lag_age": self._age(self._lag_time, self.lag_interval),
+                }
+        if op == "metadata":
+            with self._lock:
+                snapshot = self._metadata
+                age = self._age(self._metadata_time, self.metadata_interval)
+            if snapshot is None or age is None:
+                return {"ok": False}
+            return {"ok": True, "age": age, "data": snapshot}
+        if op == "lag":
+            return self._lag_reply(request)
+        if op == "invalidate":
+            self.invalidate()
+            return {"ok": True}
+        if op == "stop":
+            self.stop()
+            return {"ok": True}
+        raise ValueError(f"Unknown operation {op!r}")
+
+    def serve(self) -> None:
+        """Refresh in the background and answer requests until stopped.
+
+        Raises
+        ------
+        RuntimeError
+            If another agent already serves the site.
+        """
+        path = agent_socket_path(self.site)
+        if request_agent(self.site, "ping") is not None:
+            raise RuntimeError(f"An agent for {self.site} is already running.")
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # A socket left behind by an agent that did not stop cleanly.
+        path.unlink(missing_ok=True)
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _AgentServer(str(path), self)
+        finally:
+            os.umask(old_umask)
+        refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+        refresher.start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._stop.set()
+            self._wake.set()
+            self._server.server_close()
+            path.unlink(missing_ok=True)
+            refresher.join()
+
+    def stop(self) -> None:
+        """Make `serve` return, from any thread but the serving one."""
+        self._stop.set()
+        self._wake.set()
+        if self._server is not None:
+            threading.Thread(target=self._server.shutdown).start()
+
+
+def start_agent_daemon(agent: Agent) -> pathlib.Path:
+    """Serve an agent in a detached background process.
+
+    The process double forks away from the terminal and writes its output
+    to a log file next to the socket. Returns once the daemon process is
+    detached, not once it serves, see `request_agent` to wait for it.
+
+    Parameters
+    ----------
+    agent : Agent
+        The agent to serve. No client of the site should have been created
+        in this process yet.
+
+    Returns
+    -------
+    pathlib.Path
+        The log file of the daemon.
+    """
+    log_file = agent_socket_path(agent.site).with_suffix(".log")
+    log_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    pid = os.fork()
+    if pid > 0:
+        os.waitpid(pid, 0)
+        return log_file
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+    code = 0
+    try:
+        with open(os.devnull, "rb") as devnull, log_file.open("a") as log:
+            os.dup2(devnull.fileno(), 0)
+            os.dup2(log.fileno(), 1)
+            os.dup2(log.fileno(), 2)
+        agent.serve()
+    except BaseException as e:
+        print(f"Agent for {agent.site} failed: {e}", file=sys.stderr, flush=True)
+        code = 1
+    os._exit(code)
@@ -21,41 +21,150 @@
 
 from __future__ import annotations
 
-import pathlib
+import importlib
 from functools import update_wrapper
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import click
+from click.shell_completion import CompletionItem
+
+if TYPE_CHECKING:
+    from .commands.auth import auth, auth_create_prop_files
+    from .commands.topics import topics, topics_list
+
+__all__ = [
+    "LAZY_COMMANDS",
+    "LazyGroup",
+    "auth",
+    "auth_create_prop_files",
+    "main",
+    "topics",
+    "topics_list",
+]
+
+# The subcommands of kt with the module they are defined in and their short
+# help, so that kt --help and completion do not import the Kafka client.
+LAZY_COMMANDS = {
+    "agent": (
+        "lsst.ts.kafka_tools.commands.agent:agent",
+        "Commands for the background agent of a site.",
+    ),
+    "auth": (
+        "lsst.ts.kafka_tools.commands.auth:auth",
+        "Authentication commands.",
+    ),
+    "config": (
+        "lsst.ts.kafka_tools.commands.config:config",
+        "Commands for configurations.",
+    ),
+    "consumers": (
+        "lsst.ts.kafka_tools.commands.consumers:consumers",
+        "Commands for Kafka consumers and consumer groups.",
+    ),
+    "shell": (
+        "lsst.ts.kafka_tools.commands.shell:shell",
+        "Run commands against a site in an interactive shell.",
+    ),
+    "topics": (
+        "lsst.ts.kafka_tools.commands.topics:topics",
+        "Commands for Kafka topics.",
+    ),
+}
+
+
+# Commands that used to be defined in this module, with the module of the
+# commands package they live in now.
+_COMMAND_EXPORTS = {
+    "auth": "auth",
+    "auth_create_prop_files": "auth",
+    "topics": "topics",
+    "topics_list": "topics",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import the commands re-exported from the commands package on use.
+
+    Importing them here directly would load the Kafka client at the start
+    of every kt command.
+    """
+    module_name = _COMMAND_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".commands.{module_name}", __package__)
+    return getattr(module, name)
+
+
+class LazyGroup(click.Group):
+    """A command group that imports its subcommands when they are run.
+
+    Listing the subcommands in the help and in shell completion uses the
+    given short help and imports nothing.
+
+    Parameters
+    ----------
+    *args : Any
+        The arguments of `click.Group`.
+    lazy_commands : dict[str, tuple[str, str]], optional
+        The subcommand names with the ``module:attribute`` import path of the
+        command and its short help.
+    **kwargs : Any
+        The keyword arguments of `click.Group`.
+    """
 
-from .auth import create_properties_files
-from .configs import show_broker_config
-from .constants import SITES, ListConsumerOpts, ListTopicsOpts
-from .consumers import (
-    consumer_group_lag,
-    consumer_groups_lag_by_prefix,
-    delete_consumers,
-    describe_consumers,
-    list_consumers,
-    summarize_consumers,
-)
-from .helpers import acknowledge_deletion
-from .print_helpers import (
-    consumer_descriptions,
-    consumer_summary,
-    filtered_topics,
-    list_broker_configs,
-    summerize_deletion,
-    two_column_table,
-)
-from .topics import (
-    delete_topics,
-    filter_topics,
-    get_topics,
-    query_topic_time_range,
-    set_partitions_topics,
-)
-
-__all__ = ["auth", "auth_create_prop_files", "main", "topics", "topics_list"]
+    def __init__(
+        self,
+        *args: Any,
+        lazy_commands: dict[str, tuple[str, str]] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Class constructor."""
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            self.add_command(self._load(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _load(self, cmd_name: str) -> click.Command:
+        import_path = self.lazy_commands[cmd_name][0]
+        module_name, attr = import_path.split(":")
+        command = getattr(importlib.import_module(module_name), attr)
+        if not isinstance(command, click.Command):
+            raise ValueError(f"{import_path} is not a click command.")
+        return command
+
+    def _short_help(self, ctx: click.Context, cmd_name: str, limit: int) -> str:
+        command = self.commands.get(cmd_name)
+        if command is not None:
+            return command.get_short_help_str(limit)
+        return self.lazy_commands[cmd_name][1]
+
+    def format_commands(
+        self, ctx: click.Context, formatter: click.HelpFormatter
+    ) -> None:
+        names = self.list_commands(ctx)
+        if not names:
+            return
+        limit = formatter.width - 6 - max(len(x) for x in names)
+        rows = [(x, self._short_help(ctx, x, limit)) for x in names]
+        with formatter.section("Commands"):
+            formatter.write_dl(rows)
+
+    def shell_complete(
+        self, ctx: click.Context, incomplete: str
+    ) -> list[CompletionItem]:
+        results = [
+            CompletionItem(x, help=self._short_help(ctx, x, 45))
+            for x in self.list_commands(ctx)
+            if x.startswith(incomplete)
+        ]
+        results.extend(click.Command.shell_complete(self, ctx, incomplete))
+        return results
 
 
 def pass_obj(f: Any) -> Any:
@@ -66,396 +175,11 @@ def pass_obj(f: Any) -> Any:
     return update_wrapper(new_func, f)
 
 
-@click.group(context_settings={"help_option_names": ["-h", "--help"]})
+@click.group(
+    cls=LazyGroup,
+    lazy_commands=LAZY_COMMANDS,
+    context_settings={"help_option_names": ["-h", "--help"]},
+)
 @click.version_option(message="%(version)s")
 def main() -> None:
     """Command line interface for Kafka operations."""
-
-
-@main.group()
-def auth() -> None:
-    """Authentication commands."""
-
-
-@auth.command("create-prop-files")
-@click.option(
-    "--auth-dir",
-    type=click.Path(path_type=pathlib.Path),
-    help="Directory to create auth properties files in.",
-)
-def auth_create_prop_files(auth_dir: pathlib.Path | None) -> None:
-    """Create authorization properties files with no password."""
-    create_properties_files(auth_dir)
-
-
-@main.group()
-@click.argument("site", type=click.Choice(SITES, case_sensitive=False))
-@click.pass_context
-def topics(ctx: click.Context, site: str) -> None:
-    """Commands for Kafka topics."""
-    ctx.obj = {
-        "site": site,
-    }
-
-
-@topics.command("list")
-@click.option(
-    "--regex", type=str, help="Pass a regular expression to filter the topic list."
-)
-@click.option("--name", type=str, help="Pass a name to filter the topic list.")
-@click.pass_context
-def topics_list(ctx: click.Context, regex: str | None, name: str | None) -> None:
-    """List the available Kafka topics."""
-    if regex is not None and name is not None:
-        raise click.exceptions.UsageError(
-            "Cannot use regex and name options simultaneously.", ctx
-        )
-    topics = get_topics(ctx.obj)
-    filtered_topics(
-        topics, ListTopicsOpts(regex=regex, name=name, name_list=None, name_file=None)
-    )
-
-
-@topics.command("delete")
-@click.option(
-    "--regex", type=str, help="Pass a regular expression to filter the topic list."
-)
-@click.option("--name", type=str, help="Pass a name to filter the topic list.")
-@click.option(
-    "--name-list",
-    type=str,
-    help="Comma-delimited list of names to filter the topic list.",
-)
-@click.option("--name-file", type=pathlib.Path, help="File ")
-@click.pass_context
-def topics_delete(
-    ctx: click.Context,
-    regex: str | None,
-    name: str | None,
-    name_list: str | None,
-    name_file: pathlib.Path | None,
-) -> None:
-    """Delete topics."""
-    check_args = [
-        regex is not None,
-        name is not None,
-        name_list is not None,
-        name_file is not None,
-    ]
-    if sum(check_args) > 1:
-        raise click.exceptions.UsageError(
-            "Cannot use regex, name, name-list and name-file options simultaneously.",
-            ctx,
-        )
-    if not sum(check_args):
-        raise click.exceptions.UsageError(
-            "Must provide one of the following options: --regex, --name, --name-list or --name-file.",
-            ctx,
-        )
-
-    message = f"Delete all requested topics from {ctx.obj['site']}"
-    acknowledge_deletion(message)
-
-    topics = filter_topics(
-        ctx.obj,
-        ListTopicsOpts(
-            regex=regex, name=name, name_list=name_list, name_file=name_file
-        ),
-    )
-    done, not_done = delete_topics(ctx.obj, topics)
-    summerize_deletion("topics", done, not_done)
-
-
-@topics.command("set-partitions")
-@click.argument("csc")
-@click.argument("number")
-@click.pass_context
-def topics_set_partitions(ctx: click.Context, csc: str, number: str) -> None:
-    """Change the number of partitions on CSC telemetry topics."""
-    topics = filter_topics(
-        ctx.obj, ListTopicsOpts(regex=None, name=csc, name_list=None, name_file=None)
-    )
-    done, not_done = set_partitions_topics(ctx.obj, topics, csc, int(number))
-    num_done = len(done)
-    num_not_done = len(not_done)
-    print(f"Found {num_done + num_not_done} topics to modify")
-    print(f"{num_done} modified successfully, {num_not_done} not successfully modified")
-
-
-@topics.command("query")
-@click.argument("start", type=str)
-@click.argument("end", type=str)
-@click.argument("topic", type=str)
-@click.option(
-    "--max-messages",
-    type=int,
-    default=1000,
-    show_default=True,
-    help="Maximum number of messages to return.",
-)
-@click.pass_context
-def topics_query(
-    ctx: click.Context,
-    start: str,
-    end: str,
-    topic: str,
-    max_messages: int,
-) -> None:
-    """Query a topic for messages within a time range.
-
-    Time format: YYYY-MM-DD-HH:MM (UTC)
-    """
-
-    records = query_topic_time_range(
-        ctx.obj,
-        topic=topic,
-        start_str=start,
-        end_str=end,
-        max_messages=max_messages,
-    )
-
-    for r in records:
-        click.echo(f"{topic} ts={r['timestamp_ms']} \n value={r['value']}")
-
-    click.echo(f"\nReturned {len(records)} message(s)")
-
-
-@main.group()
-@click.argument("site", type=click.Choice(SITES, case_sensitive=False))
-@click.option(
-    "--timeout",
-    type=int,
-    default=30000,
-    help="Set the timeout for the kafka commands in milliseconds.",
-)
-@click.pass_context
-def consumers(ctx: click.Context, site: str, timeout: int) -> None:
-    """Commands for Kafka consumers and consumer groups."""
-    ctx.obj = {
-        "site": site,
-        "timeout": timeout,
-    }
-
-
-@consumers.command("summary")
-@click.option(
-    "--no-telegraph-filter",
-    is_flag=True,
-    help="Don't filter telegraph consumers from list.",
-)
-@click.pass_context
-def consumers_summary(ctx: click.Context, no_telegraph_filter: bool) -> None:
-    """Summarize number of consumer groups."""
-    summary = summarize_consumers(ctx.obj, no_telegraph_filter=no_telegraph_filter)
-    consumer_summary(summary)
-
-
-@consumers.command("list")
-@click.option(
-    "--no-connector-filter",
-    is_flag=True,
-    help="Don't filter connector consumers from list.",
-)
-@click.option(
-    "--all",
-    "consumer_state",
-    flag_value="All",
-    default=True,
-    help="Show all consumers.",
-)
-@click.option(
-    "--active", "consumer_state", flag_value="Stable", help="Show active consumers."
-)
-@click.option(
-    "--inactive", "consumer_state", flag_value="Empty", help="Show inactive consumers."
-)
-@click.option(
-    "--regex", type=str, help="Pass a regular expression to filter the consumer list."
-)
-@click.option(
-    "--regex-inclusive",
-    "regex_mode",
-    type=str,
-    flag_value="Inclusive",
-    help="Include consumers that match regex in list.",
-)
-@click.option(
-    "--regex-exclusive",
-    "regex_mode",
-    default=True,
-    type=str,
-    flag_value="Exclusive",
-    help="Exclude consumers that match regex from list (default mode).",
-)
-@click.pass_context
-def consumers_list(
-    ctx: click.Context,
-    regex: str | None,
-    regex_mode: str,
-    no_connector_filter: bool,
-    consumer_state: str,
-) -> None:
-    """Filter the present consumer groups."""
-    consumers, max_length = list_consumers(
-        ctx.obj,
-        ListConsumerOpts(
-            regex=regex,
-            regex_mode=regex_mode,
-            no_connector_filter=no_connector_filter,
-            consumer_state=consumer_state,
-        ),
-    )
-    two_column_table(consumers, max_length)
-
-
-@consumers.command("delete")
-@click.option(
-    "--delete-connectors",
-    is_flag=True,
-    help="Allow the deletion of telegraf consumers.",
-)
-@click.option(
-    "--regex",
-    type=str,
-    help="Pass a regular expression to filter the consumers to be deleted.",
-)
-@click.option(
-    "--regex-inclusive",
-    "regex_mode",
-    type=str,
-    flag_value="Inclusive",
-    help="Delete consumers that match regex.",
-)
-@click.option(
-    "--regex-exclusive",
-    "regex_mode",
-    default=True,
-    type=str,
-    flag_value="Exclusive",
-    help="Delete consumers that do not match regex (default mode).",
-)
-@click.pass_context
-def consumers_delete(
-    ctx: click.Context, regex: str | None, regex_mode: str, delete_connectors: bool
-) -> None:
-    """Delete all inactive consumer groups"""
-    consumers, _ = list_consumers(
-        ctx.obj,
-        ListConsumerOpts(
-            regex=regex,
-            regex_mode=regex_mode,
-            no_connector_filter=delete_connectors,
-            consumer_state="Empty",
-        ),
-    )
-    consumers_to_delete = [x[0] for x in consumers]
-    if not len(consumers_to_delete):
-        print("No consumers to delete.")
-        return
-    done, not_done = delete_consumers(ctx.obj, consumers_to_delete)
-    summerize_deletion("consumers", done, not_done)
-
-
-@consumers.command("describe")
-@click.argument("consumers", type=str)
-@click.option(
-    "--summary",
-    is_flag=True,
-    help="Summarize the consumers groups by just listing the number of topics.",
-)
-@click.pass_context
-def consumers_describe(ctx: click.Context, consumers: str, summary: bool) -> None:
-    """Describe the given set of consumer groups."""
-    if "," in consumers:
-        consumer_list = consumers.split(",")
-    else:
-        consumer_list = [consumers]
-    descrs = describe_consumers(ctx.obj, consumer_list)
-    consumer_descriptions(descrs, summary)
-
-
-@consumers.command("lag")
-@click.argument("group-id", type=str, required=False, default=None)
-@click.option(
-    "--telegraf",
-    "mode",
-    flag_value="telegraf",
-    help="Show combined lag for all consumer groups starting with 'telegraf-kafka-consumer'.",
-)
-@click.option(
-    "--love-producer",
-    "mode",
-    flag_value="love-producer",
-    help="Show combined lag for all consumer groups starting with 'saluser@love-producer'.",
-)
-@click.option(
-    "--summary",
-    is_flag=True,
-    help="Show only per-group total lag and combined lag. Ignored when querying a single group.",
-)
-@click.pass_context
-def consumers_lag(
-    ctx: click.Context, group_id: str | None, mode: str | None, summary: bool
-) -> None:
-    """Show the total lag for a consumer group.
-
-    Provide GROUP_ID to query a single group, or use --telegraf /
-    --love-producer to aggregate across all matching groups.
-    """
-    if mode is not None and group_id is not None:
-        raise click.UsageError(
-            "Cannot use GROUP_ID together with --telegraf or --love-producer."
-        )
-    if mode is None and group_id is None:
-        raise click.UsageError(
-            "Provide a GROUP_ID or use --telegraf / --love-producer."
-        )
-
-    if mode is not None:
-        prefix = (
-            "telegraf-kafka-consumer" if mode == "telegraf" else "saluser@love-producer"
-        )
-        result = consumer_groups_lag_by_prefix(ctx.obj, prefix)
-        for group in result["groups"]:
-            click.echo(f"\nGroup: {group['group_id']}")
-            if not summary:
-                for p in group["partitions"]:
-                    click.echo(
-                        f"  {p['topic']}[{p['partition']}]"
-                        f"  committed={p['committed']}"
-                        f"  end_offset={p['end_offset']}"
-                        f"  lag={p['lag']}"
-                    )
-            click.echo(f"  Group total lag: {group['total_lag']}")
-        click.echo(f"\nCombined lag for '{prefix}*': {result['total_lag']}")
-    else:
-        result = consumer_group_lag(ctx.obj, group_id)
-        click.echo(f"Group: {result['group_id']}")
-        if not summary:
-            for p in result["partitions"]:
-                click.echo(
-                    f"  {p['topic']}[{p['partition']}]"
-                    f"  committed={p['committed']}"
-                    f"  end_offset={p['end_offset']}"
-                    f"  lag={p['lag']}"
-                )
-        click.echo(f"Total lag: {result['total_lag']}")
-
-
-@main.group()
-@click.argument("site", type=click.Choice(SITES, case_sensitive=False))
-@click.pass_context
-def config(ctx: click.Context, site: str) -> None:
-    """Commands for configurations."""
-    ctx.obj = {
-        "site": site,
-    }
-
-
-@config.command("brokers")
-@click.argument("broker-id", type=str)
-@click.pass_context
-def config_brokers(ctx: click.Context, broker_id: str) -> None:
-    """Show the broker configuration."""
-    configs = show_broker_config(ctx.obj, broker_id)
-    list_broker_configs(broker_id, configs)
@@ -0,0 +1,126 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import time
+
+import click
+
+from ..agent import Agent, agent_socket_path, request_agent, start_agent_daemon
+from ..constants import (
+    AGENT_LAG_INTERVAL,
+    AGENT_METADATA_INTERVAL,
+    AGENT_START_TIMEOUT,
+    SITES,
+)
+
+__all__ = ["agent", "agent_start", "agent_status", "agent_stop"]
+
+
+@click.group()
+@click.argument("site", type=click.Choice(SITES, case_sensitive=False))
+@click.pass_context
+def agent(ctx: click.Context, site: str) -> None:
+    """Commands for the background agent of a site.
+
+    A running agent keeps the topic metadata and the consumer group lag of
+    the site in memory. The topics commands and consumers lag answer from
+    it and fall back to the site when no agent runs.
+    """
+    ctx.obj = {
+        "site": site,
+    }
+
+
+@agent.command("start")
+@click.option(
+    "--metadata-interval",
+    type=click.FloatRange(min=1),
+    default=AGENT_METADATA_INTERVAL,
+    show_default=True,
+    help="Seconds between topic metadata refreshes.",
+)
+@click.option(
+    "--lag-interval",
+    type=click.FloatRange(min=1),
+    default=AGENT_LAG_INTERVAL,
+    show_default=True,
+    help="Seconds between consumer group lag refreshes.",
+)
+@click.option(
+    "--foreground", is_flag=True, help="Serve in this process instead of a daemon."
+)
+@click.pass_context
+def agent_start(
+    ctx: click.Context, metadata_interval: float, lag_interval: float, foreground: bool
+) -> None:
+    """Start the agent of the site."""
+    site = ctx.obj["site"]
+    if request_agent(site, "ping") is not None:
+        raise click.ClickException(f"An agent for {site} is already running.")
+    server = Agent(site, metadata_interval, lag_interval)
+    if foreground:
+        click.echo(f"Agent for {site} listening on {agent_socket_path(site)}")
+        try:
+            server.serve()
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        return
+    log_file = start_agent_daemon(server)
+    deadline = time.monotonic() + AGENT_START_TIMEOUT
+    while time.monotonic() < deadline:
+        reply = request_agent(site, "ping")
+        if reply is not None:
+            click.echo(
+                f"Agent for {site} running as pid {reply['pid']},"
+                f" listening on {agent_socket_path(site)}"
+            )
+            return
+        time.sleep(0.1)
+    raise click.ClickException(f"The agent for {site} did not start, see {log_file}.")
+
+
+@agent.command("stop")
+@click.pass_context
+def agent_stop(ctx: click.Context) -> None:
+    """Stop the agent of the site."""
+    site = ctx.obj["site"]
+    if request_agent(site, "stop") is None:
+        click.echo(f"No agent running for {site}.")
+    else:
+        click.echo(f"Stopped the agent for {site}.")
+
+
+@agent.command("status")
+@click.pass_context
+def agent_status(ctx: click.Context) -> None:
+    """Show whether the agent of the site runs and how fresh its data is."""
+    site = ctx.obj["site"]
+    reply = request_agent(site, "ping")
+    if reply is None:
+        click.echo(f"No agent running for {site}.")
+        ctx.exit(1)
+    click.echo(f"Agent for {site} running as pid {reply['pid']}")
+    click.echo(f"Uptime: {reply['uptime']:.0f} s")
+    for name, key in (("Metadata", "metadata_age"), ("Lag", "lag_age")):
+        age = reply[key]
+        click.echo(f"{name} age: " + ("stale" if age is None else f"{age:.1f} s"))
@@ -0,0 +1,46 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import pathlib
+
+import click
+
+from ..auth import create_properties_files
+
+__all__ = ["auth", "auth_create_prop_files"]
+
+
+@click.group()
+def auth() -> None:
+    """Authentication commands."""
+
+
+@auth.command("create-prop-files")
+@click.option(
+    "--auth-dir",
+    type=click.Path(path_type=pathlib.Path),
+    help="Directory to create auth properties files in.",
+)
+def auth_create_prop_files(auth_dir: pathlib.Path | None) -> None:
+    """Create authorization properties files with no password."""
+    create_properties_files(auth_dir)
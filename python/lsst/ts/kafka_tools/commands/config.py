@@ -0,0 +1,49 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import click
+
+from ..configs import show_broker_config
+from ..constants import SITES
+from ..print_helpers import list_broker_configs
+
+__all__ = ["config", "config_brokers"]
+
+
+@click.group()
+@click.argument("site", type=click.Choice(SITES, case_sensitive=False))
+@click.pass_context
+def config(ctx: click.Context, site: str) -> None:
+    """Commands for configurations."""
+    ctx.obj = {
+        "site": site,
+    }
+
+
+@config.command("brokers")
+@click.argument("broker-id", type=str)
+@click.pass_context
+def config_brokers(ctx: click.Context, broker_id: str) -> None:
+    """Show the broker configuration."""
+    configs = show_broker_config(ctx.obj, broker_id)
+    list_broker_configs(broker_id, configs)
@@ -0,0 +1,328 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import pathlib
+from typing import Any
+
+import click
+
+from ..agent import agent_group_lag
+from ..constants import SITES, ListConsumerOpts
+from ..consumers import (
+    consumer_group_lag,
+    consumer_groups_lag_by_prefix,
+    delete_consumers,
+    describe_consumers,
+    list_consumers,
+    summarize_consumers,
+)
+from ..matchers import MATCH_MODES
+from ..print_helpers import (
+    consumer_descriptions,
+    consumer_summary,
+    summerize_deletion,
+    two_column_table,
+)
+
+__all__ = [
+    "consumers",
+    "consumers_delete",
+    "consumers_describe",
+    "consumers_lag",
+    "consumers_list",
+    "consumers_summary",
+]
+
+
+def name_options(f: Any) -> Any:
+    """Add the consumer group name filters, matched like topic names."""
+    options = [
+        click.option("--name", type=str, help="Pass a name to filter the consumers."),
+        click.option(
+            "--name-list",
+            type=str,
+            help="Comma-delimited list of names to filter the consumers.",
+        ),
+        click.option(
+            "--name-file",
+            type=pathlib.Path,
+            help="File with one name per line to filter the consumers.",
+        ),
+        click.option(
+            "--name-mode",
+            type=click.Choice(MATCH_MODES, case_sensitive=False),
+            default="substring",
+            show_default=True,
+            help="How the name, name-list and name-file entries match group names.",
+        ),
+    ]
+    for option in reversed(options):
+        f = option(f)
+    return f
+
+
+@click.group()
+@click.argument("site", type=click.Choice(SITES, case_sensitive=False))
+@click.option(
+    "--timeout",
+    type=int,
+    default=30000,
+    help="Set the timeout for the kafka commands in milliseconds.",
+)
+@click.pass_context
+def consumers(ctx: click.Context, site: str, timeout: int) -> None:
+    """Commands for Kafka consumers and consumer groups."""
+    ctx.obj = {
+        "site": site,
+        "timeout": timeout,
+    }
+
+
+@consumers.command("summary")
+@click.option(
+    "--no-telegraph-filter",
+    is_flag=True,
+    help="Don't filter telegraph consumers from list.",
+)
+@click.pass_context
+def consumers_summary(ctx: click.Context, no_telegraph_filter: bool) -> None:
+    """Summarize number of consumer groups."""
+    summary = summarize_consumers(ctx.obj, no_telegraph_filter=no_telegraph_filter)
+    consumer_summary(summary)
+
+
+@consumers.command("list")
+@click.option(
+    "--no-connector-filter",
+    is_flag=True,
+    help="Don't filter connector consumers from list.",
+)
+@click.option(
+    "--all",
+    "consumer_state",
+    flag_value="All",
+    default=True,
+    help="Show all consumers.",
+)
+@click.option(
+    "--active", "consumer_state", flag_value="Stable", help="Show active consumers."
+)
+@click.option(
+    "--inactive", "consumer_state", flag_value="Empty", help="Show inactive consumers."
+)
+@click.option(
+    "--regex", type=str, help="Pass a regular expression to filter the consumer list."
+)
+@name_options
+@click.option(
+    "--regex-inclusive",
+    "regex_mode",
+    type=str,
+    flag_value="Inclusive",
+    help="Include consumers that match the regex or names in list.",
+)
+@click.option(
+    "--regex-exclusive",
+    "regex_mode",
+    default=True,
+    type=str,
+    flag_value="Exclusive",
+    help="Exclude consumers that match the regex or names from list (default" " mode).",
+)
+@click.pass_context
+def consumers_list(
+    ctx: click.Context,
+    regex: str | None,
+    name: str | None,
+    name_list: str | None,
+    name_file: pathlib.Path | None,
+    name_mode: str,
+    regex_mode: str,
+    no_connector_filter: bool,
+    consumer_state: str,
+) -> None:
+    """Filter the present consumer groups."""
+    consumers, max_length = list_consumers(
+        ctx.obj,
+        ListConsumerOpts(
+            regex=regex,
+            regex_mode=regex_mode,
+            no_connector_filter=no_connector_filter,
+            consumer_state=consumer_state,
+            name=name,
+            name_list=name_list,
+            name_file=name_file,
+            match_mode=name_mode,
+        ),
+    )
+    two_column_table(consumers, max_length)
+
+
+@consumers.command("delete")
+@click.option(
+    "--delete-connectors",
+    is_flag=True,
+    help="Allow the deletion of telegraf consumers.",
+)
+@click.option(
+    "--regex",
+    type=str,
+    help="Pass a regular expression to filter the consumers to be deleted.",
+)
+@name_options
+@click.option(
+    "--regex-inclusive",
+    "regex_mode",
+    type=str,
+    flag_value="Inclusive",
+    help="Delete consumers that match the regex or names.",
+)
+@click.option(
+    "--regex-exclusive",
+    "regex_mode",
+    default=True,
+    type=str,
+    flag_value="Exclusive",
+    help="Delete consumers that do not match the regex or names (default mode).",
+)
+@click.pass_context
+def consumers_delete(
+    ctx: click.Context,
+    regex: str | None,
+    name: str | None,
+    name_list: str | None,
+    name_file: pathlib.Path | None,
+    name_mode: str,
+    regex_mode: str,
+    delete_connectors: bool,
+) -> None:
+    """Delete all inactive consumer groups"""
+    consumers, _ = list_consumers(
+        ctx.obj,
+        ListConsumerOpts(
+            regex=regex,
+            regex_mode=regex_mode,
+            no_connector_filter=delete_connectors,
+            consumer_state="Empty",
+            name=name,
+            name_list=name_list,
+            name_file=name_file,
+            match_mode=name_mode,
+        ),
+    )
+    consumers_to_delete = [x[0] for x in consumers]
+    if not len(consumers_to_delete):
+        print("No consumers to delete.")
+        return
+    done, not_done = delete_consumers(ctx.obj, consumers_to_delete)
+    summerize_deletion("consumers", done, not_done)
+
+
+@consumers.command("describe")
+@click.argument("consumers", type=str)
+@click.option(
+    "--summary",
+    is_flag=True,
+    help="Summarize the consumers groups by just listing the number of topics.",
+)
+@click.pass_context
+def consumers_describe(ctx: click.Context, consumers: str, summary: bool) -> None:
+    """Describe the given set of consumer groups."""
+    if "," in consumers:
+        consumer_list = consumers.split(",")
+    else:
+        consumer_list = [consumers]
+    descrs = describe_consumers(ctx.obj, consumer_list)
+    consumer_descriptions(descrs, summary)
+
+
+@consumers.command("lag")
+@click.argument("group-id", type=str, required=False, default=None)
+@click.option(
+    "--telegraf",
+    "mode",
+    flag_value="telegraf",
+    help="Show combined lag for all consumer groups starting with 'telegraf-kafka-consumer'.",
+)
+@click.option(
+    "--love-producer",
+    "mode",
+    flag_value="love-producer",
+    help="Show combined lag for all consumer groups starting with 'saluser@love-producer'.",
+)
+@click.option(
+    "--summary",
+    is_flag=True,
+    help="Show only per-group total lag and combined lag. Ignored when querying a single group.",
+)
+@click.pass_context
+def consumers_lag(
+    ctx: click.Context, group_id: str | None, mode: str | None, summary: bool
+) -> None:
+    """Show the total lag for a consumer group.
+
+    Provide GROUP_ID to query a single group, or use --telegraf /
+    --love-producer to aggregate across all matching groups.
+    """
+    if mode is not None and group_id is not None:
+        raise click.UsageError(
+            "Cannot use GROUP_ID together with --telegraf or --love-producer."
+        )
+    if mode is None and group_id is None:
+        raise click.UsageError(
+            "Provide a GROUP_ID or use --telegraf / --love-producer."
+        )
+
+    if mode is not None:
+        prefix = (
+            "telegraf-kafka-consumer" if mode == "telegraf" else "saluser@love-producer"
+        )
+        result = agent_group_lag(
+            ctx.obj, prefix=prefix
+        ) or consumer_groups_lag_by_prefix(ctx.obj, prefix)
+        for group in result["groups"]:
+            click.echo(f"\nGroup: {group['group_id']}")
+            if not summary:
+                for p in group["partitions"]:
+                    click.echo(
+                        f"  {p['topic']}[{p['partition']}]"
+                        f"  committed={p['committed']}"
+                        f"  end_offset={p['end_offset']}"
+                        f"  lag={p['lag']}"
+                    )
+            click.echo(f"  Group total lag: {group['total_lag']}")
+        click.echo(f"\nCombined lag for '{prefix}*': {result['total_lag']}")
+    else:
+        result = agent_group_lag(ctx.obj, group_id) or consumer_group_lag(
+            ctx.obj, group_id
+        )
+        click.echo(f"Group: {result['group_id']}")
+        if not summary:
+            for p in result["partitions"]:
+                click.echo(
+                    f"  {p['topic']}[{p['partition']}]"
+                    f"  committed={p['committed']}"
+                    f"  end_offset={p['end_offset']}"
+                    f"  lag={p['lag']}"
+                )
+        click.echo(f"Total lag: {result['total_lag']}")
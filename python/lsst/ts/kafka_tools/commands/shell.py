@@ -0,0 +1,42 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import click
+
+from ..cli import main
+from ..constants import SITES
+from ..shell import run_shell
+
+__all__ = ["shell"]
+
+
+@click.command("shell")
+@click.argument("site", type=click.Choice(SITES, case_sensitive=False))
+def shell(site: str) -> None:
+    """Run commands against a site in an interactive shell.
+
+    The commands are the ones of the topics, consumers and config groups
+    without the site, e.g. ``topics list --name MTMount``. The connection
+    and the topic metadata are kept between commands.
+    """
+    run_shell(site, main)
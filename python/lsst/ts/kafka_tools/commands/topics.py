@@ -0,0 +1,1216 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import pathlib
+import sys
+from functools import update_wrapper
+from typing import Any, Dict, Iterable
+
+import click
+
+from ..constants import (
+    COPY_COMPRESSION,
+    COPY_LINGER_MS,
+    COPY_MAX_BUFFER_KBYTES,
+    CREATE_CHUNK_SIZE,
+    CREATE_MAX_IN_FLIGHT,
+    DELETE_CHUNK_SIZE,
+    DELETE_CHUNK_TIMEOUT,
+    DELETE_MAX_IN_FLIGHT,
+    EXPORT_ROW_GROUP_SIZE,
+    HISTOGRAM_BUCKET_SECONDS,
+    METADATA_CACHE_TTL,
+    QUERY_BATCH_SIZE,
+    QUERY_MAX_MESSAGES,
+    RATE_WINDOWS,
+    SITES,
+    STREAM_BUFFER_SIZE,
+    TAIL_REFRESH_INTERVAL,
+    FetchOpts,
+    ListTopicsOpts,
+    TailStats,
+)
+from ..decoders import VALUE_FORMATS, AvroDecoder, get_value_decoder
+from ..dump import DumpWriter
+from ..export import EXPORT_FORMATS, export_records
+from ..filters import RecordFilter, parse_header_match
+from ..helpers import acknowledge_deletion, parse_duration
+from ..journal import DeletionJournal
+from ..matchers import MATCH_MODES
+from ..print_helpers import (
+    creation_progress,
+    filtered_topics,
+    histogram,
+    idle_topics,
+    query_plan,
+    rate_table,
+    stream_records,
+    summarize_topic_deletion,
+    tail_records,
+    topic_descriptions,
+)
+from ..topics import (
+    COMPRESSION_TYPES,
+    SAMPLE_METHODS,
+    copy_topic_time_range,
+    create_topics,
+    delete_topics,
+    describe_topics,
+    filter_topics,
+    find_idle_topics,
+    get_topics,
+    iter_topic_messages,
+    iter_topic_time_range,
+    iter_topics_messages,
+    iter_topics_time_range,
+    load_topic_specs,
+    plan_topic_time_range,
+    plan_topics_time_range,
+    query_topic_time_range,
+    sample_topic_time_range,
+    set_partitions_topics,
+    split_existing_topics,
+    tail_topics,
+    topic_histogram,
+    topic_rates,
+)
+from ..type_hints import ValueDecoder
+
+__all__ = [
+    "topics",
+    "topics_copy",
+    "topics_create",
+    "topics_delete",
+    "topics_describe",
+    "topics_export",
+    "topics_histogram",
+    "topics_idle",
+    "topics_list",
+    "topics_query",
+    "topics_rate",
+    "topics_set_partitions",
+    "topics_tail",
+]
+
+
+def fetch_options(f: Any) -> Any:
+    """Add the batch and fetch sizing options for bulk reads."""
+    options = [
+        click.option(
+            "--batch-size",
+            type=int,
+            default=QUERY_BATCH_SIZE,
+            show_default=True,
+            help="Number of messages fetched per consume call.",
+        ),
+        click.option(
+            "--fetch-min-bytes", type=int, help="Set fetch.min.bytes on the consumer."
+        ),
+        click.option(
+            "--fetch-max-bytes", type=int, help="Set fetch.max.bytes on the consumer."
+        ),
+        click.option(
+            "--max-partition-fetch-bytes",
+            type=int,
+            help="Set max.partition.fetch.bytes on the consumer.",
+        ),
+        click.option(
+            "--queued-max-messages-kbytes",
+            type=int,
+            help="Set queued.max.messages.kbytes on the consumer.",
+        ),
+    ]
+    for option in reversed(options):
+        f = option(f)
+
+    @click.pass_context
+    def new_func(ctx: click.Context, *args: Any, **kwargs: Any) -> Any:
+        kwargs["fetch"] = FetchOpts(
+            batch_size=kwargs.pop("batch_size"),
+            fetch_min_bytes=kwargs.pop("fetch_min_bytes"),
+            fetch_max_bytes=kwargs.pop("fetch_max_bytes"),
+            max_partition_fetch_bytes=kwargs.pop("max_partition_fetch_bytes"),
+            queued_max_messages_kbytes=kwargs.pop("queued_max_messages_kbytes"),
+        )
+        return ctx.invoke(f, *args, **kwargs)
+
+    return update_wrapper(new_func, f)
+
+
+def decoder_options(f: Any) -> Any:
+    """Add the message value decoding options."""
+    options = [
+        click.option(
+            "--value-format",
+            type=click.Choice(VALUE_FORMATS, case_sensitive=False),
+            default="utf8",
+            show_default=True,
+            help="Format of the message values.",
+        ),
+        click.option(
+            "--schema-registry",
+            type=str,
+            envvar="LSST_SCHEMA_REGISTRY_URL",
+            help="Schema registry URL for Avro values. A file:// URL points to a"
+            " local directory laid out like the registry API.",
+        ),
+    ]
+    for option in reversed(options):
+        f = option(f)
+
+    @click.pass_context
+    def new_func(ctx: click.Context, *args: Any, **kwargs: Any) -> Any:
+        value_format = kwargs.pop("value_format")
+        schema_registry = kwargs.pop("schema_registry")
+        try:
+            kwargs["value_decoder"] = get_value_decoder(value_format, schema_registry)
+        except ValueError as e:
+            raise click.exceptions.UsageError(str(e), ctx)
+        return ctx.invoke(f, *args, **kwargs)
+
+    return update_wrapper(new_func, f)
+
+
+def filter_options(f: Any) -> Any:
+    """Add the record selection and projection options."""
+    options = [
+        click.option(
+            "--where",
+            type=str,
+            help="Only return messages matching this expression, e.g."
+            " 'heartbeat and private_seqNum > 10'. Names other than timestamp,"
+            " partition, offset, key and value refer to fields of the value.",
+        ),
+        click.option(
+            "--fields",
+            type=str,
+            help="Comma-separated list of value fields to keep.",
+        ),
+        click.option(
+            "--key",
+            "key_match",
+            type=str,
+            help="Only return messages with exactly this key. Checked before"
+            " values are decoded.",
+        ),
+        click.option(
+            "--header",
+            "header_matches",
+            type=str,
+            multiple=True,
+            help="Only return messages with this header, given as NAME or"
+            " NAME=VALUE. Can be repeated, all conditions must hold. Checked"
+            " before values are decoded.",
+        ),
+    ]
+    for option in reversed(options):
+        f = option(f)
+
+    @click.pass_context
+    def new_func(ctx: click.Context, *args: Any, **kwargs: Any) -> Any:
+        where = kwargs.pop("where")
+        fields = kwargs.pop("fields")
+        key_match = kwargs.pop("key_match")
+        header_matches = kwargs.pop("header_matches")
+        kwargs["record_filter"] = None
+        if (
+            where is not None
+            or fields is not None
+            or key_match is not None
+            or header_matches
+        ):
+            try:
+                kwargs["record_filter"] = RecordFilter(
+                    where,
+                    (
+                        [x.strip() for x in fields.split(",") if x.strip()]
+                        if fields is not None
+                        else None
+                    ),
+                    key_match.encode("utf-8") if key_match is not None else None,
+                    [parse_header_match(x) for x in header_matches],
+                )
+            except ValueError as e:
+                raise click.exceptions.UsageError(str(e), ctx)
+        return ctx.invoke(f, *args, **kwargs)
+
+    return update_wrapper(new_func, f)
+
+
+@click.group()
+@click.argument("site", type=click.Choice(SITES, case_sensitive=False))
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Fetch the topic list from the site instead of the metadata cache.",
+)
+@click.option(
+    "--metadata-ttl",
+    type=click.FloatRange(min=0),
+    default=METADATA_CACHE_TTL,
+    show_default=True,
+    help="Seconds the cached topic list is used for. Zero disables the cache.",
+)
+@click.pass_context
+def topics(ctx: click.Context, site: str, refresh: bool, metadata_ttl: float) -> None:
+    """Commands for Kafka topics."""
+    ctx.obj = {
+        "site": site,
+        "refresh": refresh,
+        "metadata_ttl": metadata_ttl,
+    }
+
+
+@topics.command("list")
+@click.option(
+    "--regex", type=str, help="Pass a regular expression to filter the topic list."
+)
+@click.option("--name", type=str, help="Pass a name to filter the topic list.")
+@click.pass_context
+def topics_list(ctx: click.Context, regex: str | None, name: str | None) -> None:
+    """List the available Kafka topics."""
+    if regex is not None and name is not None:
+        raise click.exceptions.UsageError(
+            "Cannot use regex and name options simultaneously.", ctx
+        )
+    topics = get_topics(ctx.obj)
+    filtered_topics(
+        topics, ListTopicsOpts(regex=regex, name=name, name_list=None, name_file=None)
+    )
+
+
+@topics.command("describe")
+@click.option(
+    "--regex", type=str, help="Pass a regular expression to filter the topic list."
+)
+@click.option("--name", type=str, help="Pass a name to filter the topic list.")
+@click.option("--partitions", is_flag=True, help="Also show every partition.")
+@click.option("--json", "as_json", is_flag=True, help="Print one JSON line per topic.")
+@click.pass_context
+def topics_describe(
+    ctx: click.Context,
+    regex: str | None,
+    name: str | None,
+    partitions: bool,
+    as_json: bool,
+) -> None:
+    """Show the partitions, replicas, in-sync replicas and offsets of topics.
+
+    All topics are shown unless a filter is given.
+    """
+    if regex is not None and name is not None:
+        raise click.exceptions.UsageError(
+            "Cannot use regex and name options simultaneously.", ctx
+        )
+    opts = ListTopicsOpts(regex=regex, name=name, name_list=None, name_file=None)
+    topic_descriptions(describe_topics(ctx.obj, opts), partitions, as_json)
+
+
+@topics.command("create")
+@click.option(
+    "--spec",
+    "spec_file",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    required=True,
+    help="YAML or JSON file with the topics to create.",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=CREATE_CHUNK_SIZE,
+    show_default=True,
+    help="Maximum number of topics per create request.",
+)
+@click.option(
+    "--max-in-flight",
+    type=click.IntRange(min=1),
+    default=CREATE_MAX_IN_FLIGHT,
+    show_default=True,
+    help="Maximum number of pending create requests.",
+)
+@click.option(
+    "--dry-run", is_flag=True, help="Only list the topics that would be created."
+)
+@click.pass_context
+def topics_create(
+    ctx: click.Context,
+    spec_file: pathlib.Path,
+    chunk_size: int,
+    max_in_flight: int,
+    dry_run: bool,
+) -> None:
+    """Create the topics of a spec file that do not exist yet.
+
+    \b
+    Spec file format:
+      defaults:
+        partitions: 1
+        replication_factor: 3
+        config:
+          retention.ms: 604800000
+      topics:
+        - lsst.sal.ATAOS.logevent_heartbeat
+        - name: lsst.sal.MTM1M3.forceActuatorData
+          partitions: 3
+    """
+    try:
+        specs = load_topic_specs(spec_file)
+    except ValueError as e:
+        raise click.exceptions.UsageError(str(e), ctx)
+    except RuntimeError as e:
+        raise click.exceptions.ClickException(str(e))
+    missing, existing = split_existing_topics(ctx.obj, specs)
+    print(f"Skipping {len(existing)} existing topic(s), {len(missing)} to create")
+    if dry_run:
+        for spec in missing:
+            print(spec.name)
+        return
+
+    num_created = 0
+    num_failed = 0
+    for result in create_topics(ctx.obj, missing, chunk_size, max_in_flight):
+        creation_progress(result)
+        num_created += len(result.created)
+        num_failed += len(result.failed)
+    print(f"{num_created} created successfully, {num_failed} not successfully created")
+    if num_failed:
+        ctx.exit(1)
+
+
+@topics.command("delete")
+@click.option(
+    "--regex", type=str, help="Pass a regular expression to filter the topic list."
+)
+@click.option("--name", type=str, help="Pass a name to filter the topic list.")
+@click.option(
+    "--name-list",
+    type=str,
+    help="Comma-delimited list of names to filter the topic list.",
+)
+@click.option("--name-file", type=pathlib.Path, help="File ")
+@click.option(
+    "--name-mode",
+    type=click.Choice(MATCH_MODES, case_sensitive=False),
+    default="substring",
+    show_default=True,
+    help="How the name, name-list and name-file entries match topic names.",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=DELETE_CHUNK_SIZE,
+    show_default=True,
+    help="Maximum number of topics per delete request.",
+)
+@click.option(
+    "--max-in-flight",
+    type=click.IntRange(min=1),
+    default=DELETE_MAX_IN_FLIGHT,
+    show_default=True,
+    help="Maximum number of pending delete requests.",
+)
+@click.option(
+    "--chunk-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DELETE_CHUNK_TIMEOUT,
+    show_default=True,
+    help="Deadline in seconds for the deletion of a chunk.",
+)
+@click.option(
+    "--journal",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    default=None,
+    help="Progress journal. Defaults to delete-topics-SITE.jsonl.",
+)
+@click.option(
+    "--resume",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    default=None,
+    help="Retry the unfinished topics of an interrupted run from its journal.",
+)
+@click.pass_context
+def topics_delete(
+    ctx: click.Context,
+    regex: str | None,
+    name: str | None,
+    name_list: str | None,
+    name_file: pathlib.Path | None,
+    name_mode: str,
+    chunk_size: int,
+    max_in_flight: int,
+    chunk_timeout: float,
+    journal: pathlib.Path | None,
+    resume: pathlib.Path | None,
+) -> None:
+    """Delete topics.
+
+    The outcome of every topic is written to a journal, so an interrupted
+    run can be resumed.
+    """
+    check_args = [
+        regex is not None,
+        name is not None,
+        name_list is not None,
+        name_file is not None,
+        resume is not None,
+    ]
+    if sum(check_args) > 1:
+        raise click.exceptions.UsageError(
+            "Cannot use regex, name, name-list, name-file and resume options simultaneously.",
+            ctx,
+        )
+    if not sum(check_args):
+        raise click.exceptions.UsageError(
+            "Must provide one of the following options: --regex, --name, --name-list, --name-file"
+            " or --resume.",
+            ctx,
+        )
+
+    site = ctx.obj["site"]
+    if resume is not None:
+        try:
+            run = DeletionJournal.resume(resume)
+        except ValueError as e:
+            raise click.exceptions.UsageError(str(e), ctx)
+        if run.site != site:
+            run.close()
+            raise click.exceptions.UsageError(
+                f"The journal {resume} belongs to site {run.site}.", ctx
+            )
+        message = (
+            f"Delete the {len(run.pending)} unfinished topics of {resume} from {site}"
+        )
+    else:
+        message = f"Delete all requested topics from {site}"
+    acknowledge_deletion(message)
+
+    if resume is None:
+        topics = filter_topics(
+            ctx.obj,
+            ListTopicsOpts(
+                regex=regex,
+                name=name,
+                name_list=name_list,
+                name_file=name_file,
+                match_mode=name_mode,
+            ),
+            fresh=True,
+        )
+        if journal is None:
+            journal = pathlib.Path(f"delete-topics-{site}.jsonl")
+        run = DeletionJournal.start(journal, site, list(dict.fromkeys(topics)))
+    with run:
+        summary = delete_topics(
+            ctx.obj, run.topics, chunk_size, max_in_flight, chunk_timeout, run
+        )
+    summarize_topic_deletion(summary, run.path)
+
+
+@topics.command("set-partitions")
+@click.argument("csc")
+@click.argument("number")
+@click.pass_context
+def topics_set_partitions(ctx: click.Context, csc: str, number: str) -> None:
+    """Change the number of partitions on CSC telemetry topics."""
+    topics = filter_topics(
+        ctx.obj,
+        ListTopicsOpts(regex=None, name=csc, name_list=None, name_file=None),
+        fresh=True,
+    )
+    done, not_done = set_partitions_topics(ctx.obj, topics, csc, int(number))
+    num_done = len(done)
+    num_not_done = len(not_done)
+    print(f"Found {num_done + num_not_done} topics to modify")
+    print(f"{num_done} modified successfully, {num_not_done} not successfully modified")
+
+
+@topics.command("query")
+@click.argument("start", type=str)
+@click.argument("end", type=str)
+@click.argument("topic", type=str)
+@click.option(
+    "--max-messages",
+    type=int,
+    default=None,
+    help=f"Maximum number of messages to return. Defaults to {QUERY_MAX_MESSAGES}"
+    " unless streaming.",
+)
+@click.option(
+    "--max-workers",
+    type=int,
+    default=None,
+    help="Maximum number of partitions read concurrently. Not for --regex.",
+)
+@click.option(
+    "--plan",
+    is_flag=True,
+    help="Only show the offset ranges and expected message count.",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Write messages as JSON lines as soon as they are read.",
+)
+@click.option(
+    "--output",
+    type=click.Path(path_type=pathlib.Path),
+    help="Stream messages as JSON lines to this file.",
+)
+@click.option(
+    "--dump",
+    type=click.Path(path_type=pathlib.Path),
+    help="Write the raw messages to this binary dump file without decoding.",
+)
+@click.option(
+    "--regex",
+    is_flag=True,
+    help="Treat TOPIC as a regular expression and merge the messages of all"
+    " matching topics in time order.",
+)
+@click.option(
+    "--sample",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Only read this many sample points spread over the time range.",
+)
+@click.option(
+    "--sample-method",
+    type=click.Choice(SAMPLE_METHODS, case_sensitive=False),
+    default="offsets",
+    show_default=True,
+    help="Seek to evenly spaced offsets, or scan the range and keep one random"
+    " message per equal time slice.",
+)
+@click.option(
+    "--sample-batch",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of consecutive messages read at each sampled offset.",
+)
+@fetch_options
+@decoder_options
+@filter_options
+@click.pass_context
+def topics_query(
+    ctx: click.Context,
+    start: str,
+    end: str,
+    topic: str,
+    max_messages: int | None,
+    max_workers: int | None,
+    plan: bool,
+    stream: bool,
+    output: pathlib.Path | None,
+    dump: pathlib.Path | None,
+    regex: bool,
+    sample: int | None,
+    sample_method: str,
+    sample_batch: int,
+    fetch: FetchOpts,
+    value_decoder: ValueDecoder,
+    record_filter: RecordFilter | None,
+) -> None:
+    """Query a topic for messages within a time range.
+
+    Time format: YYYY-MM-DD-HH:MM (UTC)
+    """
+    if plan:
+        if regex:
+            for topic_plan in plan_topics_time_range(ctx.obj, topic, start, end):
+                query_plan(topic_plan)
+        else:
+            query_plan(plan_topic_time_range(ctx.obj, topic, start, end))
+        return
+
+    if sample is not None and (regex or dump is not None):
+        raise click.exceptions.UsageError(
+            "--sample does not apply to --regex or --dump queries.", ctx
+        )
+    if sample is not None and max_messages is not None:
+        raise click.exceptions.UsageError(
+            "--max-messages does not apply to --sample, which sets the number"
+            " of messages.",
+            ctx,
+        )
+    if regex and max_workers is not None:
+        raise click.exceptions.UsageError(
+            "--max-workers does not apply to --regex queries, which read all"
+            " partitions with one consumer.",
+            ctx,
+        )
+
+    if dump is not None:
+        if record_filter is not None and record_filter.needs_value:
+            raise click.exceptions.UsageError(
+                "--where and --fields do not apply to raw dumps.", ctx
+            )
+        if regex:
+            msgs = iter_topics_messages(
+                ctx.obj,
+                regex=topic,
+                start_str=start,
+                end_str=end,
+                max_messages=max_messages,
+                fetch=fetch,
+                record_filter=record_filter,
+            )
+        else:
+            msgs = iter_topic_messages(
+                ctx.obj,
+                topic=topic,
+                start_str=start,
+                end_str=end,
+                max_messages=max_messages,
+                max_workers=max_workers,
+                fetch=fetch,
+                record_filter=record_filter,
+            )
+        with dump.open("wb", buffering=STREAM_BUFFER_SIZE) as ofile:
+            count = DumpWriter(ofile).write_all(msgs)
+        click.echo(f"Dumped {count} message(s) to {dump}", err=True)
+        return
+
+    streaming = stream or output is not None
+    if not streaming and max_messages is None:
+        max_messages = QUERY_MAX_MESSAGES
+
+    records: Iterable[Dict]
+    if sample is not None:
+        records = sample_topic_time_range(
+            ctx.obj,
+            topic=topic,
+            start_str=start,
+            end_str=end,
+            num_samples=sample,
+            method=sample_method,
+            sample_batch=sample_batch,
+            max_workers=max_workers,
+            fetch=fetch,
+            value_decoder=value_decoder,
+            record_filter=record_filter,
+        )
+    elif regex:
+        records = iter_topics_time_range(
+            ctx.obj,
+            regex=topic,
+            start_str=start,
+            end_str=end,
+            max_messages=max_messages,
+            fetch=fetch,
+            value_decoder=value_decoder,
+            record_filter=record_filter,
+        )
+    elif streaming:
+        records = iter_topic_time_range(
+            ctx.obj,
+            topic=topic,
+            start_str=start,
+            end_str=end,
+            max_messages=max_messages,
+            max_workers=max_workers,
+            fetch=fetch,
+            value_decoder=value_decoder,
+            record_filter=record_filter,
+        )
+    else:
+        records = query_topic_time_range(
+            ctx.obj,
+            topic=topic,
+            start_str=start,
+            end_str=end,
+            max_messages=QUERY_MAX_MESSAGES if max_messages is None else max_messages,
+            max_workers=max_workers,
+            fetch=fetch,
+            value_decoder=value_decoder,
+            record_filter=record_filter,
+        )
+
+    if streaming:
+        if output is None:
+            count = stream_records(records, sys.stdout)
+        else:
+            with output.open("w", buffering=STREAM_BUFFER_SIZE) as ofile:
+                count = stream_records(records, ofile)
+        click.echo(f"Returned {count} message(s)", err=True)
+        return
+
+    count = 0
+    for r in records:
+        click.echo(
+            f"{r.get('topic', topic)} ts={r['timestamp_ms']} \n value={r['value']}"
+        )
+        count += 1
+
+    click.echo(f"\nReturned {count} message(s)")
+
+
+@topics.command("export")
+@click.argument("start", type=str)
+@click.argument("end", type=str)
+@click.argument("topic", type=str)
+@click.argument("output", type=click.Path(path_type=pathlib.Path))
+@click.option(
+    "--format",
+    "export_format",
+    type=click.Choice(EXPORT_FORMATS, case_sensitive=False),
+    default="parquet",
+    show_default=True,
+    help="Columnar file format to write.",
+)
+@click.option(
+    "--row-group-size",
+    type=click.IntRange(min=1),
+    default=EXPORT_ROW_GROUP_SIZE,
+    show_default=True,
+    help="Number of rows per row group or record batch.",
+)
+@click.option(
+    "--max-messages",
+    type=int,
+    default=None,
+    help="Maximum number of messages to export.",
+)
+@click.option(
+    "--max-workers",
+    type=int,
+    default=None,
+    help="Maximum number of partitions read concurrently.",
+)
+@fetch_options
+@decoder_options
+@filter_options
+@click.pass_context
+def topics_export(
+    ctx: click.Context,
+    start: str,
+    end: str,
+    topic: str,
+    output: pathlib.Path,
+    export_format: str,
+    row_group_size: int,
+    max_messages: int | None,
+    max_workers: int | None,
+    fetch: FetchOpts,
+    value_decoder: ValueDecoder,
+    record_filter: RecordFilter | None,
+) -> None:
+    """Export the messages of a topic within a time range to a columnar file.
+
+    Time format: YYYY-MM-DD-HH:MM (UTC)
+    """
+    records = iter_topic_time_range(
+        ctx.obj,
+        topic=topic,
+        start_str=start,
+        end_str=end,
+        max_messages=max_messages,
+        max_workers=max_workers,
+        fetch=fetch,
+        value_decoder=value_decoder,
+        record_filter=record_filter,
+    )
+    try:
+        count = export_records(
+            records,
+            output,
+            export_format,
+            row_group_size,
+            value_schemas=(
+                value_decoder.writer_schemas
+                if isinstance(value_decoder, AvroDecoder)
+                else None
+            ),
+        )
+    except (RuntimeError, ValueError) as e:
+        raise click.exceptions.ClickException(str(e))
+    if count:
+        click.echo(f"Exported {count} message(s) to {output}")
+    else:
+        click.echo(f"No messages in the time range, {output} was not written")
+
+
+@topics.command("copy")
+@click.argument("start", type=str)
+@click.argument("end", type=str)
+@click.argument("topic", type=str)
+@click.option(
+    "--to",
+    "dest_site",
+    type=click.Choice(SITES, case_sensitive=False),
+    required=True,
+    help="The site to copy the messages to.",
+)
+@click.option(
+    "--to-topic",
+    type=str,
+    default=None,
+    help="Destination topic name. Defaults to the source topic name.",
+)
+@click.option(
+    "--no-keep-partitions",
+    is_flag=True,
+    help="Partition by key instead of writing to the source partition.",
+)
+@click.option(
+    "--compression",
+    type=click.Choice(COMPRESSION_TYPES, case_sensitive=False),
+    default=COPY_COMPRESSION,
+    show_default=True,
+    help="Compression codec of the produced batches.",
+)
+@click.option(
+    "--linger-ms",
+    type=click.IntRange(min=0),
+    default=COPY_LINGER_MS,
+    show_default=True,
+    help="Maximum time to wait for a producer batch to fill.",
+)
+@click.option(
+    "--max-buffer-kbytes",
+    type=click.IntRange(min=1),
+    default=COPY_MAX_BUFFER_KBYTES,
+    show_default=True,
+    help="Maximum size of the messages waiting for delivery.",
+)
+@click.option(
+    "--max-workers",
+    type=int,
+    default=None,
+    help="Maximum number of partitions read concurrently.",
+)
+@fetch_options
+@click.pass_context
+def topics_copy(
+    ctx: click.Context,
+    start: str,
+    end: str,
+    topic: str,
+    dest_site: str,
+    to_topic: str | None,
+    no_keep_partitions: bool,
+    compression: str,
+    linger_ms: int,
+    max_buffer_kbytes: int,
+    max_workers: int | None,
+    fetch: FetchOpts,
+) -> None:
+    """Copy the messages of a time range into a topic on another site.
+
+    The site of the command is the source. Keys, headers and timestamps
+    are kept. The destination topic must exist.
+
+    Time format: YYYY-MM-DD-HH:MM (UTC)
+    """
+    try:
+        stats = copy_topic_time_range(
+            ctx.obj,
+            topic=topic,
+            start_str=start,
+            end_str=end,
+            dest_site=dest_site,
+            dest_topic=to_topic,
+            keep_partitions=not no_keep_partitions,
+            compression=compression,
+            linger_ms=linger_ms,
+            max_buffer_kbytes=max_buffer_kbytes,
+            max_workers=max_workers,
+            fetch=fetch,
+        )
+    except ValueError as e:
+        raise click.exceptions.UsageError(str(e), ctx)
+    except RuntimeError as e:
+        raise click.exceptions.ClickException(str(e))
+    click.echo(
+        f"Copied {stats.delivered} of {stats.read} message(s)"
+        f" ({stats.delivered_bytes} bytes) to {dest_site}"
+    )
+    if stats.failed or stats.pending:
+        raise click.exceptions.ClickException(
+            f"{stats.failed} message(s) failed, {stats.pending} without delivery"
+            f" report: {stats.first_error}"
+        )
+
+
+@topics.command("tail")
+@click.argument("topic", type=str)
+@click.option(
+    "--regex",
+    is_flag=True,
+    help="Treat TOPIC as a regular expression and follow all matching topics.",
+)
+@click.option(
+    "--lookback",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Number of messages to show per partition before the new ones.",
+)
+@click.option(
+    "--json", "as_json", is_flag=True, help="Write the messages as JSON lines."
+)
+@click.option(
+    "--max-messages",
+    type=int,
+    default=None,
+    help="Stop after this many messages.",
+)
+@click.option(
+    "--idle-timeout",
+    type=float,
+    default=None,
+    help="Stop after this many seconds without a message.",
+)
+@click.option(
+    "--refresh-interval",
+    type=float,
+    default=TAIL_REFRESH_INTERVAL,
+    show_default=True,
+    help="Seconds between checks for new partitions and topics.",
+)
+@fetch_options
+@decoder_options
+@filter_options
+@click.pass_context
+def topics_tail(
+    ctx: click.Context,
+    topic: str,
+    regex: bool,
+    lookback: int,
+    as_json: bool,
+    max_messages: int | None,
+    idle_timeout: float | None,
+    refresh_interval: float,
+    fetch: FetchOpts,
+    value_decoder: ValueDecoder,
+    record_filter: RecordFilter | None,
+) -> None:
+    """Follow the new messages of a topic as they arrive.
+
+    The delay between each message timestamp and its delivery is reported
+    per message and summarized on exit.
+    """
+    stats = TailStats()
+    records = tail_topics(
+        ctx.obj,
+        topic=topic,
+        regex=regex,
+        lookback=lookback,
+        max_messages=max_messages,
+        idle_timeout=idle_timeout,
+        refresh_interval=refresh_interval,
+        fetch=fetch,
+        value_decoder=value_decoder,
+        record_filter=record_filter,
+    )
+    try:
+        tail_records(records, sys.stdout, stats, as_json)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        records.close()
+    click.echo(
+        f"Received {stats.count} message(s), delay mean={stats.mean_delay_ms:.0f} ms"
+        f" max={stats.max_delay_ms} ms",
+        err=True,
+    )
+
+
+@topics.command("rate")
+@click.option(
+    "--regex", type=str, help="Pass a regular expression to filter the topic list."
+)
+@click.option("--name", type=str, help="Pass a name to filter the topic list.")
+@click.option(
+    "--name-list",
+    type=str,
+    help="Comma-delimited list of names to filter the topic list.",
+)
+@click.option(
+    "--name-file",
+    type=pathlib.Path,
+    help="File with one name per line to filter the topic list.",
+)
+@click.option(
+    "--name-mode",
+    type=click.Choice(MATCH_MODES, case_sensitive=False),
+    default="substring",
+    show_default=True,
+    help="How the name, name-list and name-file entries match topic names.",
+)
+@click.option(
+    "--windows",
+    type=str,
+    default=RATE_WINDOWS,
+    show_default=True,
+    help="Comma-delimited list of trailing windows, e.g. 30s,5m,1h,1d.",
+)
+@click.option("--partitions", is_flag=True, help="Also show every partition.")
+@click.pass_context
+def topics_rate(
+    ctx: click.Context,
+    regex: str | None,
+    name: str | None,
+    name_list: str | None,
+    name_file: pathlib.Path | None,
+    name_mode: str,
+    windows: str,
+    partitions: bool,
+) -> None:
+    """Show message rates over trailing windows without reading messages.
+
+    All topics are shown unless a filter is given.
+    """
+    try:
+        window_map = {x.strip(): parse_duration(x) for x in windows.split(",")}
+    except ValueError as e:
+        raise click.exceptions.UsageError(str(e), ctx)
+    opts = ListTopicsOpts(regex, name, name_list, name_file, name_mode)
+    rates = topic_rates(ctx.obj, opts, list(dict.fromkeys(window_map.values())))
+    rate_table(rates, window_map, partitions)
+
+
+@topics.command("idle")
+@click.option(
+    "--older-than",
+    type=str,
+    required=True,
+    help="Age of the newest message above which a topic is idle, e.g. 30d.",
+)
+@click.option(
+    "--regex", type=str, help="Pass a regular expression to filter the topic list."
+)
+@click.option("--name", type=str, help="Pass a name to filter the topic list.")
+@click.option(
+    "--name-list",
+    type=str,
+    help="Comma-delimited list of names to filter the topic list.",
+)
+@click.option(
+    "--name-file",
+    type=pathlib.Path,
+    help="File with one name per line to filter the topic list.",
+)
+@click.option(
+    "--name-mode",
+    type=click.Choice(MATCH_MODES, case_sensitive=False),
+    default="substring",
+    show_default=True,
+    help="How the name, name-list and name-file entries match topic names.",
+)
+@click.option(
+    "--unread-only",
+    is_flag=True,
+    help="Only show idle topics without committed offsets from any consumer group.",
+)
+@click.option(
+    "--details",
+    is_flag=True,
+    help="Show partition and message counts and the consumer groups of each topic.",
+)
+@click.pass_context
+def topics_idle(
+    ctx: click.Context,
+    older_than: str,
+    regex: str | None,
+    name: str | None,
+    name_list: str | None,
+    name_file: pathlib.Path | None,
+    name_mode: str,
+    unread_only: bool,
+    details: bool,
+) -> None:
+    """Find topics whose newest message is older than a threshold.
+
+    The topic names are printed one per line, ready to be used as the
+    name file of the delete command. All topics are checked unless a filter
+    is given.
+    """
+    try:
+        threshold = parse_duration(older_than)
+    except ValueError as e:
+        raise click.exceptions.UsageError(str(e), ctx)
+    opts = ListTopicsOpts(regex, name, name_list, name_file, name_mode)
+    idle = find_idle_topics(ctx.obj, threshold, opts)
+    num_idle = len(idle)
+    num_unread = sum(not x.is_read for x in idle)
+    if unread_only:
+        idle = [x for x in idle if not x.is_read]
+    idle_topics(idle, details)
+    click.echo(
+        f"Found {num_idle} idle topic(s), {num_unread} not read by any consumer group",
+        err=True,
+    )
+
+
+@topics.command("histogram")
+@click.argument("start", type=str)
+@click.argument("end", type=str)
+@click.argument("topic", type=str)
+@click.option(
+    "--bucket",
+    type=click.IntRange(min=1),
+    default=HISTOGRAM_BUCKET_SECONDS,
+    show_default=True,
+    help="Bucket width in seconds.",
+)
+@click.option(
+    "--counts-only",
+    is_flag=True,
+    help="Only count messages, using the offsets at the bucket edges"
+    " without reading any message.",
+)
+@click.option(
+    "--max-workers",
+    type=int,
+    default=None,
+    help="Maximum number of partitions read concurrently.",
+)
+@fetch_options
+@click.pass_context
+def topics_histogram(
+    ctx: click.Context,
+    start: str,
+    end: str,
+    topic: str,
+    bucket: int,
+    counts_only: bool,
+    max_workers: int | None,
+    fetch: FetchOpts,
+) -> None:
+    """Show message counts and sizes per time bucket for each partition.
+
+    Time format: YYYY-MM-DD-HH:MM (UTC)
+    """
+    histogram(
+        topic_histogram(
+            ctx.obj,
+            topic=topic,
+            start_str=start,
+            end_str=end,
+            bucket_seconds=bucket,
+            counts_only=counts_only,
+            max_workers=max_workers,
+            fetch=fetch,
+        )
+    )
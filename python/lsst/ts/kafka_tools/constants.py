@@ -21,12 +21,146 @@
 
 import dataclasses
 import pathlib
+from array import array
 
-__all__ = ["ListConsumerOpts", "ListTopicsOpts", "SITES"]
+__all__ = [
+    "AGENT_LAG_INTERVAL",
+    "AGENT_METADATA_INTERVAL",
+    "AGENT_REQUEST_TIMEOUT",
+    "AGENT_START_TIMEOUT",
+    "COPY_BATCH_BYTES",
+    "COPY_COMPRESSION",
+    "COPY_FLUSH_TIMEOUT",
+    "COPY_LINGER_MS",
+    "COPY_MAX_BUFFER_KBYTES",
+    "CREATE_CHUNK_SIZE",
+    "CREATE_MAX_IN_FLIGHT",
+    "CopyStats",
+    "CreateChunkResult",
+    "DELETE_CHUNK_SIZE",
+    "DELETE_CHUNK_TIMEOUT",
+    "DELETE_MAX_IN_FLIGHT",
+    "DeletionSummary",
+    "EXPORT_ROW_GROUP_SIZE",
+    "FetchOpts",
+    "HISTOGRAM_BUCKET_SECONDS",
+    "IdleTopic",
+    "ListConsumerOpts",
+    "ListTopicsOpts",
+    "METADATA_CACHE_TTL",
+    "PartitionDescription",
+    "PartitionHistogram",
+    "PartitionRate",
+    "PartitionRange",
+    "QUERY_BATCH_SIZE",
+    "QUERY_GROUP_ID",
+    "QUERY_MAX_MESSAGES",
+    "QUERY_MAX_WORKERS",
+    "QUERY_MERGE_BUFFER_SIZE",
+    "QUERY_QUEUE_SIZE",
+    "QUERY_STALL_TIMEOUT",
+    "QueryPlan",
+    "RATE_WINDOWS",
+    "SITES",
+    "STREAM_BUFFER_SIZE",
+    "TAIL_FLUSH_INTERVAL",
+    "TAIL_POLL_TIMEOUT",
+    "TAIL_REFRESH_INTERVAL",
+    "TailStats",
+    "TopicSpec",
+]
 
 
 SITES = ["tts", "bts", "summit", "local", "envvar"]
 
+AGENT_LAG_INTERVAL = 15.0
+AGENT_METADATA_INTERVAL = 60.0
+AGENT_REQUEST_TIMEOUT = 1.0
+AGENT_START_TIMEOUT = 10.0
+COPY_BATCH_BYTES = 1 << 20
+COPY_COMPRESSION = "lz4"
+COPY_FLUSH_TIMEOUT = 60.0
+COPY_LINGER_MS = 50
+COPY_MAX_BUFFER_KBYTES = 1 << 16
+CREATE_CHUNK_SIZE = 100
+CREATE_MAX_IN_FLIGHT = 4
+DELETE_CHUNK_SIZE = 100
+DELETE_CHUNK_TIMEOUT = 60.0
+DELETE_MAX_IN_FLIGHT = 2
+EXPORT_ROW_GROUP_SIZE = 100000
+HISTOGRAM_BUCKET_SECONDS = 60
+METADATA_CACHE_TTL = 300.0
+QUERY_BATCH_SIZE = 500
+QUERY_GROUP_ID = "kafka-tools-time-query"
+QUERY_MAX_MESSAGES = 1000
+QUERY_MAX_WORKERS = 16
+QUERY_MERGE_BUFFER_SIZE = 1000
+QUERY_QUEUE_SIZE = 10000
+QUERY_STALL_TIMEOUT = 10.0
+RATE_WINDOWS = "1m,1h,1d"
+STREAM_BUFFER_SIZE = 1 << 20
+TAIL_FLUSH_INTERVAL = 0.1
+TAIL_POLL_TIMEOUT = 0.1
+TAIL_REFRESH_INTERVAL = 30.0
+
+
+@dataclasses.dataclass
+class CopyStats:
+    read: int = 0
+    delivered: int = 0
+    failed: int = 0
+    delivered_bytes: int = 0
+    first_error: str | None = None
+
+    @property
+    def pending(self) -> int:
+        """The number of messages without a delivery report."""
+        return self.read - self.delivered - self.failed
+
+
+@dataclasses.dataclass
+class CreateChunkResult:
+    index: int
+    num_chunks: int
+    created: list[str]
+    failed: dict[str, str]
+
+
+@dataclasses.dataclass
+class DeletionSummary:
+    requested: int
+    deleted: list[str] = dataclasses.field(default_factory=list)
+    failed: dict[str, str] = dataclasses.field(default_factory=dict)
+    timed_out: list[str] = dataclasses.field(default_factory=list)
+    skipped: int = 0
+
+    @property
+    def unfinished(self) -> list[str]:
+        """The topics that failed or timed out."""
+        return list(self.failed) + self.timed_out
+
+
+@dataclasses.dataclass
+class FetchOpts:
+    batch_size: int = QUERY_BATCH_SIZE
+    fetch_min_bytes: int | None = None
+    fetch_max_bytes: int | None = None
+    max_partition_fetch_bytes: int | None = None
+    queued_max_messages_kbytes: int | None = None
+
+
+@dataclasses.dataclass
+class IdleTopic:
+    topic: str
+    num_partitions: int
+    num_messages: int
+    consumer_groups: list[str]
+
+    @property
+    def is_read(self) -> bool:
+        """Whether any consumer group has committed offsets on the topic."""
+        return bool(self.consumer_groups)
+
 
 @dataclasses.dataclass
 class ListConsumerOpts:
@@ -34,6 +168,10 @@ class ListConsumerOpts:
     regex_mode: str
     no_connector_filter: bool
     consumer_state: str
+    name: str | None = None
+    name_list: str | None = None
+    name_file: pathlib.Path | None = None
+    match_mode: str = "substring"
 
 
 @dataclasses.dataclass
@@ -42,3 +180,107 @@ class ListTopicsOpts:
     name: str | None
     name_list: str | None
     name_file: pathlib.Path | None
+    match_mode: str = "substring"
+
+
+@dataclasses.dataclass
+class PartitionDescription:
+    topic: str
+    partition: int
+    leader: int
+    replicas: list[int]
+    isrs: list[int]
+    earliest_offset: int
+    latest_offset: int
+
+    @property
+    def retained_messages(self) -> int:
+        """The number of offsets still held by the partition."""
+        return self.latest_offset - self.earliest_offset
+
+    @property
+    def under_replicated(self) -> bool:
+        """Whether some replica is not in sync."""
+        return len(self.isrs) < len(self.replicas)
+
+
+@dataclasses.dataclass
+class PartitionHistogram:
+    topic: str
+    partition: int
+    start_ms: int
+    bucket_ms: int
+    counts: array
+    total_bytes: array | None = None
+    min_bytes: array | None = None
+    max_bytes: array | None = None
+
+    def bucket_start(self, index: int) -> int:
+        """The start time in milliseconds of a bucket."""
+        return self.start_ms + index * self.bucket_ms
+
+
+@dataclasses.dataclass
+class PartitionRate:
+    topic: str
+    partition: int
+    earliest_offset: int
+    latest_offset: int
+    window_counts: dict[int, int]
+
+    @property
+    def retained_messages(self) -> int:
+        """The number of offsets still held by the partition."""
+        return self.latest_offset - self.earliest_offset
+
+    def rate(self, window_s: int) -> float:
+        """The messages per second over a trailing window."""
+        return self.window_counts[window_s] / window_s
+
+
+@dataclasses.dataclass
+class PartitionRange:
+    topic: str
+    partition: int
+    start_offset: int
+    end_offset: int
+    low_watermark: int
+    high_watermark: int
+
+    @property
+    def num_messages(self) -> int:
+        """The number of offsets in the range (end offset is exclusive)."""
+        return self.end_offset - self.start_offset
+
+
+@dataclasses.dataclass
+class QueryPlan:
+    topic: str
+    start_ms: int
+    end_ms: int
+    partitions: list[PartitionRange]
+
+    @property
+    def expected_messages(self) -> int:
+        """The number of offsets to read across all partitions."""
+        return sum(x.num_messages for x in self.partitions)
+
+
+@dataclasses.dataclass
+class TailStats:
+    count: int = 0
+    total_delay_ms: int = 0
+    max_delay_ms: int = 0
+
+    @property
+    def mean_delay_ms(self) -> float:
+        """The mean delivery delay of the received messages."""
+        return self.total_delay_ms / self.count if self.count else 0.0
+
+
+@dataclasses.dataclass
+class TopicSpec:
+    name: str
+    partitions: int = 1
+    replication_factor: int = -1
+    config: dict[str, str] = dataclasses.field(default_factory=dict)
@@ -22,7 +22,6 @@
 from __future__ import annotations
 
 import concurrent.futures
-import re
 from typing import Any, Optional
 
 from confluent_kafka import OFFSET_INVALID, ConsumerGroupState, TopicPartition
@@ -33,8 +32,9 @@ from confluent_kafka.admin import (
     _ConsumerGroupTopicPartitions,
 )
 
-from .constants import ListConsumerOpts
+from .constants import ListConsumerOpts, ListTopicsOpts
 from .helpers import generate_admin_client
+from .matchers import select_names
 from .type_hints import DoneAndNotDoneFutures, ScriptContext
 
 __all__ = [
@@ -131,6 +131,10 @@ def list_consumers(
 ) -> tuple[list[tuple[str, str]], int]:
     """List consumers.
 
+    The group names are selected like topic names, see `select_names`.
+    The regex mode decides whether the selected groups are kept or left
+    out.
+
     Parameters
     ----------
     ctxobj : ScriptContext
@@ -151,25 +155,30 @@ def list_consumers(
         states.append(ConsumerGroupState.STABLE)
     if opts.consumer_state in ("All", "Empty"):
         states.append(ConsumerGroupState.EMPTY)
-    if opts.regex is not None:
-        regex = re.compile(repr(opts.regex)[1:-1])
     consumers_task = client.list_consumer_groups(states=set(states))
     concurrent.futures.wait([consumers_task], timeout=timeout)
     consumers = _filter_telegraph_consumers(
         consumers_task.result().valid, opts.no_connector_filter
     )
+    name_opts = ListTopicsOpts(
+        regex=opts.regex,
+        name=opts.name,
+        name_list=opts.name_list,
+        name_file=opts.name_file,
+        match_mode=opts.match_mode,
+    )
+    selected = None
+    if any(
+        x is not None for x in (opts.regex, opts.name, opts.name_list, opts.name_file)
+    ):
+        selected = set(select_names((x.group_id for x in consumers), name_opts))
     compact_list = []
     max_length = 0
     for consumer in consumers:
         name = consumer.group_id
         if len(name) > max_length:
             max_length = len(name)
-        if opts.regex is not None:
-            if opts.regex_mode in "Inclusive" and regex.search(name) is not None:
-                compact_list.append((name, consumer.state.name))
-            if opts.regex_mode in "Exclusive" and regex.search(name) is None:
-                compact_list.append((name, consumer.state.name))
-        else:
+        if selected is None or (name in selected) == (opts.regex_mode == "Inclusive"):
             compact_list.append((name, consumer.state.name))
 
     return compact_list, max_length
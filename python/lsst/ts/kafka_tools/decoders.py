@@ -0,0 +1,253 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import os
+import pathlib
+import struct
+import threading
+import urllib.request
+from typing import Any
+
+from .helpers import get_cache_dir
+from .type_hints import ValueDecoder
+
+__all__ = [
+    "AvroDecoder",
+    "SchemaRegistry",
+    "VALUE_FORMATS",
+    "decode_utf8",
+    "get_value_decoder",
+]
+
+VALUE_FORMATS = ["utf8", "avro"]
+
+# Confluent wire format: magic byte followed by a big-endian schema id.
+_MAGIC_BYTE = 0
+_WIRE_HEADER = struct.Struct(">bI")
+
+_log = logging.getLogger(__name__)
+
+# The kinds of undecodable payloads already reported in this process.
+_reported: set[str] = set()
+
+
+def _undecodable(data: bytes, kind: str, reason: str) -> bytes:
+    """Report a payload that cannot be decoded, once per kind, and return
+    it as is.
+    """
+    if kind not in _reported:
+        _reported.add(kind)
+        _log.warning("%s, keeping the raw bytes of such payloads.", reason)
+    return data
+
+
+def decode_utf8(data: bytes) -> str | bytes:
+    """Decode a payload as UTF-8 text.
+
+    Parameters
+    ----------
+    data : bytes
+        The raw payload.
+
+    Returns
+    -------
+    str or bytes
+        The decoded text, the raw payload if it is not UTF-8.
+    """
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return _undecodable(data, "utf8", f"Payload is not UTF-8 text: {e}")
+
+
+class SchemaRegistry:
+    """Minimal Confluent schema registry client with a schema cache.
+
+    Each schema is fetched at most once per schema id. Fetched schemas are
+    kept in memory and in an on-disk cache shared between invocations.
+
+    Parameters
+    ----------
+    url : str
+        The base URL of the registry. A ``file://`` URL to a directory laid
+        out like the REST API (``schemas/ids/<id>``) acts as a local
+        stand-in for the registry.
+    cache_dir : pathlib.Path, optional
+        The directory of the on-disk cache. Defaults to a directory per
+        registry URL in the package cache directory.
+    """
+
+    def __init__(self, url: str, cache_dir: pathlib.Path | None = None) -> None:
+        """Class constructor."""
+        self.url = url.rstrip("/")
+        if cache_dir is None:
+            digest = hashlib.sha1(self.url.encode("utf-8")).hexdigest()[:16]
+            cache_dir = get_cache_dir() / "schemas" / digest
+        self.cache_dir = cache_dir
+        self.fetch_count = 0
+        self._schemas: dict[int, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _load_schema(self, schema_id: int) -> dict[str, Any]:
+        """Load a schema from the on-disk cache or the registry."""
+        cache_file = self.cache_dir / f"{schema_id}.json"
+        if cache_file.exists():
+            return json.loads(cache_file.read_text())
+
+        with urllib.request.urlopen(
+            f"{self.url}/schemas/ids/{schema_id}", timeout=10
+        ) as response:
+            schema = json.loads(json.loads(response.read())["schema"])
+        self.fetch_count += 1
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(schema))
+        tmp_file.replace(cache_file)
+        return schema
+
+    def get_schema(self, schema_id: int) -> dict[str, Any]:
+        """Get the schema for a schema id.
+
+        Parameters
+        ----------
+        schema_id : int
+            The registry id of the schema.
+
+        Returns
+        -------
+        dict[str, Any]
+            The Avro schema.
+        """
+        schema = self._schemas.get(schema_id)
+        if schema is None:
+            with self._lock:
+                schema = self._schemas.get(schema_id)
+                if schema is None:
+                    schema = self._load_schema(schema_id)
+                    self._schemas[schema_id] = schema
+        return schema
+
+
+class AvroDecoder:
+    """Decode Confluent framed Avro payloads.
+
+    The schema of every schema id is parsed once into a reader that is
+    reused for all messages written with that schema. Payloads without the
+    Confluent header or with a body that does not match their schema are
+    returned as raw bytes, so one bad message does not end a query.
+
+    Parameters
+    ----------
+    registry : SchemaRegistry
+        The registry holding the writer schemas.
+    """
+
+    def __init__(self, registry: SchemaRegistry) -> None:
+        """Class constructor."""
+        try:
+            import fastavro
+        except ImportError as e:
+            raise RuntimeError(
+                "Avro decoding requires fastavro, install kafka_tools[avro]."
+            ) from e
+        self.registry = registry
+        self._parse_schema = fastavro.parse_schema
+        self._schemaless_reader = fastavro.schemaless_reader
+        self._readers: dict[int, Any] = {}
+
+    def __call__(self, data: bytes) -> Any:
+        """Decode a single payload.
+
+        Parameters
+        ----------
+        data : bytes
+            The Confluent framed payload.
+
+        Returns
+        -------
+        Any
+            The decoded record, or the raw payload if it is not valid
+            Confluent framed Avro.
+        """
+        if len(data) < _WIRE_HEADER.size:
+            return _undecodable(
+                data, "avro-header", f"Payload of {len(data)} bytes has no Avro header"
+            )
+        magic, schema_id = _WIRE_HEADER.unpack_from(data)
+        if magic != _MAGIC_BYTE:
+            return _undecodable(
+                data, "avro-header", f"Unknown magic byte {magic} in Avro header"
+            )
+
+        header_size = _WIRE_HEADER.size
+        reader = self._readers.get(schema_id)
+        if reader is None:
+            reader = self._parse_schema(self.registry.get_schema(schema_id))
+            self._readers[schema_id] = reader
+        try:
+            return self._schemaless_reader(
+                io.BytesIO(memoryview(data)[header_size:]), reader, None
+            )
+        except (EOFError, ValueError) as e:
+            return _undecodable(
+                data, "avro-body", f"Payload does not match schema {schema_id}: {e}"
+            )
+
+    def writer_schemas(self) -> list[dict[str, Any]]:
+        """Return the parsed writer schemas of the payloads decoded so far.
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            The writer schemas in the order they were first seen.
+        """
+        return list(self._readers.values())
+
+
+def get_value_decoder(value_format: str, registry_url: str | None) -> ValueDecoder:
+    """Create the value decoder for a payload format.
+
+    Parameters
+    ----------
+    value_format : str
+        One of ``VALUE_FORMATS``.
+    registry_url : str, optional
+        The schema registry URL, required for Avro.
+
+    Returns
+    -------
+    ValueDecoder
+        The decoder for message values.
+    """
+    if value_format == "avro":
+        if registry_url is None:
+            raise ValueError("Avro decoding requires a schema registry URL.")
+        return AvroDecoder(SchemaRegistry(registry_url))
+    if value_format == "utf8":
+        return decode_utf8
+    raise ValueError(f"Unknown value format {value_format}.")
@@ -0,0 +1,259 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import dataclasses
+import mmap
+import pathlib
+import struct
+from typing import Any, BinaryIO, Iterable, Iterator
+
+__all__ = ["DUMP_MAGIC", "DumpReader", "DumpRecord", "DumpWriter"]
+
+DUMP_MAGIC = b"KTDUMP01"
+
+# Record length, timestamp, partition, offset, topic length, key length,
+# value length and number of headers. Negative key and value lengths mark
+# a null key or value.
+_RECORD_HEADER = struct.Struct("<IqiqHiiH")
+# Header name length and header value length.
+_HEADER_ENTRY = struct.Struct("<Hi")
+
+
+@dataclasses.dataclass
+class DumpRecord:
+    topic: str
+    partition: int
+    offset: int
+    timestamp: int
+    key: memoryview | None
+    value: memoryview | None
+    headers: list[tuple[str, memoryview | None]]
+
+
+class DumpWriter:
+    """Write raw messages to a length-prefixed binary dump.
+
+    Keys, values and header values are handed to the file object as they
+    come from the consumer without decoding or copying them into new
+    objects. The file object should be buffered.
+
+    Parameters
+    ----------
+    ostream : BinaryIO
+        The (buffered) binary stream to write to.
+    """
+
+    def __init__(self, ostream: BinaryIO) -> None:
+        """Class constructor."""
+        self.ostream = ostream
+        self.count = 0
+        self._topics: dict[str, bytes] = {}
+        self.ostream.write(DUMP_MAGIC)
+
+    def write(self, msg: Any) -> None:
+        """Append a message to the dump.
+
+        Parameters
+        ----------
+        msg : Message
+            The message to write.
+        """
+        write = self.ostream.write
+        topic = msg.topic()
+        topic_bytes = self._topics.get(topic)
+        if topic_bytes is None:
+            topic_bytes = self._topics[topic] = topic.encode("utf-8")
+        key = msg.key()
+        value = msg.value()
+        headers = msg.headers() or ()
+        key_len = -1 if key is None else len(key)
+        value_len = -1 if value is None else len(value)
+
+        header_entries = []
+        headers_len = 0
+        for name, hvalue in headers:
+            name_bytes = name.encode("utf-8")
+            hvalue_len = -1 if hvalue is None else len(hvalue)
+            header_entries.append((name_bytes, hvalue, hvalue_len))
+            headers_len += _HEADER_ENTRY.size + len(name_bytes) + max(hvalue_len, 0)
+
+        record_len = (
+            _RECORD_HEADER.size
+            - 4
+            + len(topic_bytes)
+            + max(key_len, 0)
+            + max(value_len, 0)
+            + headers_len
+        )
+        _, ts = msg.timestamp()
+        write(
+            _RECORD_HEADER.pack(
+                record_len,
+                ts,
+                msg.partition(),
+                msg.offset(),
+                len(topic_bytes),
+                key_len,
+                value_len,
+                len(header_entries),
+            )
+        )
+        write(topic_bytes)
+        if key:
+            write(key)
+        if value:
+            write(value)
+        for name_bytes, hvalue, hvalue_len in header_entries:
+            write(_HEADER_ENTRY.pack(len(name_bytes), hvalue_len))
+            write(name_bytes)
+            if hvalue:
+                write(hvalue)
+        self.count += 1
+
+    def write_all(self, msgs: Iterable[Any]) -> int:
+        """Append all messages to the dump.
+
+        Parameters
+        ----------
+        msgs : Iterable[Message]
+            The messages to write.
+
+        Returns
+        -------
+        int
+            The total number of messages in the dump.
+        """
+        for msg in msgs:
+            self.write(msg)
+        return self.count
+
+
+class DumpReader:
+    """Iterate over the records of a binary dump through a memory map.
+
+    Keys, values and header values are memoryviews into the mapped file and
+    are only valid while the reader is open. Iteration stops cleanly at a
+    record cut off at the end of the file, as left by an interrupted dump,
+    and sets ``truncated``.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The dump file.
+    """
+
+    def __init__(self, path: pathlib.Path) -> None:
+        """Class constructor."""
+        self.path = path
+        self.truncated = False
+        with path.open("rb") as ifile:
+            self._mmap = mmap.mmap(ifile.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic_size = len(DUMP_MAGIC)
+        if self._view[:magic_size] != DUMP_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a kafka_tools dump.")
+
+    def __enter__(self) -> DumpReader:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[DumpRecord]:
+        view = self._view
+        topics: dict[bytes, str] = {}
+        pos = len(DUMP_MAGIC)
+        end = len(view)
+        while pos < end:
+            if end - pos < _RECORD_HEADER.size:
+                self.truncated = True
+                return
+            (
+                record_len,
+                ts,
+                partition,
+                offset,
+                topic_len,
+                key_len,
+                value_len,
+                num_headers,
+            ) = _RECORD_HEADER.unpack_from(view, pos)
+            record_end = pos + 4 + record_len
+            if record_end > end:
+                self.truncated = True
+                return
+            record_start = pos
+            pos += _RECORD_HEADER.size
+
+            next_pos = pos + topic_len
+            topic_bytes = bytes(view[pos:next_pos])
+            topic = topics.get(topic_bytes)
+            if topic is None:
+                topic = topics[topic_bytes] = topic_bytes.decode("utf-8")
+            pos = next_pos
+
+            key = None
+            if key_len >= 0:
+                next_pos = pos + key_len
+                key = view[pos:next_pos]
+                pos = next_pos
+            value = None
+            if value_len >= 0:
+                next_pos = pos + value_len
+                value = view[pos:next_pos]
+                pos = next_pos
+
+            headers: list[tuple[str, memoryview | None]] = []
+            for _ in range(num_headers):
+                if record_end - pos < _HEADER_ENTRY.size:
+                    raise ValueError(
+                        f"Corrupt record at offset {record_start} of {self.path}."
+                    )
+                name_len, hvalue_len = _HEADER_ENTRY.unpack_from(view, pos)
+                pos += _HEADER_ENTRY.size
+                next_pos = pos + name_len
+                name = bytes(view[pos:next_pos]).decode("utf-8")
+                pos = next_pos
+                hvalue = None
+                if hvalue_len >= 0:
+                    next_pos = pos + hvalue_len
+                    hvalue = view[pos:next_pos]
+                    pos = next_pos
+                headers.append((name, hvalue))
+
+            if pos != record_end:
+                raise ValueError(
+                    f"Corrupt record at offset {record_start} of {self.path}."
+                )
+            yield DumpRecord(topic, partition, offset, ts, key, value, headers)
+
+    def close(self) -> None:
+        """Release the memory map."""
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Records handed out earlier still reference the map, it is
+            # closed once they are garbage collected.
+            pass
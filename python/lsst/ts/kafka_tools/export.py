@@ -0,0 +1,231 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import pathlib
+from typing import Any, Callable, Iterable
+
+__all__ = ["EXPORT_FORMATS", "export_records"]
+
+EXPORT_FORMATS = ["parquet", "arrow"]
+
+_META_COLUMNS = ("timestamp", "partition", "offset", "key")
+
+_AVRO_PRIMITIVES = {
+    "boolean": "bool_",
+    "int": "int32",
+    "long": "int64",
+    "float": "float32",
+    "double": "float64",
+    "bytes": "binary",
+    "string": "string",
+    "enum": "string",
+    "fixed": "binary",
+}
+
+_AVRO_NUMBERS = ("int", "long", "float", "double")
+
+
+def _flatten(record: dict[str, Any]) -> dict[str, Any]:
+    """Turn a query record into a table row.
+
+    Decoded (Avro) values are spread over one ``value.<field>`` column per
+    field, any other value ends up in a single ``value`` column. The prefix
+    keeps fields such as ``timestamp`` from clashing with the message
+    metadata.
+    """
+    row = {name: record[name] for name in _META_COLUMNS}
+    value = record["value"]
+    if isinstance(value, dict):
+        row.update((f"value.{name}", field) for name, field in value.items())
+    else:
+        row["value"] = value
+    return row
+
+
+def _avro_to_arrow(avro_type: Any) -> Any:
+    """Map an Avro type to an Arrow type.
+
+    Returns `None` for types without a single Arrow equivalent, such as
+    unions of several non null types.
+    """
+    import pyarrow as pa
+
+    if isinstance(avro_type, list):
+        branches = [branch for branch in avro_type if branch != "null"]
+        if len(branches) == 1:
+            return _avro_to_arrow(branches[0])
+        # A number that may be an integer or a float is written as a float.
+        if all(branch in _AVRO_NUMBERS for branch in branches):
+            return pa.float64()
+        return None
+    if isinstance(avro_type, dict):
+        logical_type = avro_type.get("logicalType")
+        if logical_type == "timestamp-millis":
+            return pa.timestamp("ms", tz="UTC")
+        if logical_type == "timestamp-micros":
+            return pa.timestamp("us", tz="UTC")
+        kind = avro_type["type"]
+        if kind == "array":
+            item_type = _avro_to_arrow(avro_type["items"])
+            return None if item_type is None else pa.list_(item_type)
+        if kind in ("record", "map"):
+            return None
+        return _avro_to_arrow(kind)
+    name = _AVRO_PRIMITIVES.get(avro_type)
+    return None if name is None else getattr(pa, name)()
+
+
+def _column_types(avro_schemas: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Map the ``value.<field>`` columns to the Arrow types of the Avro
+    writer schemas.
+    """
+    column_types: dict[str, Any] = {}
+    for avro_schema in avro_schemas:
+        for field in avro_schema.get("fields", []):
+            arrow_type = _avro_to_arrow(field["type"])
+            if arrow_type is not None:
+                column_types.setdefault(f"value.{field['name']}", arrow_type)
+    return column_types
+
+
+def export_records(
+    records: Iterable[dict[str, Any]],
+    output: pathlib.Path,
+    export_format: str,
+    row_group_size: int,
+    value_schemas: Callable[[], Iterable[dict[str, Any]]] | None = None,
+) -> int:
+    """Write query records to a columnar file in row groups.
+
+    Only one row group is held in memory at a time. The column types come
+    from the Avro writer schemas where known and are otherwise inferred
+    from the first row group, with columns that are empty in that row group
+    written as strings. The columns are fixed by the first row group, a
+    later row group with other columns or with values of another type is
+    an error.
+
+    Parameters
+    ----------
+    records : Iterable[dict[str, Any]]
+        The records from a topic query.
+    output : pathlib.Path
+        The file to write.
+    export_format : str
+        One of ``EXPORT_FORMATS``.
+    row_group_size : int
+        The number of rows per row group (Parquet) or record batch (Arrow).
+    value_schemas : Callable[[], Iterable[dict[str, Any]]], optional
+        Returns the Avro writer schemas of the decoded values. Called once
+        the first row group has been read.
+
+    Returns
+    -------
+    int
+        The number of rows written.
+
+    Raises
+    ------
+    RuntimeError
+        If pyarrow is not installed.
+    ValueError
+        If the format is unknown or a row group does not fit the columns of
+        the first one.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError(
+            "Exporting requires pyarrow, install kafka_tools[export]."
+        ) from e
+
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format}.")
+
+    writer: Any = None
+    schema = None
+    count = 0
+    rows: list[dict[str, Any]] = []
+
+    def write_rows() -> None:
+        nonlocal writer, schema
+        if schema is None:
+            table = pa.Table.from_pylist(rows)
+            column_types = {
+                # Kafka timestamps are milliseconds since the epoch in UTC.
+                "timestamp": pa.timestamp("ms", tz="UTC"),
+                "partition": pa.int32(),
+                "offset": pa.int64(),
+                "key": pa.string(),
+            }
+            if value_schemas is not None:
+                column_types.update(_column_types(value_schemas()))
+            fields = []
+            for field in table.schema:
+                arrow_type = column_types.get(field.name, field.type)
+                if pa.types.is_null(arrow_type):
+                    arrow_type = pa.string()
+                fields.append(pa.field(field.name, arrow_type))
+            schema = pa.schema(fields)
+            table = table.cast(schema)
+            if export_format == "parquet":
+                writer = pyarrow.parquet.ParquetWriter(output, schema)
+            else:
+                writer = pyarrow.ipc.new_file(output, schema)
+        else:
+            # Table.from_pylist drops the keys missing from the schema.
+            extra = sorted({name for row in rows for name in row} - set(schema.names))
+            location = f"partition {rows[0]['partition']} offset {rows[0]['offset']}"
+            if extra:
+                raise ValueError(
+                    f"Column(s) {', '.join(extra)} first appear in the row group"
+                    f" starting at {location}, after the columns of {output} were"
+                    " fixed."
+                )
+            try:
+                table = pa.Table.from_pylist(rows, schema=schema)
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                raise ValueError(
+                    f"The row group starting at {location} does not match the"
+                    f" column types of {output}: {e}"
+                ) from e
+        if export_format == "parquet":
+            writer.write_table(table, row_group_size=row_group_size)
+        else:
+            writer.write_table(table, max_chunksize=row_group_size)
+        rows.clear()
+
+    try:
+        for record in records:
+            rows.append(_flatten(record))
+            count += 1
+            if len(rows) >= row_group_size:
+                write_rows()
+        if rows:
+            write_rows()
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return count
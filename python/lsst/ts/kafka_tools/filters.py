@@ -0,0 +1,313 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import ast
+import operator
+from typing import Any, Callable
+
+from confluent_kafka import Message
+
+__all__ = ["META_FIELDS", "RecordFilter", "compile_where", "parse_header_match"]
+
+META_FIELDS = ("timestamp", "partition", "offset", "key", "value")
+
+Predicate = Callable[[int, int, int, Any, Any], bool]
+
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BoolOp,
+    ast.And,
+    ast.Or,
+    ast.UnaryOp,
+    ast.Not,
+    ast.USub,
+    ast.UAdd,
+    ast.BinOp,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.Mod,
+    ast.Compare,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+    ast.In,
+    ast.NotIn,
+    ast.Is,
+    ast.IsNot,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Attribute,
+    ast.Tuple,
+    ast.List,
+)
+
+
+def _field(value: Any, name: str) -> Any:
+    """Look up a field of a decoded value, None if it has no such field."""
+    if isinstance(value, dict):
+        return value.get(name)
+    return None
+
+
+def _ordering(op: Callable[[Any, Any], Any]) -> Callable[[Any, Any], bool]:
+    """Wrap an ordering operator so incomparable operands do not match."""
+
+    def compare(a: Any, b: Any) -> bool:
+        try:
+            return bool(op(a, b))
+        except TypeError:
+            return False
+
+    return compare
+
+
+_ORDERING_OPS: dict[type, str] = {
+    ast.Lt: "_lt",
+    ast.LtE: "_le",
+    ast.Gt: "_gt",
+    ast.GtE: "_ge",
+}
+
+_GLOBALS: dict[str, Any] = {
+    "__builtins__": {},
+    "_field": _field,
+    "_lt": _ordering(operator.lt),
+    "_le": _ordering(operator.le),
+    "_gt": _ordering(operator.gt),
+    "_ge": _ordering(operator.ge),
+}
+
+
+class _FieldAccess(ast.NodeTransformer):
+    """Rewrite names and attributes into field look-ups on the value."""
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id in META_FIELDS:
+            return node
+        return ast.Call(
+            func=ast.Name(id="_field", ctx=ast.Load()),
+            args=[ast.Name(id="value", ctx=ast.Load()), ast.Constant(node.id)],
+            keywords=[],
+        )
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        return ast.Call(
+            func=ast.Name(id="_field", ctx=ast.Load()),
+            args=[self.visit(node.value), ast.Constant(node.attr)],
+            keywords=[],
+        )
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        self.generic_visit(node)
+        if not any(type(op) in _ORDERING_OPS for op in node.ops):
+            return node
+        # Split chained comparisons so that ordering against a missing
+        # field (None) is false instead of an error.
+        parts: list[ast.expr] = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            name = _ORDERING_OPS.get(type(op))
+            if name is None:
+                parts.append(ast.Compare(left=left, ops=[op], comparators=[right]))
+            else:
+                parts.append(
+                    ast.Call(
+                        func=ast.Name(id=name, ctx=ast.Load()),
+                        args=[left, right],
+                        keywords=[],
+                    )
+                )
+            left = right
+        if len(parts) == 1:
+            return parts[0]
+        return ast.BoolOp(op=ast.And(), values=parts)
+
+
+def compile_where(expression: str) -> Predicate:
+    """Compile a filter expression into a predicate.
+
+    The expression uses Python syntax restricted to comparisons, boolean
+    and arithmetic operators, constants and names. The names
+    ``timestamp``, ``partition``, ``offset``, ``key`` and ``value`` refer
+    to the message, any other name to a field of the decoded value.
+    Nested fields are reached with attribute access, e.g. ``a.b > 1``.
+
+    Parameters
+    ----------
+    expression : str
+        The filter expression, e.g. ``"temperature > 20 and partition == 0"``.
+
+    Returns
+    -------
+    Predicate
+        Function of timestamp, partition, offset, key and value returning
+        True for matching messages. Comparisons against missing fields and
+        arithmetic errors such as a division by zero do not match.
+
+    Raises
+    ------
+    ValueError
+        If the expression is invalid or uses unsupported syntax.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid filter expression {expression!r}: {e.msg}.")
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(
+                f"Unsupported syntax {type(node).__name__} in filter expression"
+                f" {expression!r}."
+            )
+        name = getattr(node, "id", None) or getattr(node, "attr", None)
+        if name is not None and name.startswith("_"):
+            raise ValueError(
+                f"Unsupported name {name!r} in filter expression {expression!r}."
+            )
+
+    body = _FieldAccess().visit(tree).body
+    func = ast.Expression(
+        body=ast.Lambda(
+            args=ast.arguments(
+                posonlyargs=[],
+                args=[ast.arg(arg=name) for name in META_FIELDS],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[],
+            ),
+            body=body,
+        )
+    )
+    code = compile(ast.fix_missing_locations(func), "<where>", "eval")
+    evaluate = eval(code, dict(_GLOBALS))
+
+    def predicate(
+        timestamp: int, partition: int, offset: int, key: Any, value: Any
+    ) -> bool:
+        try:
+            return bool(evaluate(timestamp, partition, offset, key, value))
+        except (TypeError, ArithmeticError):
+            return False
+
+    return predicate
+
+
+def parse_header_match(spec: str) -> tuple[str, bytes | None]:
+    """Parse a header condition.
+
+    Parameters
+    ----------
+    spec : str
+        Either ``NAME`` to require the header, or ``NAME=VALUE`` to require
+        the header with that exact value.
+
+    Returns
+    -------
+    tuple[str, bytes | None]
+        The header name and the required value, None for any value.
+
+    Raises
+    ------
+    ValueError
+        If the header name is empty.
+    """
+    name, sep, value = spec.partition("=")
+    if not name:
+        raise ValueError(f"Invalid header condition {spec!r}.")
+    return name, value.encode("utf-8") if sep else None
+
+
+class RecordFilter:
+    """Select and project query records while they are read.
+
+    Key and header conditions are checked on the raw message, so rejected
+    messages are never decoded.
+
+    Parameters
+    ----------
+    where : str, optional
+        Filter expression, see `compile_where`.
+    fields : list[str], optional
+        The fields of decoded values to keep.
+    key : bytes, optional
+        The exact message key to match.
+    headers : list[tuple[str, bytes | None]], optional
+        Header conditions that must all hold, see `parse_header_match`.
+    """
+
+    def __init__(
+        self,
+        where: str | None = None,
+        fields: list[str] | None = None,
+        key: bytes | None = None,
+        headers: list[tuple[str, bytes | None]] | None = None,
+    ) -> None:
+        """Class constructor."""
+        self.where = where
+        self.fields = fields
+        self.key = key
+        self.headers = headers or []
+        self._predicate = compile_where(where) if where is not None else None
+
+    @property
+    def needs_value(self) -> bool:
+        """Whether the filter has to look at decoded values."""
+        return self.where is not None or self.fields is not None
+
+    def accepts(self, msg: Message) -> bool:
+        """Check the key and header conditions on a raw message."""
+        if self.key is not None and msg.key() != self.key:
+            return False
+        if self.headers:
+            msg_headers = msg.headers() or []
+            pairs = (
+                list(msg_headers.items())
+                if isinstance(msg_headers, dict)
+                else msg_headers
+            )
+            for name, value in self.headers:
+                if not any(
+                    k == name and (value is None or v == value) for k, v in pairs
+                ):
+                    return False
+        return True
+
+    def matches(
+        self, timestamp: int, partition: int, offset: int, key: Any, value: Any
+    ) -> bool:
+        """Check whether a decoded message passes the filter expression."""
+        if self._predicate is None:
+            return True
+        return self._predicate(timestamp, partition, offset, key, value)
+
+    def project(self, value: Any) -> Any:
+        """Keep only the requested fields of a decoded value."""
+        if self.fields is None or not isinstance(value, dict):
+            return value
+        return {name: value.get(name) for name in self.fields}
@@ -26,13 +26,19 @@ import sys
 from confluent_kafka.admin import AdminClient
 from jproperties import Properties
 
+from .session import get_session
+
 __all__ = [
     "acknowledge_deletion",
     "check_for_exception",
     "create_config",
     "generate_admin_client",
+    "get_cache_dir",
+    "parse_duration",
 ]
 
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
 
 def acknowledge_deletion(message: str) -> None:
     """Prompt for making sure a deletion is necessary.
@@ -67,6 +73,8 @@ def check_for_exception(out: str) -> None:
 def create_config(site_name: str) -> Properties:
     """Create configuration for AdminClient instance.
 
+    The configuration is read once per site and process, see `Session`.
+
     Parameters
     ----------
     site_name : str
@@ -77,28 +85,14 @@ def create_config(site_name: str) -> Properties:
     Properties
         The site specific access configuration.
     """
-    if site_name == "envvar":
-        props = Properties()
-        props["security.protocol"] = os.environ["LSST_KAFKA_SECURITY_PROTOCOL"]
-        props["sasl.mechanism"] = os.environ["LSST_KAFKA_SECURITY_MECHANISM"]
-        props["sasl.username"] = os.environ["LSST_KAFKA_SECURITY_USERNAME"]
-        props["sasl.password"] = os.environ["LSST_KAFKA_SECURITY_PASSWORD"]
-        props["bootstrap.servers"] = os.environ["LSST_KAFKA_BROKER_ADDR"]
-    else:
-        auth_config_file = (
-            pathlib.Path("~/").expanduser()
-            / ".auth"
-            / f"kafka-aclient-{site_name}.properties"
-        )
-        props = Properties()
-        with auth_config_file.open("rb") as acf:
-            props.load(acf, encoding="utf-8")
-    return props
+    return get_session(site_name).config
 
 
 def generate_admin_client(site_name: str) -> AdminClient:
     """Generate an AdminClient instance for a give site.
 
+    The client is shared by all callers for the site, see `Session`.
+
     Parameters
     ----------
     site_name : str
@@ -109,6 +103,51 @@ def generate_admin_client(site_name: str) -> AdminClient:
     AdminClient
         The site specific AdminClient instance.
     """
-    client_config = create_config(site_name)
-    ac = AdminClient(client_config.properties)
-    return ac
+    return get_session(site_name).admin_client
+
+
+def get_cache_dir() -> pathlib.Path:
+    """Return the directory for the on-disk caches of the package.
+
+    Returns
+    -------
+    pathlib.Path
+        The cache directory. Follows ``XDG_CACHE_HOME`` if set.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    if cache_home:
+        base = pathlib.Path(cache_home)
+    else:
+        base = pathlib.Path("~/.cache").expanduser()
+    return base / "kafka_tools"
+
+
+def parse_duration(duration: str) -> int:
+    """Convert a duration like ``90s``, ``5m``, ``1h``, ``2d`` or ``1w`` to
+    seconds.
+
+    Parameters
+    ----------
+    duration : str
+        The duration. A plain number is taken as seconds.
+
+    Returns
+    -------
+    int
+        The duration in seconds.
+
+    Raises
+    ------
+    ValueError
+        If the duration cannot be parsed or is not positive.
+    """
+    text = duration.strip().lower()
+    scale = _DURATION_UNITS.get(text[-1:], None)
+    number = text[:-1] if scale is not None else text
+    try:
+        seconds = int(number) * (scale or 1)
+    except ValueError:
+        raise ValueError(f"Invalid duration {duration!r}.")
+    if seconds <= 0:
+        raise ValueError(f"Duration must be positive, got {duration!r}.")
+    return seconds
@@ -0,0 +1,130 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import json
+import pathlib
+from typing import Any, TextIO
+
+__all__ = ["DeletionJournal"]
+
+
+class DeletionJournal:
+    """Record the progress of a topic deletion in a JSON lines file.
+
+    The first line holds the site and all topics of the run, every further
+    line the outcome for one topic. Lines are flushed as they are written,
+    so an interrupted run can be resumed from the file. A torn last line is
+    ignored on reading.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The journal file.
+    site : str
+        The site the topics are deleted from.
+    topics : list[str]
+        All topics of the run.
+    """
+
+    def __init__(self, path: pathlib.Path, site: str, topics: list[str]) -> None:
+        """Class constructor."""
+        self.path = path
+        self.site = site
+        self.topics = topics
+        self.deleted: set[str] = set()
+        self.failed: dict[str, str] = {}
+        self._ostream: TextIO | None = None
+
+    @classmethod
+    def start(cls, path: pathlib.Path, site: str, topics: list[str]) -> DeletionJournal:
+        """Start a new journal, replacing an existing file."""
+        journal = cls(path, site, topics)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        journal._ostream = path.open("w")
+        journal._write({"site": site, "topics": topics})
+        return journal
+
+    @classmethod
+    def resume(cls, path: pathlib.Path) -> DeletionJournal:
+        """Reopen a journal to continue its run.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a deletion journal.
+        """
+        with path.open() as ifile:
+            lines = ifile.read().splitlines()
+        try:
+            header = json.loads(lines[0])
+            journal = cls(path, header["site"], list(header["topics"]))
+        except (IndexError, KeyError, TypeError, json.JSONDecodeError) as e:
+            raise ValueError(f"{path} is not a deletion journal.") from e
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            journal._apply(entry)
+        journal._ostream = path.open("a")
+        return journal
+
+    def __enter__(self) -> DeletionJournal:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> list[str]:
+        """The topics not deleted yet, in run order."""
+        return [x for x in self.topics if x not in self.deleted]
+
+    def _apply(self, entry: dict[str, Any]) -> None:
+        topic = entry["topic"]
+        error = entry.get("error")
+        if error is None:
+            self.deleted.add(topic)
+            self.failed.pop(topic, None)
+        else:
+            self.failed[topic] = error
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        if self._ostream is None:
+            raise RuntimeError(f"The journal {self.path} is closed.")
+        self._ostream.write(json.dumps(entry) + "\n")
+        self._ostream.flush()
+
+    def record(self, topic: str, error: str | None = None) -> None:
+        """Record the deletion of a topic, or the error it failed with."""
+        entry: dict[str, Any] = {"topic": topic}
+        if error is not None:
+            entry["error"] = error
+        self._apply(entry)
+        self._write(entry)
+
+    def close(self) -> None:
+        """Close the journal file."""
+        if self._ostream is not None:
+            self._ostream.close()
+            self._ostream = None
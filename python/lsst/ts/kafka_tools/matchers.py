@@ -0,0 +1,249 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import bisect
+import collections
+import fnmatch
+import re
+from typing import Callable, Iterable
+
+from .constants import ListTopicsOpts
+
+__all__ = ["MATCH_MODES", "NameMatcher", "compile_regex", "select_names"]
+
+MATCH_MODES = ["substring", "prefix", "exact", "glob"]
+
+
+def compile_regex(pattern: str) -> re.Pattern:
+    """Compile a regular expression given on the command line.
+
+    Parameters
+    ----------
+    pattern : str
+        The regular expression.
+
+    Returns
+    -------
+    re.Pattern
+        The compiled expression, searched for in names.
+    """
+    return re.compile(repr(pattern)[1:-1])
+
+
+class _PrefixSet:
+    """Report whether a text starts with any of a set of prefixes.
+
+    Prefixes that start with a shorter prefix are dropped. In the remaining
+    sorted prefixes, the only candidate for a text is the largest prefix
+    not after it, which is found by bisection.
+
+    Parameters
+    ----------
+    patterns : Iterable[str]
+        The non-empty prefixes.
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        """Class constructor."""
+        self._prefixes: list[str] = []
+        for pattern in sorted(patterns):
+            if not self._prefixes or not pattern.startswith(self._prefixes[-1]):
+                self._prefixes.append(pattern)
+
+    def match(self, text: str) -> bool:
+        """Whether the text starts with any of the prefixes."""
+        index = bisect.bisect_right(self._prefixes, text)
+        return index > 0 and text.startswith(self._prefixes[index - 1])
+
+
+class _SubstringAutomaton:
+    """Aho-Corasick automaton reporting whether a text contains any pattern.
+
+    Transitions through failure links are added to the trie the first time
+    they are taken, so a text is scanned with one look-up per character.
+
+    Parameters
+    ----------
+    patterns : Iterable[str]
+        The non-empty patterns.
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        """Class constructor."""
+        self._goto: list[dict[str, int]] = [{}]
+        self._terminal: list[bool] = [False]
+        for pattern in patterns:
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._terminal.append(False)
+                state = next_state
+            self._terminal[state] = True
+
+        # Breadth first, so the failure state of every parent is known.
+        self._fail = [0] * len(self._goto)
+        queue = collections.deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                # A state also matches if a pattern ends in its suffix.
+                if self._terminal[self._fail[next_state]]:
+                    self._terminal[next_state] = True
+                queue.append(next_state)
+
+    def _transition(self, state: int, ch: str) -> int:
+        """Follow failure links for a missing transition and cache it."""
+        fail = state
+        while fail and ch not in self._goto[fail]:
+            fail = self._fail[fail]
+        next_state = self._goto[fail].get(ch, 0)
+        self._goto[state][ch] = next_state
+        return next_state
+
+    def search(self, text: str) -> bool:
+        """Whether the text contains any of the patterns."""
+        goto = self._goto
+        terminal = self._terminal
+        state = 0
+        for ch in text:
+            next_state = goto[state].get(ch)
+            if next_state is None:
+                next_state = self._transition(state, ch)
+            state = next_state
+            if terminal[state]:
+                return True
+        return False
+
+
+class NameMatcher:
+    """Match names against many patterns at once.
+
+    The cost of matching a name does not grow with the number of
+    patterns: exact names are looked up in a set, prefixes by bisection and
+    substrings with an Aho-Corasick automaton. Glob
+    patterns are combined into one regular expression. Blank patterns are
+    ignored.
+
+    Parameters
+    ----------
+    patterns : Iterable[str]
+        The patterns.
+    mode : str
+        One of ``MATCH_MODES``.
+
+    Raises
+    ------
+    ValueError
+        If the mode is unknown.
+    """
+
+    def __init__(self, patterns: Iterable[str], mode: str = "substring") -> None:
+        """Class constructor."""
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode {mode}.")
+        self.mode = mode
+        self.patterns = frozenset(x.strip() for x in patterns if x.strip())
+        self._match: Callable[[str], bool]
+        if not self.patterns:
+            self._match = lambda name: False
+        elif mode == "exact":
+            self._match = self.patterns.__contains__
+        elif mode == "prefix":
+            self._match = _PrefixSet(self.patterns).match
+        elif mode == "substring":
+            automaton = _SubstringAutomaton(self.patterns)
+            patterns = self.patterns
+            self._match = lambda name: name in patterns or automaton.search(name)
+        else:
+            regex = re.compile(
+                "|".join(fnmatch.translate(x) for x in sorted(self.patterns))
+            )
+            self._match = lambda name: regex.match(name) is not None
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def matches(self, name: str) -> bool:
+        """Whether the name matches any of the patterns."""
+        return self._match(name)
+
+
+def select_names(
+    names: Iterable[str], opts: ListTopicsOpts | None, default_all: bool = False
+) -> list[str]:
+    """Select the names matching the list options.
+
+    A name is selected if it matches any of the regular expression, the
+    name, the name list or the names in the name file. The name options
+    match as given by the match mode of the options.
+
+    Parameters
+    ----------
+    names : Iterable[str]
+        The names to select from.
+    opts : ListTopicsOpts, optional
+        CLI options from the invocation.
+    default_all : bool
+        Select all names if no option is set.
+
+    Returns
+    -------
+    list[str]
+        The selected names, sorted and without duplicates.
+    """
+    patterns: list[str] = []
+    regex = None
+    if opts is not None:
+        if opts.regex is not None:
+            regex = compile_regex(opts.regex)
+        if opts.name is not None:
+            patterns.append(opts.name)
+        if opts.name_list is not None:
+            patterns.extend(opts.name_list.split(","))
+        if opts.name_file is not None:
+            patterns.extend(opts.name_file.expanduser().read_text().splitlines())
+    if (
+        opts is None
+        or opts.regex is None
+        and opts.name is None
+        and opts.name_list is None
+        and opts.name_file is None
+    ):
+        return sorted(set(names)) if default_all else []
+
+    matcher = NameMatcher(patterns, opts.match_mode)
+    return sorted(
+        {
+            x
+            for x in names
+            if (regex is not None and regex.search(x) is not None) or matcher.matches(x)
+        }
+    )
@@ -0,0 +1,195 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import time
+from typing import Any
+
+from confluent_kafka.admin import ClusterMetadata, PartitionMetadata, TopicMetadata
+
+from .constants import METADATA_CACHE_TTL
+from .helpers import get_cache_dir
+from .type_hints import ScriptContext
+
+__all__ = [
+    "invalidate_metadata_cache",
+    "metadata_cache_file",
+    "metadata_from_snapshot",
+    "metadata_to_snapshot",
+    "read_metadata_cache",
+    "write_metadata_cache",
+]
+
+_SNAPSHOT_VERSION = 1
+
+
+def metadata_cache_file(site: str) -> pathlib.Path:
+    """Return the metadata cache file of a site.
+
+    Parameters
+    ----------
+    site : str
+        The name of the site.
+
+    Returns
+    -------
+    pathlib.Path
+        The cache file in the package cache directory.
+    """
+    return get_cache_dir() / "metadata" / f"{site}.json"
+
+
+def invalidate_metadata_cache(site: str) -> None:
+    """Drop the cached metadata of a site after its topics changed.
+
+    Parameters
+    ----------
+    site : str
+        The name of the site.
+    """
+    metadata_cache_file(site).unlink(missing_ok=True)
+
+
+def metadata_to_snapshot(md: ClusterMetadata) -> dict[str, Any]:
+    """Reduce cluster metadata to a JSON serializable snapshot.
+
+    Parameters
+    ----------
+    md : ClusterMetadata
+        The cluster metadata.
+
+    Returns
+    -------
+    dict[str, Any]
+        The topics with the id, leader, replicas and in-sync replicas of
+        their partitions.
+    """
+    return {
+        "version": _SNAPSHOT_VERSION,
+        "topics": {
+            name: [
+                [pm.id, pm.leader, list(pm.replicas), list(pm.isrs)]
+                for pm in tm.partitions.values()
+            ]
+            for name, tm in md.topics.items()
+        },
+    }
+
+
+def metadata_from_snapshot(snapshot: dict[str, Any]) -> ClusterMetadata:
+    """Rebuild cluster metadata from a snapshot.
+
+    Parameters
+    ----------
+    snapshot : dict[str, Any]
+        A snapshot from `metadata_to_snapshot`.
+
+    Returns
+    -------
+    ClusterMetadata
+        The topics and partitions of the snapshot.
+    """
+    md = ClusterMetadata()
+    topics = {}
+    for name, partitions in snapshot["topics"].items():
+        tm = TopicMetadata()
+        tm.topic = name
+        tm.partitions = {}
+        for pid, leader, replicas, isrs in partitions:
+            pm = PartitionMetadata()
+            pm.id = pid
+            pm.leader = leader
+            pm.replicas = replicas
+            pm.isrs = isrs
+            tm.partitions[pid] = pm
+        topics[name] = tm
+    md.topics = topics
+    return md
+
+
+def _read_snapshot(cache_file: pathlib.Path, ttl: float) -> ClusterMetadata | None:
+    """Read a snapshot younger than the TTL, None if there is none."""
+    try:
+        if time.time() - cache_file.stat().st_mtime >= ttl:
+            return None
+        snapshot = json.loads(cache_file.read_text())
+        if snapshot.get("version") != _SNAPSHOT_VERSION:
+            return None
+        return metadata_from_snapshot(snapshot)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_snapshot(cache_file: pathlib.Path, md: ClusterMetadata) -> None:
+    """Replace the snapshot atomically, so readers never see a partial file."""
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    tmp_file.write_text(json.dumps(metadata_to_snapshot(md), separators=(",", ":")))
+    tmp_file.replace(cache_file)
+
+
+def read_metadata_cache(ctxobj: ScriptContext) -> ClusterMetadata | None:
+    """Read the cached metadata of the context site if it is fresh.
+
+    The cache is fresh while it is younger than the ``metadata_ttl`` of the
+    context, ``METADATA_CACHE_TTL`` seconds by default. It is not read if
+    the context asks for a ``refresh``.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        The context object from the CLI invocation.
+
+    Returns
+    -------
+    ClusterMetadata or None
+        The topics and partitions, None if there is no fresh cache.
+    """
+    ttl = ctxobj.get("metadata_ttl", METADATA_CACHE_TTL)
+    if ctxobj.get("refresh", False) or ttl <= 0:
+        return None
+    return _read_snapshot(metadata_cache_file(ctxobj["site"]), ttl)
+
+
+def write_metadata_cache(ctxobj: ScriptContext, md: ClusterMetadata) -> None:
+    """Replace the cached metadata of the context site.
+
+    Nothing is written if the context disables the cache with a zero
+    ``metadata_ttl``, or if the cache directory is not writable.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        The context object from the CLI invocation.
+    md : ClusterMetadata
+        The freshly fetched cluster metadata.
+    """
+    if ctxobj.get("metadata_ttl", METADATA_CACHE_TTL) <= 0:
+        return
+    try:
+        _write_snapshot(metadata_cache_file(ctxobj["site"]), md)
+    except OSError:
+        # A read-only cache directory only costs the next fetch.
+        pass
@@ -22,7 +22,12 @@
 import concurrent.futures
 from typing import Any, Optional
 
-from confluent_kafka import OFFSET_INVALID, ConsumerGroupState, TopicPartition
+from confluent_kafka import (
+    OFFSET_INVALID,
+    ConsumerGroupState,
+    KafkaException,
+    TopicPartition,
+)
 from confluent_kafka.admin import (
     ClusterMetadata,
     ConfigEntry,
@@ -34,11 +39,14 @@ from confluent_kafka.admin import (
     MemberAssignment,
     MemberDescription,
     NewPartitions,
+    NewTopic,
     OffsetSpec,
     PartitionMetadata,
     TopicMetadata,
     _ConsumerGroupTopicPartitions,
 )
+from confluent_kafka.admin._listoffsets import EarliestSpec as _EarliestSpec
+from confluent_kafka.admin._listoffsets import TimestampSpec as _TimestampSpec
 
 
 class _MockListOffsetsResultInfo:
@@ -67,6 +75,18 @@ class MockAdminClient:
     def __init__(self) -> None:
         """Class constructor."""
         self.cluster_md = ClusterMetadata()
+        # (topic, partition) -> (log start offset, message timestamps)
+        self.partition_logs: dict[tuple[str, int], tuple[int, list[int]]] = {}
+        self.list_offsets_calls = 0
+        # number of topics in each create_topics request
+        self.create_topics_calls: list[int] = []
+        self.num_brokers = 3
+        # number of topics in each delete_topics request
+        self.delete_topics_calls: list[int] = []
+        # topic -> exception raised by its deletion
+        self.delete_errors: dict[str, Exception] = {}
+        # topics whose deletion never completes
+        self.stalled_deletes: set[str] = set()
         self.cgl: list[ConsumerGroupListing] = []
         self.cgd: list[ConsumerGroupDescription] = []
         self.empty_consumers: list[str] = []
@@ -215,6 +235,34 @@ class MockAdminClient:
             result[partition.topic] = f
         return result
 
+    def create_topics(
+        self, new_topics: list[NewTopic], **kwargs: Any
+    ) -> dict[str, concurrent.futures.Future]:
+        """Create topics, failing those replicated beyond the brokers."""
+        self.create_topics_calls.append(len(new_topics))
+        result = {}
+        for new_topic in new_topics:
+            f: concurrent.futures.Future = concurrent.futures.Future()
+            if new_topic.replication_factor > self.num_brokers:
+                f.set_exception(
+                    KafkaException(
+                        f"Replication factor {new_topic.replication_factor}"
+                        f" larger than available brokers {self.num_brokers}"
+                    )
+                )
+            else:
+                tm = TopicMetadata()
+                tm.topic = new_topic.topic
+                tm.partitions = {}
+                for p in range(new_topic.num_partitions):
+                    pm = PartitionMetadata()
+                    pm.id = p
+                    tm.partitions[p] = pm
+                self.cluster_md.topics[new_topic.topic] = tm
+                f.set_result(None)
+            result[new_topic.topic] = f
+        return result
+
     def delete_consumer_groups(
         self, consumer_groups: list[str]
     ) -> dict[str, concurrent.futures.Future]:
@@ -226,12 +274,18 @@ class MockAdminClient:
             result[consumer_group] = f
         return result
 
-    def delete_topics(self, topics: list[str]) -> dict[str, concurrent.futures.Future]:
+    def delete_topics(
+        self, topics: list[str], **kwargs: Any
+    ) -> dict[str, concurrent.futures.Future]:
         """Delete topics."""
+        self.delete_topics_calls.append(len(topics))
         result = {}
         for topic in topics:
             f: concurrent.futures.Future = concurrent.futures.Future()
-            f.set_result(None)
+            if topic in self.delete_errors:
+                f.set_exception(self.delete_errors[topic])
+            elif topic not in self.stalled_deletes:
+                f.set_result(None)
             result[topic] = f
         return result
 
@@ -299,14 +353,40 @@ class MockAdminClient:
         return result
 
     def list_offsets(
-        self, topic_partitions: dict[TopicPartition, OffsetSpec]
+        self, topic_partitions: dict[TopicPartition, OffsetSpec], **kwargs: Any
     ) -> dict[TopicPartition, concurrent.futures.Future]:
-        """Return the latest offset for each requested topic-partition."""
+        """Return the offset matching the spec of each topic-partition.
+
+        Partitions without a log in ``partition_logs`` start at offset 0
+        and only know their latest offset otherwise.
+        """
+        self.list_offsets_calls += 1
         result = {}
-        for tp in topic_partitions:
-            end = self._mock_end_offsets.get((tp.topic, tp.partition), OFFSET_INVALID)
+        for tp, spec in topic_partitions.items():
+            log = self.partition_logs.get((tp.topic, tp.partition))
+            if log is None and isinstance(spec, _EarliestSpec):
+                offset = 0
+            elif log is None:
+                offset = self._mock_end_offsets.get(
+                    (tp.topic, tp.partition), OFFSET_INVALID
+                )
+            else:
+                start, timestamps = log
+                if isinstance(spec, _TimestampSpec):
+                    offset = next(
+                        (
+                            start + i
+                            for i, ts in enumerate(timestamps)
+                            if ts >= spec.timestamp
+                        ),
+                        -1,
+                    )
+                elif isinstance(spec, _EarliestSpec):
+                    offset = start
+                else:
+                    offset = start + len(timestamps)
             f: concurrent.futures.Future = concurrent.futures.Future()
-            f.set_result(_MockListOffsetsResultInfo(end))
+            f.set_result(_MockListOffsetsResultInfo(offset))
             result[tp] = f
         return result
 
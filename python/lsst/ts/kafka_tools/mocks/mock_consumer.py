@@ -0,0 +1,228 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from confluent_kafka import OFFSET_BEGINNING, OFFSET_END, OFFSET_INVALID, TopicPartition
+from confluent_kafka.admin import ClusterMetadata, PartitionMetadata, TopicMetadata
+
+from .mock_message import MockMessage
+
+__all__ = ["MockConsumer", "MockConsumerFactory", "create_topic_log"]
+
+TopicLog = list[list[MockMessage]]
+
+
+def create_topic_log(
+    topic: str, partitions: list[list[tuple[int, bytes | None]]]
+) -> TopicLog:
+    """Create the partition logs of a topic.
+
+    Parameters
+    ----------
+    topic : str
+        The name of the topic.
+    partitions : list[list[tuple[int, bytes | None]]]
+        The (timestamp in ms, value) pairs for each partition.
+
+    Returns
+    -------
+    TopicLog
+        The messages for each partition with offsets starting at zero.
+    """
+    return [
+        [
+            MockMessage(ts, value, topic=topic, partition=p, offset=i)
+            for i, (ts, value) in enumerate(records)
+        ]
+        for p, records in enumerate(partitions)
+    ]
+
+
+class MockConsumer:
+    """Stand-in for a Consumer reading from in-memory partition logs.
+
+    Parameters
+    ----------
+    conf : dict[str, Any]
+        The consumer configuration.
+    logs : dict[str, TopicLog]
+        The partition logs for each topic.
+    """
+
+    def __init__(self, conf: dict[str, Any], logs: dict[str, TopicLog]) -> None:
+        """Class constructor."""
+        self.conf = conf
+        self.logs = logs
+        self.positions: dict[tuple[str, int], int] = {}
+        self.paused: set[tuple[str, int]] = set()
+        self.poll_calls = 0
+        self.consume_calls = 0
+        self.closed = False
+        # Number of consume calls that return nothing, like the first
+        # fetches of a consumer that is still connecting.
+        self.empty_consumes = 0
+
+    def _next_message(self) -> Optional[MockMessage]:
+        """Return the next message from the assigned partitions."""
+        for (topic, partition), position in self.positions.items():
+            if (topic, partition) in self.paused:
+                continue
+            log = self.logs[topic][partition]
+            if position < len(log):
+                self.positions[(topic, partition)] = position + 1
+                return log[position]
+        return None
+
+    def assign(self, partitions: list[TopicPartition]) -> None:
+        """Assign the partitions to read from."""
+        self.positions = {}
+        for tp in partitions:
+            offset = tp.offset
+            if offset < 0:
+                offset = len(self.logs[tp.topic][tp.partition])
+            self.positions[(tp.topic, tp.partition)] = offset
+
+    def close(self) -> None:
+        """Close the consumer."""
+        self.closed = True
+
+    def incremental_assign(self, partitions: list[TopicPartition]) -> None:
+        """Add partitions to the current assignment."""
+        for tp in partitions:
+            offset = tp.offset
+            if offset == OFFSET_BEGINNING:
+                offset = 0
+            elif offset < 0:
+                offset = len(self.logs[tp.topic][tp.partition])
+            self.positions[(tp.topic, tp.partition)] = offset
+
+    def consume(self, num_messages: int = 1, timeout: float = -1) -> list[MockMessage]:
+        """Consume a batch of messages."""
+        self.consume_calls += 1
+        if self.empty_consumes > 0:
+            self.empty_consumes -= 1
+            return []
+        messages: list[MockMessage] = []
+        while len(messages) < num_messages:
+            msg = self._next_message()
+            if msg is None:
+                break
+            messages.append(msg)
+        return messages
+
+    def get_watermark_offsets(
+        self,
+        partition: TopicPartition,
+        timeout: float | None = None,
+        cached: bool = False,
+    ) -> tuple[int, int]:
+        """Return the low and high watermarks of a partition."""
+        return (0, len(self.logs[partition.topic][partition.partition]))
+
+    def list_topics(
+        self, topic: str | None = None, timeout: float = -1
+    ) -> ClusterMetadata:
+        """Return the cluster metadata."""
+        cluster_md = ClusterMetadata()
+        topics = {}
+        for name, log in self.logs.items():
+            if topic is not None and name != topic:
+                continue
+            tm = TopicMetadata()
+            tm.topic = name
+            tm.partitions = {}
+            for p in range(len(log)):
+                pm = PartitionMetadata()
+                pm.id = p
+                tm.partitions[p] = pm
+            topics[name] = tm
+        cluster_md.topics = topics
+        return cluster_md
+
+    def offsets_for_times(
+        self, partitions: list[TopicPartition], timeout: float = -1
+    ) -> list[TopicPartition]:
+        """Look up the earliest offsets at or after the given timestamps."""
+        result = []
+        for tp in partitions:
+            log = self.logs[tp.topic][tp.partition]
+            offset = next(
+                (m.offset() for m in log if m.timestamp()[1] >= tp.offset), OFFSET_END
+            )
+            result.append(TopicPartition(tp.topic, tp.partition, offset))
+        return result
+
+    def pause(self, partitions: list[TopicPartition]) -> None:
+        """Pause reading from the partitions."""
+        self.paused.update((tp.topic, tp.partition) for tp in partitions)
+
+    def poll(self, timeout: float | None = None) -> Optional[MockMessage]:
+        """Poll for a single message."""
+        self.poll_calls += 1
+        return self._next_message()
+
+    def position(self, partitions: list[TopicPartition]) -> list[TopicPartition]:
+        """Return the offsets of the next messages to read."""
+        return [
+            TopicPartition(
+                tp.topic,
+                tp.partition,
+                self.positions.get((tp.topic, tp.partition), OFFSET_INVALID),
+            )
+            for tp in partitions
+        ]
+
+    def resume(self, partitions: list[TopicPartition]) -> None:
+        """Resume reading from the partitions."""
+        self.paused.difference_update((tp.topic, tp.partition) for tp in partitions)
+
+    def seek(self, partition: TopicPartition) -> None:
+        """Move the read position of a partition."""
+        self.positions[(partition.topic, partition.partition)] = partition.offset
+
+
+class MockConsumerFactory:
+    """Create MockConsumers over shared partition logs and keep them.
+
+    Used as the side effect of a patched Consumer class.
+
+    Parameters
+    ----------
+    logs : dict[str, TopicLog]
+        The partition logs for each topic.
+    """
+
+    def __init__(self, logs: dict[str, TopicLog]) -> None:
+        """Class constructor."""
+        self.logs = logs
+        self.consumers: list[MockConsumer] = []
+        # Passed on to every new consumer, see MockConsumer.
+        self.empty_consumes = 0
+
+    def __call__(self, conf: dict[str, Any]) -> MockConsumer:
+        """Create a consumer."""
+        consumer = MockConsumer(conf, self.logs)
+        consumer.empty_consumes = self.empty_consumes
+        self.consumers.append(consumer)
+        return consumer
@@ -22,23 +22,52 @@
 
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 
 class MockMessage:
-    def __init__(self, ts_ms: int, value: bytes):
+    def __init__(
+        self,
+        ts_ms: int,
+        value: Optional[bytes],
+        key: Optional[bytes] = None,
+        topic: str = "",
+        partition: int = 0,
+        offset: int = 0,
+        headers: Optional[List[Tuple[str, Optional[bytes]]]] = None,
+    ):
         self._ts = ts_ms
         self._value = value
+        self._key = key
+        self._topic = topic
+        self._partition = partition
+        self._offset = offset
+        self._headers = headers
+
+    def __len__(self) -> int:
+        return len(self._value) if self._value is not None else 0
 
     def timestamp(self) -> Tuple[int, int]:
         # confluent-kafka returns (timestamp_type, timestamp_ms)
         return (0, self._ts)
 
     def key(self) -> Optional[bytes]:
-        return None
+        return self._key
 
     def value(self) -> Optional[bytes]:
         return self._value
 
+    def topic(self) -> str:
+        return self._topic
+
+    def partition(self) -> int:
+        return self._partition
+
+    def offset(self) -> int:
+        return self._offset
+
+    def headers(self) -> Optional[List[Tuple[str, Optional[bytes]]]]:
+        return self._headers
+
     def error(self) -> None:
         return None
@@ -0,0 +1,120 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Optional
+
+from confluent_kafka.admin import ClusterMetadata, PartitionMetadata, TopicMetadata
+
+from .mock_message import MockMessage
+
+__all__ = ["MockProducer"]
+
+
+class MockProducer:
+    """Stand-in for a Producer writing to in-memory partition logs.
+
+    Messages are only delivered by a blocking ``poll`` and by ``flush``, and
+    ``produce`` raises BufferError while ``max_queued`` messages wait for
+    their report.
+
+    Parameters
+    ----------
+    conf : dict[str, Any]
+        The producer configuration.
+    partitions : dict[str, int]
+        The number of partitions of each existing topic.
+    max_queued : int
+        Maximum number of messages waiting for a delivery report.
+    """
+
+    def __init__(
+        self, conf: dict[str, Any], partitions: dict[str, int], max_queued: int = 10
+    ) -> None:
+        """Class constructor."""
+        self.conf = conf
+        self.partitions = partitions
+        self.max_queued = max_queued
+        self.logs: dict[tuple[str, int], list[MockMessage]] = {}
+        self.queued: list[tuple[MockMessage, Optional[Callable]]] = []
+        self.buffer_errors = 0
+        self._lock = threading.Lock()
+
+    def flush(self, timeout: float = -1) -> int:
+        """Deliver all queued messages."""
+        self.poll(timeout)
+        return 0
+
+    def list_topics(
+        self, topic: str | None = None, timeout: float = -1
+    ) -> ClusterMetadata:
+        """Return the cluster metadata."""
+        cluster_md = ClusterMetadata()
+        topics = {}
+        for name, num_partitions in self.partitions.items():
+            if topic is not None and name != topic:
+                continue
+            tm = TopicMetadata()
+            tm.topic = name
+            tm.partitions = {}
+            for p in range(num_partitions):
+                pm = PartitionMetadata()
+                pm.id = p
+                tm.partitions[p] = pm
+            topics[name] = tm
+        cluster_md.topics = topics
+        return cluster_md
+
+    def poll(self, timeout: float | None = None) -> int:
+        """Deliver the queued messages and serve their reports."""
+        if timeout == 0:
+            return 0
+        with self._lock:
+            queued, self.queued = self.queued, []
+        for msg, on_delivery in queued:
+            log = self.logs.setdefault((msg.topic(), msg.partition()), [])
+            msg._offset = len(log)
+            log.append(msg)
+            if on_delivery is not None:
+                on_delivery(None, msg)
+        return len(queued)
+
+    def produce(
+        self,
+        topic: str,
+        value: Optional[bytes] = None,
+        key: Optional[bytes] = None,
+        partition: int = -1,
+        on_delivery: Optional[Callable] = None,
+        timestamp: int = 0,
+        headers: Any = None,
+    ) -> None:
+        """Queue a message for delivery."""
+        if partition < 0:
+            partition = hash(key) % self.partitions[topic]
+        msg = MockMessage(timestamp, value, key, topic, partition, headers=headers)
+        with self._lock:
+            if len(self.queued) >= self.max_queued:
+                self.buffer_errors += 1
+                raise BufferError("Local: Queue full")
+            self.queued.append((msg, on_delivery))
@@ -0,0 +1,92 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import io
+import json
+import pathlib
+import struct
+from typing import Any
+
+__all__ = ["create_file_registry", "encode_avro", "heartbeat_schema"]
+
+heartbeat_schema: dict[str, Any] = {
+    "type": "record",
+    "name": "logevent_heartbeat",
+    "namespace": "lsst.sal.ATAOS",
+    "fields": [
+        {"name": "private_sndStamp", "type": "double"},
+        {"name": "private_seqNum", "type": "long"},
+        {"name": "heartbeat", "type": "boolean"},
+    ],
+}
+
+
+def create_file_registry(
+    registry_dir: pathlib.Path, schemas: dict[int, dict[str, Any]]
+) -> str:
+    """Lay out schemas like the schema registry REST API on disk.
+
+    Parameters
+    ----------
+    registry_dir : pathlib.Path
+        The directory to create the registry in.
+    schemas : dict[int, dict[str, Any]]
+        The Avro schemas by schema id.
+
+    Returns
+    -------
+    str
+        The ``file://`` URL of the registry.
+    """
+    ids_dir = registry_dir / "schemas" / "ids"
+    ids_dir.mkdir(parents=True, exist_ok=True)
+    for schema_id, schema in schemas.items():
+        (ids_dir / str(schema_id)).write_text(
+            json.dumps({"schema": json.dumps(schema)})
+        )
+    return registry_dir.resolve().as_uri()
+
+
+def encode_avro(schema_id: int, schema: dict[str, Any], record: Any) -> bytes:
+    """Encode a record in the Confluent Avro wire format.
+
+    Parameters
+    ----------
+    schema_id : int
+        The registry id of the schema.
+    schema : dict[str, Any]
+        The Avro schema.
+    record : Any
+        The record to encode.
+
+    Returns
+    -------
+    bytes
+        The framed payload.
+    """
+    import fastavro
+
+    buffer = io.BytesIO()
+    buffer.write(struct.pack(">bI", 0, schema_id))
+    fastavro.schemaless_writer(buffer, fastavro.parse_schema(schema), record)
+    return buffer.getvalue()
@@ -28,6 +28,7 @@ __all__ = [
     "name_file_delete",
     "name_list_delete",
     "partition_expansion",
+    "query_plan",
     "regex_delete",
     "regex_filtered_topics",
 ]
@@ -82,3 +83,9 @@ Found 6 topics to delete
 partition_expansion = """Found 1 topics to modify
 1 modified successfully, 0 not successfully modified
 """
+
+query_plan = """Query plan for lsst.sal.MTM1M3.forceActuatorData
+  partition 0: offsets [1, 3) messages=2 watermarks=[0, 4)
+  partition 1: offsets [0, 1) messages=1 watermarks=[0, 1)
+Expected 3 message(s) from 2 partition(s)
+"""
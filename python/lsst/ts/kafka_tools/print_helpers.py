@@ -21,8 +21,13 @@
 
 from __future__ import annotations
 
-import re
+import base64
+import json
+import pathlib
+import time
 from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Iterable, TextIO
 
 from confluent_kafka.admin import (
     ClusterMetadata,
@@ -31,14 +36,35 @@ from confluent_kafka.admin import (
     ConsumerGroupDescription,
 )
 
-from .constants import ListTopicsOpts
+from .constants import (
+    TAIL_FLUSH_INTERVAL,
+    CreateChunkResult,
+    DeletionSummary,
+    IdleTopic,
+    ListTopicsOpts,
+    PartitionDescription,
+    PartitionHistogram,
+    PartitionRate,
+    QueryPlan,
+    TailStats,
+)
+from .matchers import select_names
 
 __all__ = [
     "consumer_descriptions",
     "consumer_summary",
+    "creation_progress",
     "filtered_topics",
+    "histogram",
+    "idle_topics",
     "list_broker_configs",
+    "query_plan",
+    "rate_table",
+    "stream_records",
+    "summarize_topic_deletion",
     "summerize_deletion",
+    "tail_records",
+    "topic_descriptions",
     "two_column_table",
 ]
 
@@ -86,6 +112,22 @@ def consumer_summary(summary: dict[str, int]) -> None:
     print(f"{num_stable_consumers} active, {num_empty_consumers} inactive")
 
 
+def creation_progress(result: CreateChunkResult) -> None:
+    """Print the outcome of a topic creation chunk.
+
+    Parameters
+    ----------
+    result : CreateChunkResult
+        The created and failed topics of the chunk.
+    """
+    print(
+        f"Chunk {result.index + 1}/{result.num_chunks}: {len(result.created)} created,"
+        f" {len(result.failed)} failed"
+    )
+    for name, error in result.failed.items():
+        print(f"  {name}: {error}")
+
+
 def filtered_topics(topics: ClusterMetadata, opts: ListTopicsOpts) -> None:
     """Print topic list, potentially filtered.
 
@@ -96,17 +138,72 @@ def filtered_topics(topics: ClusterMetadata, opts: ListTopicsOpts) -> None:
     opts : ListTopicsOpts
         Options from the CLI for printing.
     """
-    regex = None
-    if opts.regex is not None:
-        regex = re.compile(repr(opts.regex)[1:-1])
-    for topic in sorted(topics.topics.keys()):
-        print_topic = True
-        if opts.name is not None:
-            print_topic = opts.name in topic
-        if regex is not None:
-            print_topic = regex.search(topic) is not None
-        if print_topic:
-            print(topic)
+    for topic in select_names(topics.topics.keys(), opts, default_all=True):
+        print(topic)
+
+
+def histogram(histograms: list[PartitionHistogram]) -> None:
+    """Print the per bucket message statistics of the partitions.
+
+    Parameters
+    ----------
+    histograms : list[PartitionHistogram]
+        The statistics of each partition.
+    """
+    if not histograms:
+        return
+    with_sizes = histograms[0].total_bytes is not None
+    header = f"{'partition':>9}  {'bucket':<19}  {'count':>10}"
+    if with_sizes:
+        header += f"  {'bytes':>12}  {'min':>8}  {'max':>8}"
+    print(
+        f"Histogram for {histograms[0].topic} ({histograms[0].bucket_ms // 1000} s buckets)"
+    )
+    print(header)
+    for h in histograms:
+        for i, count in enumerate(h.counts):
+            bucket = datetime.fromtimestamp(h.bucket_start(i) / 1000, tz=timezone.utc)
+            line = f"{h.partition:>9}  {bucket:%Y-%m-%dT%H:%M:%S}  {count:>10}"
+            if (
+                h.total_bytes is not None
+                and h.min_bytes is not None
+                and h.max_bytes is not None
+            ):
+                if count:
+                    line += f"  {h.total_bytes[i]:>12}  {h.min_bytes[i]:>8}  {h.max_bytes[i]:>8}"
+                else:
+                    line += f"  {0:>12}  {'-':>8}  {'-':>8}"
+            print(line)
+    total = sum(sum(h.counts) for h in histograms)
+    print(f"Counted {total} message(s) in {len(histograms)} partition(s)")
+
+
+def idle_topics(topics: list[IdleTopic], details: bool = False) -> None:
+    """Print idle topics.
+
+    Without details only the topic names are printed, one per line, so the
+    output can be passed to ``kt topics delete --name-file``.
+
+    Parameters
+    ----------
+    topics : list[IdleTopic]
+        The idle topics.
+    details : bool
+        Print the partition and message counts and the consumer groups
+        reading each topic.
+    """
+    if not details:
+        for topic in topics:
+            print(topic.topic)
+        return
+    width = max((len(x.topic) for x in topics), default=5)
+    print(f"{'topic':<{width}}  {'partitions':>10}  {'messages':>12}  consumer groups")
+    for topic in topics:
+        groups = ",".join(topic.consumer_groups) or "-"
+        print(
+            f"{topic.topic:<{width}}  {topic.num_partitions:>10}"
+            f"  {topic.num_messages:>12}  {groups}"
+        )
 
 
 def list_broker_configs(broker_id: str, configs: list[ConfigEntry]) -> None:
@@ -136,6 +233,133 @@ def list_broker_configs(broker_id: str, configs: list[ConfigEntry]) -> None:
         )
 
 
+def query_plan(plan: QueryPlan) -> None:
+    """Print the offset ranges of a time range query.
+
+    Parameters
+    ----------
+    plan : QueryPlan
+        The resolved query plan.
+    """
+    print(f"Query plan for {plan.topic}")
+    for x in plan.partitions:
+        print(
+            f"  partition {x.partition}: offsets [{x.start_offset}, {x.end_offset})"
+            f" messages={x.num_messages}"
+            f" watermarks=[{x.low_watermark}, {x.high_watermark})"
+        )
+    print(
+        f"Expected {plan.expected_messages} message(s)"
+        f" from {len(plan.partitions)} partition(s)"
+    )
+
+
+def rate_table(
+    rates: list[PartitionRate], windows: dict[str, int], per_partition: bool = False
+) -> None:
+    """Print the message rates of topics over trailing windows.
+
+    Parameters
+    ----------
+    rates : list[PartitionRate]
+        The offsets and window counts of the partitions.
+    windows : dict[str, int]
+        The window labels and their lengths in seconds.
+    per_partition : bool
+        Also print a line for every partition.
+    """
+    by_topic: dict[str, list[PartitionRate]] = {}
+    for rate in rates:
+        by_topic.setdefault(rate.topic, []).append(rate)
+    width = max((len(x) for x in by_topic), default=5)
+    header = f"{'topic':<{width}}  {'retained':>12}"
+    for label in windows:
+        header += f"  {label + ' msg/s':>12}"
+    print(header)
+    for topic, partitions in by_topic.items():
+        line = f"{topic:<{width}}  {sum(x.retained_messages for x in partitions):>12}"
+        for seconds in windows.values():
+            line += f"  {sum(x.rate(seconds) for x in partitions):>12.3f}"
+        print(line)
+        if per_partition:
+            for x in partitions:
+                line = f"{'  partition ' + str(x.partition):<{width}}  {x.retained_messages:>12}"
+                for seconds in windows.values():
+                    line += f"  {x.rate(seconds):>12.3f}"
+                print(line)
+
+
+def _json_default(value: Any) -> Any:
+    """Encode the values json cannot, raw bytes as base64 text."""
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def stream_records(
+    records: Iterable[dict[str, Any]], ostream: TextIO, flush_interval: float = 0.5
+) -> int:
+    """Write records as JSON lines while they are produced.
+
+    Raw bytes, e.g. Avro ``bytes`` fields or undecodable payloads, are
+    written as base64 text.
+
+    Parameters
+    ----------
+    records : Iterable[dict[str, Any]]
+        The records to write.
+    ostream : TextIO
+        The (buffered) stream to write to.
+    flush_interval : float
+        Minimum time in seconds between flushes of the stream. The first
+        record is always flushed right away.
+
+    Returns
+    -------
+    int
+        The number of records written.
+    """
+    count = 0
+    last_flush = 0.0
+    for record in records:
+        ostream.write(json.dumps(record, default=_json_default))
+        ostream.write("\n")
+        count += 1
+        now = time.monotonic()
+        if now - last_flush >= flush_interval:
+            ostream.flush()
+            last_flush = now
+    ostream.flush()
+    return count
+
+
+def summarize_topic_deletion(
+    summary: DeletionSummary, journal: pathlib.Path | None = None
+) -> None:
+    """Summarize a topic deletion, listing the unfinished topics.
+
+    Parameters
+    ----------
+    summary : DeletionSummary
+        The outcome of the deletion.
+    journal : pathlib.Path, optional
+        The journal of the run, to resume the unfinished topics.
+    """
+    print(f"Found {summary.requested} topics to delete")
+    if summary.skipped:
+        print(f"{summary.skipped} already deleted by a previous run")
+    print(
+        f"{len(summary.deleted)} deleted successfully,"
+        f" {len(summary.unfinished)} not successfully deleted"
+    )
+    for topic, error in summary.failed.items():
+        print(f"  failed: {topic}: {error}")
+    for topic in summary.timed_out:
+        print(f"  timed out: {topic}")
+    if summary.unfinished and journal is not None:
+        print(f"Retry the unfinished topics with --resume {journal}")
+
+
 def summerize_deletion(
     type_del: str, deletes_done: set[Future], deletes_not_done: set[Future]
 ) -> None:
@@ -157,6 +381,122 @@ def summerize_deletion(
     print(f"{num_done} deleted successfully, {num_not_done} not successfully deleted")
 
 
+def tail_records(
+    records: Iterable[dict[str, Any] | None],
+    ostream: TextIO,
+    stats: TailStats,
+    as_json: bool = False,
+    flush_interval: float = TAIL_FLUSH_INTERVAL,
+) -> None:
+    """Write followed records while they arrive, batching the flushes.
+
+    Parameters
+    ----------
+    records : Iterable[dict[str, Any] | None]
+        The records to write. None marks a pause in the stream and flushes
+        any pending output.
+    ostream : TextIO
+        The (buffered) stream to write to.
+    stats : TailStats
+        Updated with the count and delivery delays of the records.
+    as_json : bool
+        Write JSON lines instead of text.
+    flush_interval : float
+        Minimum time in seconds between flushes while records keep
+        arriving.
+    """
+    last_flush = 0.0
+    pending = False
+    for record in records:
+        if record is None:
+            if pending:
+                ostream.flush()
+                pending = False
+            continue
+        if as_json:
+            ostream.write(json.dumps(record, default=_json_default))
+        else:
+            ostream.write(
+                f"{record['topic']} ts={record['timestamp_ms']}"
+                f" delay={record['delay_ms']}ms \n value={record['value']}"
+            )
+        ostream.write("\n")
+        pending = True
+        stats.count += 1
+        stats.total_delay_ms += record["delay_ms"]
+        stats.max_delay_ms = max(stats.max_delay_ms, record["delay_ms"])
+        now = time.monotonic()
+        if now - last_flush >= flush_interval:
+            ostream.flush()
+            last_flush = now
+            pending = False
+    ostream.flush()
+
+
+def topic_descriptions(
+    descriptions: list[PartitionDescription],
+    per_partition: bool = False,
+    as_json: bool = False,
+) -> None:
+    """Print the partition layout and offsets of topics.
+
+    Parameters
+    ----------
+    descriptions : list[PartitionDescription]
+        The descriptions of the partitions, grouped by topic.
+    per_partition : bool
+        Also print a line for every partition in the table.
+    as_json : bool
+        Print one JSON line per topic, with all partitions, instead of a
+        table.
+    """
+    by_topic: dict[str, list[PartitionDescription]] = {}
+    for description in descriptions:
+        by_topic.setdefault(description.topic, []).append(description)
+    if as_json:
+        for topic, partitions in by_topic.items():
+            record = {
+                "topic": topic,
+                "partitions": [
+                    {
+                        "partition": x.partition,
+                        "leader": x.leader,
+                        "replicas": x.replicas,
+                        "isr": x.isrs,
+                        "earliest_offset": x.earliest_offset,
+                        "latest_offset": x.latest_offset,
+                    }
+                    for x in partitions
+                ],
+            }
+            print(json.dumps(record))
+        return
+
+    width = max((len(x) for x in by_topic), default=5)
+    print(
+        f"{'topic':<{width}}  {'partitions':>10}  {'replicas':>8}  {'min isr':>7}"
+        f"  {'under rep':>9}  {'retained':>12}  leaders"
+    )
+    for topic, partitions in by_topic.items():
+        leaders = ",".join(str(x) for x in sorted({x.leader for x in partitions}))
+        print(
+            f"{topic:<{width}}  {len(partitions):>10}"
+            f"  {max(len(x.replicas) for x in partitions):>8}"
+            f"  {min(len(x.isrs) for x in partitions):>7}"
+            f"  {sum(x.under_replicated for x in partitions):>9}"
+            f"  {sum(x.retained_messages for x in partitions):>12}  {leaders}"
+        )
+        if per_partition:
+            for x in partitions:
+                replicas = ",".join(str(r) for r in x.replicas)
+                isrs = ",".join(str(r) for r in x.isrs)
+                print(
+                    f"  partition {x.partition}: leader={x.leader}"
+                    f" replicas=[{replicas}] isr=[{isrs}]"
+                    f" offsets={x.earliest_offset}..{x.latest_offset}"
+                )
+
+
 def two_column_table(values: list[tuple[str, str]], max_length: int) -> None:
     """Print a two column table of information.
 
@@ -0,0 +1,171 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import atexit
+import os
+import pathlib
+import threading
+from typing import Any
+
+from confluent_kafka.admin import AdminClient
+from jproperties import Properties
+
+__all__ = ["Session", "close_sessions", "get_session", "load_config", "reset_session"]
+
+_sessions: dict[str, Session] = {}
+_lock = threading.Lock()
+
+
+def load_config(site_name: str) -> Properties:
+    """Read the access configuration of a site.
+
+    Parameters
+    ----------
+    site_name : str
+        The name of the accessed site. ``envvar`` takes the configuration
+        from the ``LSST_KAFKA_*`` environment variables, any other site from
+        ``~/.auth/kafka-aclient-{site_name}.properties``.
+
+    Returns
+    -------
+    Properties
+        The site specific access configuration.
+    """
+    if site_name == "envvar":
+        props = Properties()
+        props["security.protocol"] = os.environ["LSST_KAFKA_SECURITY_PROTOCOL"]
+        props["sasl.mechanism"] = os.environ["LSST_KAFKA_SECURITY_MECHANISM"]
+        props["sasl.username"] = os.environ["LSST_KAFKA_SECURITY_USERNAME"]
+        props["sasl.password"] = os.environ["LSST_KAFKA_SECURITY_PASSWORD"]
+        props["bootstrap.servers"] = os.environ["LSST_KAFKA_BROKER_ADDR"]
+    else:
+        auth_config_file = (
+            pathlib.Path("~/").expanduser()
+            / ".auth"
+            / f"kafka-aclient-{site_name}.properties"
+        )
+        props = Properties()
+        with auth_config_file.open("rb") as acf:
+            props.load(acf, encoding="utf-8")
+    return props
+
+
+class Session:
+    """Hold the parsed configuration and a warm AdminClient for a site.
+
+    Both are created on first use and kept until the session is closed, so
+    repeated operations on a site pay the configuration parsing and the
+    connection setup once.
+
+    Parameters
+    ----------
+    site : str
+        The name of the accessed site.
+    """
+
+    def __init__(self, site: str) -> None:
+        """Class constructor."""
+        self.site = site
+        self._config: Properties | None = None
+        self._admin_client: AdminClient | None = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> Session:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @property
+    def config(self) -> Properties:
+        """The access configuration of the site, read once."""
+        with self._lock:
+            if self._config is None:
+                self._config = load_config(self.site)
+            return self._config
+
+    @property
+    def admin_client(self) -> AdminClient:
+        """The AdminClient of the site, created on first use."""
+        config = self.config
+        with self._lock:
+            if self._admin_client is None:
+                self._admin_client = AdminClient(config.properties)
+            return self._admin_client
+
+    def close(self) -> None:
+        """Drop the client and the configuration.
+
+        The client connections are torn down once the client is released.
+        The session can still be used afterwards and starts over.
+        """
+        with self._lock:
+            self._admin_client = None
+            self._config = None
+
+
+def get_session(site: str) -> Session:
+    """Get the session of a site shared by the whole process.
+
+    Parameters
+    ----------
+    site : str
+        The name of the accessed site.
+
+    Returns
+    -------
+    Session
+        The session, created on the first request for the site.
+    """
+    with _lock:
+        session = _sessions.get(site)
+        if session is None:
+            session = _sessions[site] = Session(site)
+        return session
+
+
+def reset_session(site: str) -> None:
+    """Close and forget the shared session of a site.
+
+    The next request for the site reads its configuration again, e.g. after
+    the ``LSST_KAFKA_*`` environment variables of ``envvar`` changed.
+
+    Parameters
+    ----------
+    site : str
+        The name of the accessed site.
+    """
+    with _lock:
+        session = _sessions.pop(site, None)
+    if session is not None:
+        session.close()
+
+
+@atexit.register
+def close_sessions() -> None:
+    """Close and forget the shared sessions of all sites."""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
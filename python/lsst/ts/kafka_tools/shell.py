@@ -0,0 +1,316 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import cmd
+import shlex
+import sys
+from typing import IO
+
+import click
+
+from .constants import SITES, ListConsumerOpts
+from .consumers import list_consumers
+from .metadata import invalidate_metadata_cache
+from .session import reset_session
+from .topics import get_topics
+from .type_hints import ScriptContext
+
+__all__ = ["SITE_GROUPS", "KafkaShell", "run_shell"]
+
+SITE_GROUPS = ("topics", "consumers", "config")
+
+_SHELL_COMMANDS = ("exit", "help", "quit", "refresh", "site")
+
+
+def _insert_site(group: click.Group, site: str, words: list[str]) -> list[str]:
+    """Put the site after the group options of a command line.
+
+    Group options like ``--refresh`` have to come before the site
+    argument, so ``topics --refresh list`` becomes
+    ``topics --refresh SITE list``.
+    """
+    options = {
+        name: param
+        for param in group.params
+        if isinstance(param, click.Option)
+        for name in param.opts
+    }
+    index = 0
+    while index < len(words) and words[index].startswith("-"):
+        param = options.get(words[index].split("=", 1)[0])
+        if param is None:
+            break
+        if not param.is_flag and "=" not in words[index]:
+            index += 1
+        index += 1
+    return words[:index] + [site] + words[index:]
+
+
+class KafkaShell(cmd.Cmd):
+    """Run kt commands against one site in a single process.
+
+    The commands are the ones of the site groups, written without the
+    site, e.g. ``topics list --name MTMount``. The site configuration, the
+    AdminClient and the topic metadata are shared by all commands, so only
+    the first command pays the connection setup. Tab completion offers
+    the commands, their options and the names of topics and consumer
+    groups. ``site`` switches to another site and ``refresh`` reconnects,
+    both start over with a new session.
+
+    Parameters
+    ----------
+    site : str
+        The name of the accessed site.
+    command : click.Group
+        The kt command group to run the lines with.
+    stdin : IO[str], optional
+        The input stream, the terminal by default.
+    stdout : IO[str], optional
+        The output stream, the terminal by default.
+    """
+
+    intro = "Type help for the commands, exit or Ctrl-D to leave."
+
+    def __init__(
+        self,
+        site: str,
+        command: click.Group,
+        stdin: IO[str] | None = None,
+        stdout: IO[str] | None = None,
+    ) -> None:
+        """Class constructor."""
+        super().__init__(stdin=stdin, stdout=stdout)
+        if stdin is not None:
+            self.use_rawinput = False
+        self.command = command
+        self.prompt = f"kt {site}> "
+        self._set_site(site)
+
+    def _set_site(self, site: str) -> None:
+        self.site = site
+        self.ctxobj: ScriptContext = {"site": site, "timeout": 30000}
+        self._group_names: list[str] | None = None
+
+    def cmdloop(self, intro: str | None = None) -> None:
+        """Read and run lines until exit, surviving Ctrl-C."""
+        while True:
+            try:
+                super().cmdloop(intro)
+                return
+            except KeyboardInterrupt:
+                self.stdout.write("^C\n")
+                intro = ""
+
+    def postloop(self) -> None:
+        """Close the session of the site when leaving the shell."""
+        reset_session(self.site)
+
+    def emptyline(self) -> bool:
+        """Do nothing instead of repeating the last command."""
+        return False
+
+    def default(self, line: str) -> None:
+        """Run a command of the site groups."""
+        try:
+            words = shlex.split(line)
+        except ValueError as e:
+            self.stdout.write(f"Error: {e}.\n")
+            return
+        group = self._group(words[0])
+        if group is None:
+            self.stdout.write(f"Unknown command {words[0]!r}, type help.\n")
+            return
+        self.run([words[0]] + _insert_site(group, self.site, words[1:]))
+        if words[0] == "consumers" and "delete" in words:
+            self._group_names = None
+
+    def run(self, args: list[str]) -> int:
+        """Run a kt command line in this process.
+
+        Parameters
+        ----------
+        args : list[str]
+            The arguments after ``kt``.
+
+        Returns
+        -------
+        int
+            The exit code of the command.
+        """
+        try:
+            result = self.command.main(args=args, prog_name="kt", standalone_mode=False)
+        except click.ClickException as e:
+            e.show()
+            return e.exit_code
+        except click.Abort:
+            click.echo("Aborted!", err=True)
+            return 1
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        except KeyboardInterrupt:
+            click.echo("Interrupted", err=True)
+            return 130
+        except Exception as e:
+            click.echo(f"Error: {e}", err=True)
+            return 1
+        return result if isinstance(result, int) else 0
+
+    def do_exit(self, arg: str) -> bool:
+        """Leave the shell."""
+        return True
+
+    do_quit = do_exit
+
+    def do_EOF(self, arg: str) -> bool:
+        """Leave the shell on Ctrl-D."""
+        if self.use_rawinput:
+            self.stdout.write("\n")
+        return True
+
+    def do_refresh(self, arg: str) -> None:
+        """Drop the cached topic and consumer group names and reconnect."""
+        invalidate_metadata_cache(self.site)
+        reset_session(self.site)
+        self._group_names = None
+
+    def do_site(self, arg: str) -> None:
+        """Switch to another site, or show the current one."""
+        site = arg.strip()
+        if not site:
+            self.stdout.write(f"{self.site}\n")
+            return
+        if site not in SITES:
+            self.stdout.write(f"Unknown site {site!r}, one of {', '.join(SITES)}.\n")
+            return
+        # The next use of a site reads its configuration again.
+        reset_session(self.site)
+        reset_session(site)
+        self._set_site(site)
+        # Piped input runs without a prompt.
+        if self.prompt:
+            self.prompt = f"kt {site}> "
+
+    def do_help(self, arg: str) -> None:
+        """Show the help of a command group, or list the commands."""
+        if arg:
+            words = arg.split()
+            group = self._group(words[0])
+            if group is not None:
+                self.run(
+                    [words[0]] + _insert_site(group, self.site, words[1:] + ["--help"])
+                )
+                return
+            super().do_help(arg)
+            return
+        for name in SITE_GROUPS:
+            group = self._group(name)
+            help_text = group.get_short_help_str(60) if group is not None else ""
+            self.stdout.write(f"{name:<12}{help_text}\n")
+        self.stdout.write(
+            f"{'refresh':<12}Drop the cached topic and consumer group names"
+            " and reconnect.\n"
+        )
+        self.stdout.write(f"{'site':<12}Switch to another site.\n")
+        self.stdout.write(f"{'exit':<12}Leave the shell.\n")
+        self.stdout.write("Use help GROUP [COMMAND] for the commands of a group.\n")
+
+    def _group(self, name: str) -> click.Group | None:
+        if name not in SITE_GROUPS:
+            return None
+        group = self.command.get_command(click.Context(self.command), name)
+        return group if isinstance(group, click.Group) else None
+
+    def topic_names(self) -> list[str]:
+        """The topic names of the site, from the metadata cache."""
+        return sorted(get_topics(self.ctxobj).topics)
+
+    def group_names(self) -> list[str]:
+        """The consumer group names of the site."""
+        if self._group_names is None:
+            opts = ListConsumerOpts(None, "Inclusive", True, "All")
+            groups, _ = list_consumers(self.ctxobj, opts)
+            self._group_names = sorted(name for name, _ in groups)
+        return self._group_names
+
+    def completenames(self, text: str, *ignored: str) -> list[str]:
+        """Complete the first word of a line."""
+        names = SITE_GROUPS + _SHELL_COMMANDS
+        return [x for x in names if x.startswith(text)]
+
+    def completedefault(
+        self, text: str, line: str, begidx: int, endidx: int
+    ) -> list[str]:
+        """Complete commands, options and topic or consumer group names."""
+        try:
+            words = shlex.split(line[:begidx])
+        except ValueError:
+            return []
+        if not words:
+            return []
+        if words[0] == "help":
+            words = words[1:]
+            if len(words) == 0:
+                return self.completenames(text)
+        group = self._group(words[0])
+        if group is None:
+            return []
+        subwords = [x for x in words[1:] if not x.startswith("-")]
+        if not subwords:
+            return sorted(x for x in group.commands if x.startswith(text))
+        command = group.commands.get(subwords[0])
+        if command is None:
+            return []
+        if text.startswith("-"):
+            options = sorted(
+                name
+                for param in command.params
+                if isinstance(param, click.Option)
+                for name in param.opts
+                if name.startswith("--")
+            )
+            return [x for x in options if x.startswith(text)]
+        try:
+            names = self.topic_names() if group.name == "topics" else self.group_names()
+        except Exception:
+            # Completion must never break the prompt.
+            return []
+        return [x for x in names if x.startswith(text)]
+
+
+def run_shell(site: str, command: click.Group) -> None:
+    """Start an interactive shell for a site.
+
+    Parameters
+    ----------
+    site : str
+        The name of the accessed site.
+    command : click.Group
+        The kt command group to run the lines with.
+    """
+    if sys.stdin.isatty():
+        KafkaShell(site, command).cmdloop()
+        return
+    # Run piped command lines without prompts.
+    shell = KafkaShell(site, command, stdin=sys.stdin)
+    shell.prompt = ""
+    shell.cmdloop(intro="")
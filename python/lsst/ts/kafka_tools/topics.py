@@ -21,88 +21,260 @@
 
 from __future__ import annotations
 
+import collections
 import concurrent.futures
-import os
-import re
+import contextlib
+import heapq
+import itertools
+import json
+import pathlib
+import queue
+import random
+import threading
+import time
+from array import array
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Any, Callable, Dict, Generator, Iterable, List
 
-from confluent_kafka import Consumer, TopicPartition
-from confluent_kafka.admin import NewPartitions
+from confluent_kafka import (
+    OFFSET_BEGINNING,
+    Consumer,
+    KafkaError,
+    KafkaException,
+    Message,
+    Producer,
+    TopicPartition,
+)
+from confluent_kafka.admin import (
+    AdminClient,
+    ClusterMetadata,
+    NewPartitions,
+    NewTopic,
+    OffsetSpec,
+    _ConsumerGroupTopicPartitions,
+)
 
-from .constants import ListTopicsOpts
+from .agent import invalidate_agent_metadata, read_agent_metadata
+from .constants import (
+    COPY_BATCH_BYTES,
+    COPY_COMPRESSION,
+    COPY_FLUSH_TIMEOUT,
+    COPY_LINGER_MS,
+    COPY_MAX_BUFFER_KBYTES,
+    CREATE_CHUNK_SIZE,
+    CREATE_MAX_IN_FLIGHT,
+    DELETE_CHUNK_SIZE,
+    DELETE_CHUNK_TIMEOUT,
+    DELETE_MAX_IN_FLIGHT,
+    HISTOGRAM_BUCKET_SECONDS,
+    QUERY_BATCH_SIZE,
+    QUERY_GROUP_ID,
+    QUERY_MAX_MESSAGES,
+    QUERY_MAX_WORKERS,
+    QUERY_MERGE_BUFFER_SIZE,
+    QUERY_QUEUE_SIZE,
+    QUERY_STALL_TIMEOUT,
+    TAIL_POLL_TIMEOUT,
+    TAIL_REFRESH_INTERVAL,
+    CopyStats,
+    CreateChunkResult,
+    DeletionSummary,
+    FetchOpts,
+    IdleTopic,
+    ListTopicsOpts,
+    PartitionDescription,
+    PartitionHistogram,
+    PartitionRange,
+    PartitionRate,
+    QueryPlan,
+    TopicSpec,
+)
+from .decoders import decode_utf8
+from .filters import RecordFilter
 from .helpers import create_config, generate_admin_client
-from .type_hints import DoneAndNotDoneFutures, ScriptContext
+from .journal import DeletionJournal
+from .matchers import compile_regex, select_names
+from .metadata import (
+    invalidate_metadata_cache,
+    read_metadata_cache,
+    write_metadata_cache,
+)
+from .type_hints import DoneAndNotDoneFutures, ScriptContext, ValueDecoder
 
 __all__ = [
+    "COMPRESSION_TYPES",
+    "SAMPLE_METHODS",
+    "copy_topic_time_range",
+    "create_topics",
     "delete_topics",
+    "describe_topics",
     "filter_topics",
+    "find_idle_topics",
     "get_topics",
+    "iter_topic_messages",
+    "iter_topic_time_range",
+    "iter_topics_messages",
+    "iter_topics_time_range",
+    "load_topic_specs",
+    "plan_topic_time_range",
+    "plan_topics_time_range",
     "set_partitions_topics",
+    "split_existing_topics",
     "query_topic_time_range",
+    "sample_topic_time_range",
+    "tail_topics",
+    "topic_histogram",
+    "topic_rates",
 ]
 
+COMPRESSION_TYPES = ["none", "gzip", "snappy", "lz4", "zstd"]
+SAMPLE_METHODS = ["offsets", "reservoir"]
 
-def delete_topics(ctxobj: ScriptContext, topics: list[str]) -> DoneAndNotDoneFutures:
+
+def _is_unknown_topic(error: BaseException) -> bool:
+    """Whether an admin request failed because the topic does not exist."""
+    return (
+        isinstance(error, KafkaException)
+        and bool(error.args)
+        and isinstance(error.args[0], KafkaError)
+        and error.args[0].code() == KafkaError.UNKNOWN_TOPIC_OR_PART
+    )
+
+
+def delete_topics(
+    ctxobj: ScriptContext,
+    topics: list[str],
+    chunk_size: int = DELETE_CHUNK_SIZE,
+    max_in_flight: int = DELETE_MAX_IN_FLIGHT,
+    chunk_timeout: float = DELETE_CHUNK_TIMEOUT,
+    journal: DeletionJournal | None = None,
+) -> DeletionSummary:
     """Delete the list of topics.
 
+    Every chunk of topics is one ``delete_topics`` request. When
+    ``max_in_flight`` requests are pending, the oldest one is awaited for
+    at most ``chunk_timeout`` before the next is sent. Topics without a
+    result by then count as timed out. A topic that no longer exists
+    counts as deleted.
+
     Parameters
     ----------
     ctxobj : ScriptContext
-
+        CLI context.
     topics : list[str]
         List of topics to delete.
+    chunk_size : int
+        Maximum number of topics per request.
+    max_in_flight : int
+        Maximum number of pending requests.
+    chunk_timeout : float
+        Deadline in seconds for the deletion of a chunk.
+    journal : DeletionJournal, optional
+        Journal recording the outcome of every topic. Topics it already
+        records as deleted are skipped.
 
     Returns
     -------
-    DoneAndNotDoneFutures
-        The done and not done futures.
+    DeletionSummary
+        The deleted, failed and timed out topics.
     """
     client = generate_admin_client(ctxobj["site"])
+    topics = list(dict.fromkeys(topics))
+    summary = DeletionSummary(requested=len(topics))
+    if journal is not None:
+        todo = [x for x in topics if x not in journal.deleted]
+        summary.skipped = len(topics) - len(todo)
+        topics = todo
+
+    pending: collections.deque[dict[str, concurrent.futures.Future]] = (
+        collections.deque()
+    )
+
+    def finish() -> None:
+        futures = pending.popleft()
+        concurrent.futures.wait(list(futures.values()), timeout=chunk_timeout)
+        for topic, future in futures.items():
+            error: str | None = None
+            if not future.done():
+                summary.timed_out.append(topic)
+                continue
+            exc = future.exception()
+            if exc is None or _is_unknown_topic(exc):
+                summary.deleted.append(topic)
+            else:
+                error = str(exc)
+                summary.failed[topic] = error
+            if journal is not None:
+                journal.record(topic, error)
+
+    for start in range(0, len(topics), chunk_size):
+        if len(pending) >= max_in_flight:
+            finish()
+        end = start + chunk_size
+        pending.append(
+            client.delete_topics(
+                topics[start:end],
+                operation_timeout=chunk_timeout,
+                request_timeout=chunk_timeout,
+            )
+        )
+    while pending:
+        finish()
+    _topics_changed(ctxobj["site"])
+    return summary
 
-    topics_to_delete = client.delete_topics(topics)
-    results = concurrent.futures.wait(list(topics_to_delete.values()))
-    return (results.done, results.not_done)
 
+def _list_topics(ctxobj: ScriptContext, fresh: bool = False) -> ClusterMetadata:
+    """Get the cluster metadata from the site agent or the cache if fresh,
+    else from the site.
 
-def filter_topics(ctxobj: ScriptContext, opts: ListTopicsOpts) -> list[str]:
+    With ``fresh`` the metadata always comes from the site, for commands
+    that change topics and must not act on a stale snapshot.
+    """
+    md = None
+    if not fresh:
+        md = read_agent_metadata(ctxobj)
+    if md is None and not fresh:
+        md = read_metadata_cache(ctxobj)
+    if md is None:
+        md = generate_admin_client(ctxobj["site"]).list_topics()
+        write_metadata_cache(ctxobj, md)
+    return md
+
+
+def _topics_changed(site: str) -> None:
+    """Drop the cached metadata of a site after topics changed."""
+    invalidate_metadata_cache(site)
+    invalidate_agent_metadata(site)
+
+
+def filter_topics(
+    ctxobj: ScriptContext, opts: ListTopicsOpts, fresh: bool = False
+) -> list[str]:
     """List topics from system and possibly filter the list.
 
+    The topics come from the site agent or the metadata cache while
+    fresh.
+
     Parameters
     ----------
     ctxobj : ScriptContext
         The context object from the CLI invocation.
     opts : ListTopicsOpts
         CLI options from the invocation.
+    fresh : bool
+        Read the topics from the site, bypassing the agent and the cache.
     """
-    client = generate_admin_client(ctxobj["site"])
-    result = client.list_topics()
-    topics: list[str] = []
-    regex = None
-    name_set = None
-    if opts.regex is not None:
-        regex = re.compile(repr(opts.regex)[1:-1])
-    if opts.name_list is not None:
-        name_set = opts.name_list.split(",")
-    if opts.name_file is not None:
-        ifile = opts.name_file.expanduser()
-        name_set = ifile.read_text().split(os.linesep)
-    for topic in sorted(result.topics.keys()):
-        if opts.name is not None and opts.name in topic:
-            topics.append(topic)
-        if regex is not None and regex.search(topic) is not None:
-            topics.append(topic)
-        if name_set is not None:
-            for name in name_set:
-                if name in topic:
-                    topics.append(topic)
-
-    return topics
-
-
-def get_topics(ctxobj: ScriptContext) -> list[str]:
+    result = _list_topics(ctxobj, fresh)
+    return select_names(result.topics.keys(), opts)
+
+
+def get_topics(ctxobj: ScriptContext) -> ClusterMetadata:
     """Get all topics.
 
+    The topics come from the site agent or the metadata cache while
+    fresh.
+
     Parameters
     ----------
     ctxobj : ScriptContext
@@ -110,12 +282,10 @@ def get_topics(ctxobj: ScriptContext) -> list[str]:
 
     Returns
     -------
-    list[str]
-        List of all the topics.
+    ClusterMetadata
+        The metadata of all the topics.
     """
-    client = generate_admin_client(ctxobj["site"])
-    topics = client.list_topics()
-    return topics
+    return _list_topics(ctxobj)
 
 
 def set_partitions_topics(
@@ -152,18 +322,866 @@ def set_partitions_topics(
     client = generate_admin_client(ctxobj["site"])
     topics_modified = client.create_partitions(telemetry_topics)
     results = concurrent.futures.wait(list(topics_modified.values()))
+    _topics_changed(ctxobj["site"])
     return (results.done, results.not_done)
 
 
+def _create_consumer_config(
+    ctxobj: ScriptContext, fetch: FetchOpts | None = None
+) -> dict[str, Any]:
+    """Create the configuration for a time range query consumer.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        The context object from the CLI invocation.
+    fetch : FetchOpts, optional
+        Fetch sizing overrides for bulk reads.
+
+    Returns
+    -------
+    dict[str, Any]
+        The consumer configuration.
+    """
+    props = create_config(ctxobj["site"])
+    conf: dict[str, Any] = {
+        "group.id": QUERY_GROUP_ID,
+        "enable.auto.commit": False,
+        "auto.offset.reset": "earliest",
+    }
+    for key, prop in props.items():
+        conf[str(key)] = str(prop.data)
+    if fetch is not None:
+        overrides = {
+            "fetch.min.bytes": fetch.fetch_min_bytes,
+            "fetch.max.bytes": fetch.fetch_max_bytes,
+            "max.partition.fetch.bytes": fetch.max_partition_fetch_bytes,
+            "queued.max.messages.kbytes": fetch.queued_max_messages_kbytes,
+        }
+        conf.update({k: v for k, v in overrides.items() if v is not None})
+    return conf
+
+
+def _parse_query_time(time_str: str) -> int:
+    """Convert a query time string to milliseconds since the epoch.
+
+    Parameters
+    ----------
+    time_str : str
+        The time (YYYY-MM-DD-HH:MM) in UTC.
+
+    Returns
+    -------
+    int
+        The time in milliseconds.
+    """
+    dt = datetime.strptime(time_str, "%Y-%m-%d-%H:%M").replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _plan_partitions(
+    consumer: Consumer,
+    md: ClusterMetadata,
+    topics: list[str],
+    start_ms: int,
+    end_ms: int,
+) -> list[QueryPlan]:
+    """Resolve a time range to offset ranges for every partition of topics.
+
+    The offsets of all partitions are looked up with one request per
+    boundary, and the watermarks of the partitions concurrently on up to
+    ``QUERY_MAX_WORKERS`` threads.
+
+    Parameters
+    ----------
+    consumer : Consumer
+        The consumer used for the offset look-ups.
+    md : ClusterMetadata
+        Metadata holding the partitions of the topics.
+    topics : list[str]
+        Topic names.
+    start_ms : int
+        The start of the time range in milliseconds.
+    end_ms : int
+        The end of the time range in milliseconds (inclusive).
+
+    Returns
+    -------
+    list[QueryPlan]
+        The offset ranges for all partitions of each topic.
+    """
+    tps = [(topic, p) for topic in topics for p in sorted(md.topics[topic].partitions)]
+    if not tps:
+        return []
+    starts = consumer.offsets_for_times(
+        [TopicPartition(topic, p, start_ms) for topic, p in tps], timeout=10
+    )
+    # The first offset past the end time is the exclusive end of the range.
+    ends = consumer.offsets_for_times(
+        [TopicPartition(topic, p, end_ms + 1) for topic, p in tps], timeout=10
+    )
+    # Every watermark lookup is a broker round trip of its own.
+    workers = min(len(tps), QUERY_MAX_WORKERS)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        watermarks = list(
+            executor.map(
+                lambda tp: consumer.get_watermark_offsets(
+                    TopicPartition(*tp), timeout=10
+                ),
+                tps,
+            )
+        )
+    ranges: dict[str, list[PartitionRange]] = {topic: [] for topic in topics}
+    for start_tp, end_tp, (low, high) in zip(starts, ends, watermarks):
+        # A negative offset means no message at or after the timestamp.
+        start_offset = start_tp.offset if start_tp.offset >= 0 else high
+        end_offset = end_tp.offset if end_tp.offset >= 0 else high
+        ranges[start_tp.topic].append(
+            PartitionRange(
+                topic=start_tp.topic,
+                partition=start_tp.partition,
+                start_offset=start_offset,
+                end_offset=max(start_offset, end_offset),
+                low_watermark=low,
+                high_watermark=high,
+            )
+        )
+
+    return [
+        QueryPlan(
+            topic=topic, start_ms=start_ms, end_ms=end_ms, partitions=ranges[topic]
+        )
+        for topic in topics
+    ]
+
+
+def _plan_time_range(
+    conf: dict[str, Any], topic: str, start_ms: int, end_ms: int
+) -> QueryPlan:
+    """Resolve a time range to offset ranges for every partition of a topic.
+
+    Parameters
+    ----------
+    conf : dict[str, Any]
+        The consumer configuration.
+    topic : str
+        Topic name.
+    start_ms : int
+        The start of the time range in milliseconds.
+    end_ms : int
+        The end of the time range in milliseconds (inclusive).
+
+    Returns
+    -------
+    QueryPlan
+        The offset ranges for all partitions.
+    """
+    consumer = Consumer(conf)
+    try:
+        md = consumer.list_topics(topic, timeout=10)
+        return _plan_partitions(consumer, md, [topic], start_ms, end_ms)[0]
+    finally:
+        consumer.close()
+
+
+def _plan_topics_time_range(
+    conf: dict[str, Any], regex: str, start_ms: int, end_ms: int
+) -> list[QueryPlan]:
+    """Resolve a time range to offset ranges for all topics matching a regex.
+
+    Parameters
+    ----------
+    conf : dict[str, Any]
+        The consumer configuration.
+    regex : str
+        Regular expression searched for in the topic names.
+    start_ms : int
+        The start of the time range in milliseconds.
+    end_ms : int
+        The end of the time range in milliseconds (inclusive).
+
+    Returns
+    -------
+    list[QueryPlan]
+        The offset ranges for each matching topic, sorted by topic name.
+    """
+    pattern = compile_regex(regex)
+    consumer = Consumer(conf)
+    try:
+        md = consumer.list_topics(timeout=10)
+        topics = sorted(x for x in md.topics if pattern.search(x) is not None)
+        return _plan_partitions(consumer, md, topics, start_ms, end_ms)
+    finally:
+        consumer.close()
+
+
+def _range_exhausted(
+    consumer: Consumer, topic: str, partition: int, end_offset: int, idle_since: float
+) -> bool:
+    """Check whether an empty fetch means a partition has nothing left to
+    read before an offset.
+
+    The range is done once the consumer position reaches the end offset.
+    Offsets may also be missing at the end of the range, e.g. after
+    retention removed them. So once nothing arrived for
+    ``QUERY_STALL_TIMEOUT`` seconds, the range is also done if the current
+    high watermark is at or below the consumer position. A partition with
+    messages left that still does not deliver any is an error, so a slow
+    read never truncates the range silently.
+
+    Parameters
+    ----------
+    consumer : Consumer
+        The consumer assigned to the partition.
+    topic : str
+        The topic of the partition.
+    partition : int
+        The partition number.
+    end_offset : int
+        The end of the range (exclusive).
+    idle_since : float
+        The `time.monotonic` time of the last message from the partition.
+
+    Returns
+    -------
+    bool
+        True if the partition has nothing left before the end offset.
+
+    Raises
+    ------
+    RuntimeError
+        If the partition stalled and the broker does not answer or still
+        holds messages before the end offset.
+    """
+    tp = TopicPartition(topic, partition)
+    position = consumer.position([tp])[0].offset
+    if position >= end_offset:
+        return True
+    if time.monotonic() - idle_since < QUERY_STALL_TIMEOUT:
+        return False
+    watermarks = consumer.get_watermark_offsets(
+        tp, timeout=QUERY_STALL_TIMEOUT, cached=False
+    )
+    if watermarks is None:
+        raise RuntimeError(
+            f"Timed out reading {topic}[{partition}] before offset {end_offset}."
+        )
+    _, high = watermarks
+    # An invalid position means nothing was read yet.
+    if high <= max(position, 0):
+        return True
+    raise RuntimeError(
+        f"Reading {topic}[{partition}] stalled at offset {position} for"
+        f" {QUERY_STALL_TIMEOUT} s with messages left before offset"
+        f" {min(high, end_offset)}."
+    )
+
+
+def _iter_partition_messages(
+    conf: dict[str, Any],
+    prange: PartitionRange,
+    start_ms: int,
+    end_ms: int,
+    batch_size: int = QUERY_BATCH_SIZE,
+    record_filter: RecordFilter | None = None,
+) -> Generator[Message, None, None]:
+    """Read the raw messages in the planned offset range of a partition.
+
+    Messages are fetched in batches with ``Consumer.consume`` to limit the
+    number of calls into librdkafka.
+
+    Parameters
+    ----------
+    conf : dict[str, Any]
+        The consumer configuration.
+    prange : PartitionRange
+        The offset range to read.
+    start_ms : int
+        The start of the time range in milliseconds.
+    end_ms : int
+        The end of the time range in milliseconds.
+    batch_size : int
+        Maximum number of messages fetched per call.
+    record_filter : RecordFilter, optional
+        Key and header conditions checked on the raw messages.
+
+    Yields
+    ------
+    Message
+        The accepted messages within the time range.
+    """
+    consumer = Consumer(conf)
+    consumer.assign(
+        [TopicPartition(prange.topic, prange.partition, prange.start_offset)]
+    )
+
+    next_offset = prange.start_offset
+    idle_since = time.monotonic()
+
+    try:
+        while next_offset < prange.end_offset:
+            msgs = consumer.consume(
+                min(batch_size, prange.end_offset - next_offset), 1.0
+            )
+            if not msgs:
+                if _range_exhausted(
+                    consumer,
+                    prange.topic,
+                    prange.partition,
+                    prange.end_offset,
+                    idle_since,
+                ):
+                    break
+                continue
+            idle_since = time.monotonic()
+            for msg in msgs:
+                if msg.error():
+                    raise RuntimeError(msg.error())
+                offset = msg.offset()
+                assert offset is not None
+                if offset >= prange.end_offset:
+                    next_offset = prange.end_offset
+                    break
+                next_offset = offset + 1
+
+                # Producer timestamps are not guaranteed to be ordered, so
+                # stragglers inside the offset range are skipped.
+                _, ts = msg.timestamp()
+                if ts < start_ms or ts > end_ms:
+                    continue
+                if record_filter is not None and not record_filter.accepts(msg):
+                    continue
+                yield msg
+    finally:
+        consumer.close()
+
+
+def _make_record(
+    msg: Message,
+    value_decoder: ValueDecoder,
+    record_filter: RecordFilter | None = None,
+) -> Dict | None:
+    """Turn a message into a query record.
+
+    Parameters
+    ----------
+    msg : Message
+        The message to convert.
+    value_decoder : ValueDecoder
+        The decoder for message values.
+    record_filter : RecordFilter, optional
+        Selection and projection applied before the record is formatted.
+
+    Returns
+    -------
+    dict or None
+        The query record, None if the filter rejected the message.
+    """
+    _, ts = msg.timestamp()
+    partition = msg.partition()
+    offset = msg.offset()
+    assert partition is not None and offset is not None
+    raw_key = msg.key()
+    key = decode_utf8(raw_key) if raw_key else None
+    raw_value = msg.value()
+    value = value_decoder(raw_value) if raw_value else None
+    if record_filter is not None:
+        if not record_filter.matches(ts, partition, offset, key, value):
+            return None
+        value = record_filter.project(value)
+
+    ts_human = datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S"
+    )
+    return {
+        "timestamp": ts,
+        "timestamp_ms": ts_human,
+        "partition": partition,
+        "offset": offset,
+        "key": key,
+        "value": value,
+    }
+
+
+def _iter_partition(
+    conf: dict[str, Any],
+    prange: PartitionRange,
+    start_ms: int,
+    end_ms: int,
+    batch_size: int = QUERY_BATCH_SIZE,
+    value_decoder: ValueDecoder = decode_utf8,
+    record_filter: RecordFilter | None = None,
+) -> Generator[Dict, None, None]:
+    """Read the records in the planned offset range of a partition.
+
+    Parameters
+    ----------
+    conf : dict[str, Any]
+        The consumer configuration.
+    prange : PartitionRange
+        The offset range to read.
+    start_ms : int
+        The start of the time range in milliseconds.
+    end_ms : int
+        The end of the time range in milliseconds.
+    batch_size : int
+        Maximum number of messages fetched per call.
+    value_decoder : ValueDecoder
+        The decoder for message values.
+    record_filter : RecordFilter, optional
+        Selection and projection of the records.
+
+    Yields
+    ------
+    dict
+        The matching records within the time range.
+    """
+    with contextlib.closing(
+        _iter_partition_messages(
+            conf, prange, start_ms, end_ms, batch_size, record_filter
+        )
+    ) as msgs:
+        for msg in msgs:
+            record = _make_record(msg, value_decoder, record_filter)
+            if record is not None:
+                yield record
+
+
+def _read_partition(
+    conf: dict[str, Any],
+    prange: PartitionRange,
+    start_ms: int,
+    end_ms: int,
+    max_messages: int,
+    batch_size: int,
+    value_decoder: ValueDecoder,
+    record_filter: RecordFilter | None,
+) -> list[Dict]:
+    """Read up to ``max_messages`` matching records from a single partition."""
+    with contextlib.closing(
+        _iter_partition(
+            conf,
+            prange,
+            start_ms,
+            end_ms,
+            min(batch_size, max_messages),
+            value_decoder,
+            record_filter,
+        )
+    ) as it:
+        return list(itertools.islice(it, max_messages))
+
+
+def _put_record(records: queue.Queue, stop: threading.Event, item: Any) -> bool:
+    """Put an item on the stream queue unless the stream was stopped.
+
+    Returns
+    -------
+    bool
+        True if the item was queued, False if the stream was stopped.
+    """
+    while not stop.is_set():
+        try:
+            records.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _stream_partitions(
+    plan: QueryPlan,
+    reader: Callable[[PartitionRange], Generator[Any, None, None]],
+    max_workers: int | None,
+    queue_size: int,
+) -> Generator[Any, None, None]:
+    """Stream the items read from all planned partitions as they arrive.
+
+    The partition readers run in a thread pool and hand items over through
+    a bounded queue, so memory use does not depend on the size of the time
+    range. Closing the iterator stops the readers.
+
+    Parameters
+    ----------
+    plan : QueryPlan
+        The resolved offset ranges.
+    reader : Callable[[PartitionRange], Generator[Any, None, None]]
+        Creates the iterator over the items of a single partition.
+    max_workers : int, optional
+        Maximum number of partitions read concurrently.
+    queue_size : int
+        Maximum number of items waiting to be consumed.
+
+    Yields
+    ------
+    Any
+        The items in arrival order.
+    """
+    ranges = [x for x in plan.partitions if x.num_messages]
+    if not ranges:
+        return
+
+    items: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    done = object()
+
+    def read(prange: PartitionRange) -> None:
+        try:
+            with contextlib.closing(reader(prange)) as it:
+                for item in it:
+                    if not _put_record(items, stop, item):
+                        return
+        except Exception as e:
+            _put_record(items, stop, e)
+        finally:
+            _put_record(items, stop, done)
+
+    workers = min(len(ranges), max_workers or QUERY_MAX_WORKERS)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        for prange in ranges:
+            executor.submit(read, prange)
+        remaining = len(ranges)
+        while remaining:
+            item = items.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _merge_partitions(
+    conf: dict[str, Any],
+    plans: list[QueryPlan],
+    batch_size: int,
+    buffer_size: int,
+    record_filter: RecordFilter | None = None,
+) -> Generator[Message, None, None]:
+    """Read the planned partitions of several topics in timestamp order.
+
+    A single consumer reads all partitions. Messages wait in a buffer per
+    partition and the head of every buffer sits on a heap, so the next
+    message is only handed out once each unfinished partition has one
+    buffered. A partition is paused while its buffer is full, which bounds
+    memory use independently of the size of the time range. The output is
+    in global timestamp order as long as timestamps increase within each
+    partition.
+
+    Parameters
+    ----------
+    conf : dict[str, Any]
+        The consumer configuration.
+    plans : list[QueryPlan]
+        The resolved offset ranges of each topic.
+    batch_size : int
+        Maximum number of messages fetched per call.
+    buffer_size : int
+        Maximum number of messages buffered per partition.
+    record_filter : RecordFilter, optional
+        Key and header conditions checked on the raw messages.
+
+    Yields
+    ------
+    Message
+        The accepted messages within the time range.
+    """
+    ranges = {
+        (x.topic, x.partition): x
+        for plan in plans
+        for x in plan.partitions
+        if x.num_messages
+    }
+    if not ranges:
+        return
+    start_ms = plans[0].start_ms
+    end_ms = plans[0].end_ms
+
+    consumer = Consumer(conf)
+    consumer.assign(
+        [TopicPartition(x.topic, x.partition, x.start_offset) for x in ranges.values()]
+    )
+
+    buffers: dict[tuple[str, int], collections.deque] = {
+        tp: collections.deque() for tp in ranges
+    }
+    # Partitions that can still deliver messages within their range.
+    pending = set(ranges)
+    paused: set[tuple[str, int]] = set()
+    heap: list[tuple[int, str, int, int]] = []
+    num_starved = len(pending)
+    now = time.monotonic()
+    idle_since = {tp: now for tp in ranges}
+
+    def finish(tp: tuple[str, int]) -> None:
+        nonlocal num_starved
+        pending.discard(tp)
+        if not buffers[tp]:
+            num_starved -= 1
+        if tp not in paused:
+            consumer.pause([TopicPartition(*tp)])
+            paused.add(tp)
+
+    try:
+        while True:
+            if num_starved:
+                msgs = consumer.consume(batch_size, 1.0)
+                if not msgs:
+                    for tp in [x for x in pending if not buffers[x]]:
+                        if _range_exhausted(
+                            consumer, *tp, ranges[tp].end_offset, idle_since[tp]
+                        ):
+                            finish(tp)
+                    continue
+                for msg in msgs:
+                    if msg.error():
+                        raise RuntimeError(msg.error())
+                    topic = msg.topic()
+                    partition = msg.partition()
+                    offset = msg.offset()
+                    assert topic is not None and partition is not None
+                    assert offset is not None
+                    tp = (topic, partition)
+                    if tp not in pending:
+                        continue
+                    idle_since[tp] = time.monotonic()
+                    end_offset = ranges[tp].end_offset
+                    if offset >= end_offset:
+                        finish(tp)
+                        continue
+                    _, ts = msg.timestamp()
+                    if start_ms <= ts <= end_ms and (
+                        record_filter is None or record_filter.accepts(msg)
+                    ):
+                        buffer = buffers[tp]
+                        if not buffer:
+                            entry: tuple[int, str, int, int] = (
+                                ts,
+                                topic,
+                                partition,
+                                offset,
+                            )
+                            heapq.heappush(heap, entry)
+                            num_starved -= 1
+                        buffer.append(msg)
+                        if len(buffer) >= buffer_size and tp not in paused:
+                            consumer.pause([TopicPartition(*tp)])
+                            paused.add(tp)
+                    if offset + 1 >= end_offset:
+                        finish(tp)
+                continue
+
+            if not heap:
+                break
+            _, topic, partition, _ = heapq.heappop(heap)
+            tp = (topic, partition)
+            buffer = buffers[tp]
+            msg = buffer.popleft()
+            if buffer:
+                head = buffer[0]
+                heapq.heappush(
+                    heap, (head.timestamp()[1], topic, partition, head.offset())
+                )
+            elif tp in pending:
+                num_starved += 1
+            if tp in paused and tp in pending and len(buffer) <= buffer_size // 2:
+                consumer.resume([TopicPartition(*tp)])
+                paused.discard(tp)
+            yield msg
+    finally:
+        consumer.close()
+
+
+def plan_topic_time_range(
+    ctxobj: ScriptContext, topic: str, start_str: str, end_str: str
+) -> QueryPlan:
+    """Plan a time range query without reading any messages.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    topic : str
+        Topic name.
+    start_str : str
+        Start time (YYYY-MM-DD-HH:MM).
+    end_str : str
+        End time (YYYY-MM-DD-HH:MM).
+
+    Returns
+    -------
+    QueryPlan
+        The offset ranges and watermarks of every partition.
+    """
+    conf = _create_consumer_config(ctxobj)
+    return _plan_time_range(
+        conf, topic, _parse_query_time(start_str), _parse_query_time(end_str)
+    )
+
+
+def iter_topic_time_range(
+    ctxobj: ScriptContext,
+    topic: str,
+    start_str: str,
+    end_str: str,
+    max_messages: int | None = None,
+    max_workers: int | None = None,
+    queue_size: int = QUERY_QUEUE_SIZE,
+    fetch: FetchOpts | None = None,
+    value_decoder: ValueDecoder = decode_utf8,
+    record_filter: RecordFilter | None = None,
+) -> Generator[Dict, None, None]:
+    """Stream the messages of a topic within a time range.
+
+    Records are yielded as soon as they are read, in offset order within a
+    partition but not in timestamp order across partitions. Memory use is
+    bounded by ``queue_size`` no matter how many messages are in the range.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    topic : str
+        Topic name.
+    start_str : str
+        Start time (YYYY-MM-DD-HH:MM).
+    end_str : str
+        End time (YYYY-MM-DD-HH:MM).
+    max_messages : int, optional
+        Stop after this many messages. No limit by default.
+    max_workers : int, optional
+        Maximum number of partitions read concurrently. Defaults to
+        ``QUERY_MAX_WORKERS``.
+    queue_size : int
+        Maximum number of records waiting to be consumed.
+    fetch : FetchOpts, optional
+        Batch and fetch sizing for bulk reads.
+    value_decoder : ValueDecoder
+        The decoder for message values. Defaults to UTF-8 text.
+    record_filter : RecordFilter, optional
+        Selection and projection of the records. ``max_messages`` counts
+        matching records only.
+
+    Yields
+    ------
+    dict
+        The message records.
+    """
+    if fetch is None:
+        fetch = FetchOpts()
+    conf = _create_consumer_config(ctxobj, fetch)
+    plan = _plan_time_range(
+        conf, topic, _parse_query_time(start_str), _parse_query_time(end_str)
+    )
+    with contextlib.closing(
+        _stream_partitions(
+            plan,
+            lambda prange: _iter_partition(
+                conf,
+                prange,
+                plan.start_ms,
+                plan.end_ms,
+                fetch.batch_size,
+                value_decoder,
+                record_filter,
+            ),
+            max_workers,
+            queue_size,
+        )
+    ) as records:
+        yield from itertools.islice(records, max_messages)
+
+
+def iter_topic_messages(
+    ctxobj: ScriptContext,
+    topic: str,
+    start_str: str,
+    end_str: str,
+    max_messages: int | None = None,
+    max_workers: int | None = None,
+    queue_size: int = QUERY_QUEUE_SIZE,
+    fetch: FetchOpts | None = None,
+    record_filter: RecordFilter | None = None,
+) -> Generator[Message, None, None]:
+    """Stream the raw messages of a topic within a time range.
+
+    Works like `iter_topic_time_range` but hands out the messages without
+    decoding keys, values or timestamps.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    topic : str
+        Topic name.
+    start_str : str
+        Start time (YYYY-MM-DD-HH:MM).
+    end_str : str
+        End time (YYYY-MM-DD-HH:MM).
+    max_messages : int, optional
+        Stop after this many messages. No limit by default.
+    max_workers : int, optional
+        Maximum number of partitions read concurrently. Defaults to
+        ``QUERY_MAX_WORKERS``.
+    queue_size : int
+        Maximum number of messages waiting to be consumed.
+    fetch : FetchOpts, optional
+        Batch and fetch sizing for bulk reads.
+    record_filter : RecordFilter, optional
+        Key and header conditions for the messages. Value conditions and
+        projections are not applied.
+
+    Yields
+    ------
+    Message
+        The messages.
+    """
+    if fetch is None:
+        fetch = FetchOpts()
+    conf = _create_consumer_config(ctxobj, fetch)
+    plan = _plan_time_range(
+        conf, topic, _parse_query_time(start_str), _parse_query_time(end_str)
+    )
+    with contextlib.closing(
+        _stream_partitions(
+            plan,
+            lambda prange: _iter_partition_messages(
+                conf,
+                prange,
+                plan.start_ms,
+                plan.end_ms,
+                fetch.batch_size,
+                record_filter,
+            ),
+            max_workers,
+            queue_size,
+        )
+    ) as msgs:
+        yield from itertools.islice(msgs, max_messages)
+
+
 def query_topic_time_range(
     ctxobj: ScriptContext,
     topic: str,
     start_str: str,
     end_str: str,
-    max_messages: int = 1000,
+    max_messages: int = QUERY_MAX_MESSAGES,
+    max_workers: int | None = None,
+    fetch: FetchOpts | None = None,
+    value_decoder: ValueDecoder = decode_utf8,
+    record_filter: RecordFilter | None = None,
 ) -> List[Dict]:
     """Query a Kafka topic for messages within a time range.
 
+    The time range is first resolved to an offset range for every partition.
+    Each partition is then read by its own consumer in a thread pool and
+    stops at the last offset of its range. The results are merged in
+    timestamp order.
+
     Parameters
     ----------
     ctxobj : ScriptContext
@@ -176,65 +1194,1415 @@ def query_topic_time_range(
         End time (YYYY-MM-DD-HH:MM).
     max_messages : int
         Safety limit.
+    max_workers : int, optional
+        Maximum number of partitions read concurrently. Defaults to
+        ``QUERY_MAX_WORKERS``.
+    fetch : FetchOpts, optional
+        Batch and fetch sizing for bulk reads.
+    value_decoder : ValueDecoder
+        The decoder for message values. Defaults to UTF-8 text.
+    record_filter : RecordFilter, optional
+        Selection and projection of the records. ``max_messages`` counts
+        matching records only.
 
     Returns
     -------
     list[dict]
     """
+    if fetch is None:
+        fetch = FetchOpts()
+    conf = _create_consumer_config(ctxobj, fetch)
+    plan = _plan_time_range(
+        conf, topic, _parse_query_time(start_str), _parse_query_time(end_str)
+    )
+
+    ranges = [x for x in plan.partitions if x.num_messages]
+    if not ranges:
+        return []
+
+    workers = min(len(ranges), max_workers or QUERY_MAX_WORKERS)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _read_partition,
+                conf,
+                x,
+                plan.start_ms,
+                plan.end_ms,
+                max_messages,
+                fetch.batch_size,
+                value_decoder,
+                record_filter,
+            )
+            for x in ranges
+        ]
+        per_partition = [f.result() for f in futures]
 
-    start_dt = datetime.strptime(start_str, "%Y-%m-%d-%H:%M").replace(
-        tzinfo=timezone.utc
+    merged = sorted(
+        itertools.chain.from_iterable(per_partition),
+        key=lambda x: (x["timestamp"], x["partition"], x["offset"]),
     )
-    end_dt = datetime.strptime(end_str, "%Y-%m-%d-%H:%M").replace(tzinfo=timezone.utc)
+    return merged[:max_messages]
 
-    start_ms = int(start_dt.timestamp() * 1000)
-    end_ms = int(end_dt.timestamp() * 1000)
 
-    props = create_config(ctxobj["site"])
-    conf = {
-        "group.id": "kafka-tools-time-query",
-        "enable.auto.commit": False,
-        "auto.offset.reset": "earliest",
-    }
-    for key, prop in props.items():
-        conf[str(key)] = str(prop.data)
+def plan_topics_time_range(
+    ctxobj: ScriptContext, regex: str, start_str: str, end_str: str
+) -> list[QueryPlan]:
+    """Plan a time range query over all topics matching a regex.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    regex : str
+        Regular expression searched for in the topic names.
+    start_str : str
+        Start time (YYYY-MM-DD-HH:MM).
+    end_str : str
+        End time (YYYY-MM-DD-HH:MM).
+
+    Returns
+    -------
+    list[QueryPlan]
+        The offset ranges and watermarks of every partition of each
+        matching topic.
+    """
+    conf = _create_consumer_config(ctxobj)
+    return _plan_topics_time_range(
+        conf, regex, _parse_query_time(start_str), _parse_query_time(end_str)
+    )
+
+
+def iter_topics_messages(
+    ctxobj: ScriptContext,
+    regex: str,
+    start_str: str,
+    end_str: str,
+    max_messages: int | None = None,
+    buffer_size: int = QUERY_MERGE_BUFFER_SIZE,
+    fetch: FetchOpts | None = None,
+    record_filter: RecordFilter | None = None,
+) -> Generator[Message, None, None]:
+    """Stream the raw messages of all topics matching a regex in time order.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    regex : str
+        Regular expression searched for in the topic names.
+    start_str : str
+        Start time (YYYY-MM-DD-HH:MM).
+    end_str : str
+        End time (YYYY-MM-DD-HH:MM).
+    max_messages : int, optional
+        Stop after this many messages. No limit by default.
+    buffer_size : int
+        Maximum number of messages buffered per partition.
+    fetch : FetchOpts, optional
+        Batch and fetch sizing for bulk reads.
+    record_filter : RecordFilter, optional
+        Key and header conditions for the messages. Value conditions and
+        projections are not applied.
+
+    Yields
+    ------
+    Message
+        The messages merged across topics and partitions by timestamp.
+    """
+    if fetch is None:
+        fetch = FetchOpts()
+    conf = _create_consumer_config(ctxobj, fetch)
+    plans = _plan_topics_time_range(
+        conf, regex, _parse_query_time(start_str), _parse_query_time(end_str)
+    )
+    with contextlib.closing(
+        _merge_partitions(conf, plans, fetch.batch_size, buffer_size, record_filter)
+    ) as msgs:
+        yield from itertools.islice(msgs, max_messages)
+
+
+def iter_topics_time_range(
+    ctxobj: ScriptContext,
+    regex: str,
+    start_str: str,
+    end_str: str,
+    max_messages: int | None = None,
+    buffer_size: int = QUERY_MERGE_BUFFER_SIZE,
+    fetch: FetchOpts | None = None,
+    value_decoder: ValueDecoder = decode_utf8,
+    record_filter: RecordFilter | None = None,
+) -> Generator[Dict, None, None]:
+    """Stream the records of all topics matching a regex in time order.
+
+    Every matching topic and partition is read at once and the records are
+    merged on their timestamps, see `iter_topic_time_range` for the record
+    layout. Each record also carries its ``topic``.
 
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    regex : str
+        Regular expression searched for in the topic names.
+    start_str : str
+        Start time (YYYY-MM-DD-HH:MM).
+    end_str : str
+        End time (YYYY-MM-DD-HH:MM).
+    max_messages : int, optional
+        Stop after this many records. No limit by default.
+    buffer_size : int
+        Maximum number of messages buffered per partition.
+    fetch : FetchOpts, optional
+        Batch and fetch sizing for bulk reads.
+    value_decoder : ValueDecoder
+        The decoder for message values. Defaults to UTF-8 text.
+    record_filter : RecordFilter, optional
+        Selection and projection of the records. ``max_messages`` counts
+        matching records only.
+
+    Yields
+    ------
+    dict
+        The records merged across topics and partitions by timestamp.
+    """
+    if fetch is None:
+        fetch = FetchOpts()
+    conf = _create_consumer_config(ctxobj, fetch)
+    plans = _plan_topics_time_range(
+        conf, regex, _parse_query_time(start_str), _parse_query_time(end_str)
+    )
+    with contextlib.closing(
+        _merge_partitions(conf, plans, fetch.batch_size, buffer_size, record_filter)
+    ) as msgs:
+        records = (
+            {"topic": msg.topic(), **record}
+            for msg in msgs
+            if (record := _make_record(msg, value_decoder, record_filter)) is not None
+        )
+        yield from itertools.islice(records, max_messages)
+
+
+def _num_buckets(start_ms: int, end_ms: int, bucket_ms: int) -> int:
+    """Return the number of buckets covering an inclusive time range."""
+    return -(-(end_ms + 1 - start_ms) // bucket_ms)
+
+
+def _histogram_by_offsets(
+    conf: dict[str, Any], topic: str, start_ms: int, end_ms: int, bucket_ms: int
+) -> list[PartitionHistogram]:
+    """Count the messages per bucket from the offsets at the bucket edges.
+
+    The offsets of all partitions at all bucket edges are looked up with a
+    single request, no message is read. The counts are offset differences,
+    so they include gaps such as transaction markers and are attributed by
+    offset order rather than by message timestamp.
+
+    Parameters
+    ----------
+    conf : dict[str, Any]
+        The consumer configuration.
+    topic : str
+        Topic name.
+    start_ms : int
+        The start of the time range in milliseconds.
+    end_ms : int
+        The end of the time range in milliseconds (inclusive).
+    bucket_ms : int
+        The bucket width in milliseconds.
+
+    Returns
+    -------
+    list[PartitionHistogram]
+        The message counts of every partition.
+    """
+    num_buckets = _num_buckets(start_ms, end_ms, bucket_ms)
+    edges = [start_ms + i * bucket_ms for i in range(num_buckets)] + [end_ms + 1]
     consumer = Consumer(conf)
+    try:
+        md = consumer.list_topics(topic, timeout=10)
+        partitions = sorted(md.topics[topic].partitions)
+        offsets = iter(
+            consumer.offsets_for_times(
+                [TopicPartition(topic, p, edge) for p in partitions for edge in edges],
+                timeout=10,
+            )
+        )
+        histograms = []
+        for p in partitions:
+            _, high = consumer.get_watermark_offsets(
+                TopicPartition(topic, p), timeout=10
+            )
+            # A negative offset means no message at or after the edge.
+            row = [
+                x.offset if x.offset >= 0 else high
+                for x in itertools.islice(offsets, len(edges))
+            ]
+            histograms.append(
+                PartitionHistogram(
+                    topic=topic,
+                    partition=p,
+                    start_ms=start_ms,
+                    bucket_ms=bucket_ms,
+                    counts=array("q", (b - a for a, b in zip(row, row[1:]))),
+                )
+            )
+    finally:
+        consumer.close()
 
-    md = consumer.list_topics(topic, timeout=10)
-    partitions = [
-        TopicPartition(topic, p.id, start_ms)
-        for p in md.topics[topic].partitions.values()
-    ]
+    return histograms
+
+
+def _histogram_partition(
+    conf: dict[str, Any],
+    prange: PartitionRange,
+    start_ms: int,
+    end_ms: int,
+    bucket_ms: int,
+    batch_size: int,
+) -> PartitionHistogram:
+    """Accumulate the message counts and sizes per bucket of a partition.
+
+    Parameters
+    ----------
+    conf : dict[str, Any]
+        The consumer configuration.
+    prange : PartitionRange
+        The offset range to read.
+    start_ms : int
+        The start of the time range in milliseconds.
+    end_ms : int
+        The end of the time range in milliseconds (inclusive).
+    bucket_ms : int
+        The bucket width in milliseconds.
+    batch_size : int
+        Maximum number of messages fetched per call.
+
+    Returns
+    -------
+    PartitionHistogram
+        The counts, total bytes and value size range of each bucket.
+    """
+    num_buckets = _num_buckets(start_ms, end_ms, bucket_ms)
+    counts = array("q", [0]) * num_buckets
+    total_bytes = array("q", [0]) * num_buckets
+    min_bytes = array("q", [-1]) * num_buckets
+    max_bytes = array("q", [-1]) * num_buckets
+
+    if prange.num_messages:
+        with contextlib.closing(
+            _iter_partition_messages(conf, prange, start_ms, end_ms, batch_size)
+        ) as msgs:
+            for msg in msgs:
+                _, ts = msg.timestamp()
+                i = (ts - start_ms) // bucket_ms
+                size = len(msg)
+                counts[i] += 1
+                total_bytes[i] += size
+                if min_bytes[i] < 0 or size < min_bytes[i]:
+                    min_bytes[i] = size
+                if size > max_bytes[i]:
+                    max_bytes[i] = size
 
-    offsets = consumer.offsets_for_times(partitions, timeout=10)
-    consumer.assign(offsets)
+    return PartitionHistogram(
+        topic=prange.topic,
+        partition=prange.partition,
+        start_ms=start_ms,
+        bucket_ms=bucket_ms,
+        counts=counts,
+        total_bytes=total_bytes,
+        min_bytes=min_bytes,
+        max_bytes=max_bytes,
+    )
+
+
+def topic_histogram(
+    ctxobj: ScriptContext,
+    topic: str,
+    start_str: str,
+    end_str: str,
+    bucket_seconds: int = HISTOGRAM_BUCKET_SECONDS,
+    counts_only: bool = False,
+    max_workers: int | None = None,
+    fetch: FetchOpts | None = None,
+) -> list[PartitionHistogram]:
+    """Compute per partition message statistics over fixed time buckets.
+
+    Every partition is read once in a thread pool and the statistics are
+    accumulated in arrays, no message is kept. With ``counts_only`` the
+    counts are derived from offsets alone, without reading any message.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    topic : str
+        Topic name.
+    start_str : str
+        Start time (YYYY-MM-DD-HH:MM).
+    end_str : str
+        End time (YYYY-MM-DD-HH:MM).
+    bucket_seconds : int
+        The bucket width in seconds.
+    counts_only : bool
+        Only count messages using the offsets at the bucket edges.
+    max_workers : int, optional
+        Maximum number of partitions read concurrently. Defaults to
+        ``QUERY_MAX_WORKERS``.
+    fetch : FetchOpts, optional
+        Batch and fetch sizing for bulk reads.
 
-    results: list[Dict] = []
+    Returns
+    -------
+    list[PartitionHistogram]
+        The statistics of every partition.
 
+    Raises
+    ------
+    ValueError
+        If the bucket width is not positive.
+    """
+    if bucket_seconds <= 0:
+        raise ValueError(f"Bucket width must be positive, got {bucket_seconds}.")
+    if fetch is None:
+        fetch = FetchOpts()
+    conf = _create_consumer_config(ctxobj, fetch)
+    start_ms = _parse_query_time(start_str)
+    end_ms = _parse_query_time(end_str)
+    bucket_ms = bucket_seconds * 1000
+
+    if counts_only:
+        return _histogram_by_offsets(conf, topic, start_ms, end_ms, bucket_ms)
+
+    plan = _plan_time_range(conf, topic, start_ms, end_ms)
+    workers = min(len(plan.partitions) or 1, max_workers or QUERY_MAX_WORKERS)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _histogram_partition,
+                conf,
+                x,
+                start_ms,
+                end_ms,
+                bucket_ms,
+                fetch.batch_size,
+            )
+            for x in plan.partitions
+        ]
+        return [f.result() for f in futures]
+
+
+def _allocate_samples(ranges: list[PartitionRange], num_samples: int) -> list[int]:
+    """Split a number of samples across partitions by their message counts.
+
+    Uses the largest remainder method and never gives a partition more
+    samples than it has messages.
+    """
+    total = sum(x.num_messages for x in ranges)
+    if total <= num_samples:
+        return [x.num_messages for x in ranges]
+    shares = [x.num_messages * num_samples / total for x in ranges]
+    counts = [int(x) for x in shares]
+    by_remainder = sorted(range(len(ranges)), key=lambda i: counts[i] - shares[i])
+    for i in by_remainder[: num_samples - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def _sample_partition(
+    conf: dict[str, Any],
+    prange: PartitionRange,
+    start_ms: int,
+    end_ms: int,
+    num_points: int,
+    sample_batch: int,
+    value_decoder: ValueDecoder,
+    record_filter: RecordFilter | None,
+) -> list[Dict]:
+    """Read a small batch at evenly spaced offsets of a partition.
+
+    Parameters
+    ----------
+    conf : dict[str, Any]
+        The consumer configuration.
+    prange : PartitionRange
+        The offset range to sample.
+    start_ms : int
+        The start of the time range in milliseconds.
+    end_ms : int
+        The end of the time range in milliseconds (inclusive).
+    num_points : int
+        Number of offsets to read from.
+    sample_batch : int
+        Number of consecutive messages read at each offset.
+    value_decoder : ValueDecoder
+        The decoder for message values.
+    record_filter : RecordFilter, optional
+        Selection and projection of the records.
+
+    Returns
+    -------
+    list[dict]
+        The sampled records.
+    """
+    step = prange.num_messages / num_points
+    offsets = [prange.start_offset + int(i * step) for i in range(num_points)]
+    records = []
+    consumer = Consumer(conf)
+    consumer.assign([TopicPartition(prange.topic, prange.partition, offsets[0])])
     try:
-        while len(results) < max_messages:
-            msg = consumer.poll(1.0)
-            if msg is None:
-                break
-            if msg.error():
-                raise RuntimeError(msg.error())
+        for i, offset in enumerate(offsets):
+            if i:
+                consumer.seek(TopicPartition(prange.topic, prange.partition, offset))
+            end = min(offset + sample_batch, prange.end_offset)
+            next_offset = offset
+            idle_since = time.monotonic()
+            while next_offset < end:
+                msgs = consumer.consume(end - next_offset, 1.0)
+                if not msgs:
+                    if _range_exhausted(
+                        consumer, prange.topic, prange.partition, end, idle_since
+                    ):
+                        break
+                    continue
+                idle_since = time.monotonic()
+                for msg in msgs:
+                    if msg.error():
+                        raise RuntimeError(msg.error())
+                    msg_offset = msg.offset()
+                    assert msg_offset is not None
+                    if msg_offset >= end:
+                        next_offset = end
+                        break
+                    next_offset = msg_offset + 1
+                    _, ts = msg.timestamp()
+                    if ts < start_ms or ts > end_ms:
+                        continue
+                    if record_filter is not None and not record_filter.accepts(msg):
+                        continue
+                    record = _make_record(msg, value_decoder, record_filter)
+                    if record is not None:
+                        records.append(record)
+    finally:
+        consumer.close()
+    return records
 
-            _, ts = msg.timestamp()
-            ts_human = datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime(
-                "%Y-%m-%dT%H:%M:%S"
+
+def _reservoir_sample(
+    msgs: Iterable[Message],
+    start_ms: int,
+    end_ms: int,
+    num_slices: int,
+    rng: random.Random,
+) -> list[Message]:
+    """Pick one random message from each equal time slice of a range.
+
+    Every slice keeps a reservoir of a single message, so memory use only
+    depends on the number of slices.
+    """
+    slice_ms = (end_ms + 1 - start_ms) / num_slices
+    chosen: list[Message | None] = [None] * num_slices
+    seen = array("q", [0]) * num_slices
+    for msg in msgs:
+        _, ts = msg.timestamp()
+        i = min(int((ts - start_ms) / slice_ms), num_slices - 1)
+        seen[i] += 1
+        if rng.random() * seen[i] < 1:
+            chosen[i] = msg
+    return [x for x in chosen if x is not None]
+
+
+def sample_topic_time_range(
+    ctxobj: ScriptContext,
+    topic: str,
+    start_str: str,
+    end_str: str,
+    num_samples: int,
+    method: str = "offsets",
+    sample_batch: int = 1,
+    max_workers: int | None = None,
+    fetch: FetchOpts | None = None,
+    value_decoder: ValueDecoder = decode_utf8,
+    record_filter: RecordFilter | None = None,
+    seed: int | None = None,
+) -> List[Dict]:
+    """Sample the messages of a topic within a time range.
+
+    The ``offsets`` method spreads the sample points across partitions by
+    their message counts and seeks to evenly spaced offsets in each
+    partition's resolved range, so only the sampled messages are fetched.
+    The ``reservoir`` method reads the whole range once and keeps one
+    random message per equal time slice, which samples uniformly in time.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    topic : str
+        Topic name.
+    start_str : str
+        Start time (YYYY-MM-DD-HH:MM).
+    end_str : str
+        End time (YYYY-MM-DD-HH:MM).
+    num_samples : int
+        Number of sample points (``offsets``) or time slices
+        (``reservoir``).
+    method : str
+        One of ``SAMPLE_METHODS``.
+    sample_batch : int
+        Number of consecutive messages read at each sample point by the
+        ``offsets`` method.
+    max_workers : int, optional
+        Maximum number of partitions read concurrently. Defaults to
+        ``QUERY_MAX_WORKERS``.
+    fetch : FetchOpts, optional
+        Batch and fetch sizing for bulk reads.
+    value_decoder : ValueDecoder
+        The decoder for message values. Defaults to UTF-8 text.
+    record_filter : RecordFilter, optional
+        Selection and projection of the records. The ``offsets`` method
+        drops sampled records that do not match, the ``reservoir`` method
+        only samples from matching records.
+    seed : int, optional
+        Seed for the ``reservoir`` method.
+
+    Returns
+    -------
+    list[dict]
+        The sampled records in timestamp order.
+
+    Raises
+    ------
+    ValueError
+        If the method is unknown or the number of samples is not positive.
+    """
+    if method not in SAMPLE_METHODS:
+        raise ValueError(f"Unknown sample method {method!r}.")
+    if num_samples <= 0:
+        raise ValueError(f"Number of samples must be positive, got {num_samples}.")
+    if fetch is None:
+        fetch = FetchOpts()
+    conf = _create_consumer_config(ctxobj, fetch)
+    plan = _plan_time_range(
+        conf, topic, _parse_query_time(start_str), _parse_query_time(end_str)
+    )
+    ranges = [x for x in plan.partitions if x.num_messages]
+    if not ranges:
+        return []
+
+    if method == "reservoir":
+        with contextlib.closing(
+            _stream_partitions(
+                plan,
+                lambda prange: _iter_partition_messages(
+                    conf,
+                    prange,
+                    plan.start_ms,
+                    plan.end_ms,
+                    fetch.batch_size,
+                    record_filter,
+                ),
+                max_workers,
+                QUERY_QUEUE_SIZE,
             )
-            if ts > end_ms:
-                break
+        ) as msgs:
+            candidates: Iterable[Message] = msgs
+            if record_filter is not None and record_filter.needs_value:
+                candidates = (
+                    x
+                    for x in msgs
+                    if _make_record(x, value_decoder, record_filter) is not None
+                )
+            chosen = _reservoir_sample(
+                candidates,
+                plan.start_ms,
+                plan.end_ms,
+                num_samples,
+                random.Random(seed),
+            )
+        records = [_make_record(x, value_decoder, record_filter) for x in chosen]
+        merged = [x for x in records if x is not None]
+    else:
+        points = _allocate_samples(ranges, num_samples)
+        workers = min(len(ranges), max_workers or QUERY_MAX_WORKERS)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _sample_partition,
+                    conf,
+                    x,
+                    plan.start_ms,
+                    plan.end_ms,
+                    n,
+                    sample_batch,
+                    value_decoder,
+                    record_filter,
+                )
+                for x, n in zip(ranges, points)
+                if n
+            ]
+            merged = list(itertools.chain.from_iterable(f.result() for f in futures))
+
+    merged.sort(key=lambda x: (x["timestamp"], x["partition"], x["offset"]))
+    return merged
+
+
+def tail_topics(
+    ctxobj: ScriptContext,
+    topic: str,
+    regex: bool = False,
+    lookback: int = 0,
+    max_messages: int | None = None,
+    idle_timeout: float | None = None,
+    refresh_interval: float = TAIL_REFRESH_INTERVAL,
+    fetch: FetchOpts | None = None,
+    value_decoder: ValueDecoder = decode_utf8,
+    record_filter: RecordFilter | None = None,
+) -> Generator[Dict | None, None, None]:
+    """Follow the new messages of a topic, or of all topics matching a regex.
+
+    Every partition starts at its high watermark, or ``lookback`` messages
+    before it. The metadata is refreshed periodically, partitions or
+    matching topics created in the meantime are read from their beginning.
+    Each record also carries its ``topic`` and ``delay_ms``, the time
+    between the message timestamp and its delivery here.
 
-            results.append(
-                {
-                    "timestamp_ms": ts_human,
-                    "key": msg.key().decode("utf-8") if msg.key() else None,
-                    "value": msg.value().decode("utf-8") if msg.value() else None,
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    topic : str
+        Topic name, or a regular expression if ``regex`` is set.
+    regex : bool
+        Follow all topics whose name matches ``topic``.
+    lookback : int
+        Number of messages to show per partition before the new ones.
+    max_messages : int, optional
+        Stop after this many records. No limit by default.
+    idle_timeout : float, optional
+        Stop after this many seconds without a message. No limit by
+        default.
+    refresh_interval : float
+        Seconds between metadata refreshes.
+    fetch : FetchOpts, optional
+        Batch and fetch sizing.
+    value_decoder : ValueDecoder
+        The decoder for message values. Defaults to UTF-8 text.
+    record_filter : RecordFilter, optional
+        Selection and projection of the records.
+
+    Yields
+    ------
+    dict or None
+        The records as they arrive. None is yielded whenever a poll
+        returns no message, so callers can flush their output.
+    """
+    if fetch is None:
+        fetch = FetchOpts()
+    conf = _create_consumer_config(ctxobj, fetch)
+    pattern = compile_regex(topic) if regex else None
+    consumer = Consumer(conf)
+    assigned: set[tuple[str, int]] = set()
+
+    def refresh(from_beginning: bool) -> None:
+        md = consumer.list_topics(None if regex else topic, timeout=10)
+        if pattern is not None:
+            names = sorted(x for x in md.topics if pattern.search(x) is not None)
+        else:
+            names = [topic] if topic in md.topics else []
+        new_tps = [
+            (name, p)
+            for name in names
+            for p in sorted(md.topics[name].partitions)
+            if (name, p) not in assigned
+        ]
+        if not new_tps:
+            return
+        tps = []
+        for name, p in new_tps:
+            if from_beginning:
+                tps.append(TopicPartition(name, p, OFFSET_BEGINNING))
+            else:
+                low, high = consumer.get_watermark_offsets(
+                    TopicPartition(name, p), timeout=10
+                )
+                tps.append(TopicPartition(name, p, max(low, high - lookback)))
+        consumer.incremental_assign(tps)
+        assigned.update(new_tps)
+
+    count = 0
+    try:
+        refresh(False)
+        last_refresh = last_message = time.monotonic()
+        while max_messages is None or count < max_messages:
+            now = time.monotonic()
+            if now - last_refresh >= refresh_interval:
+                refresh(True)
+                last_refresh = now
+            msgs = consumer.consume(fetch.batch_size, TAIL_POLL_TIMEOUT)
+            if not msgs:
+                if idle_timeout is not None and now - last_message >= idle_timeout:
+                    return
+                yield None
+                continue
+            last_message = time.monotonic()
+            received_ms = int(time.time() * 1000)
+            for msg in msgs:
+                if msg.error():
+                    raise RuntimeError(msg.error())
+                if record_filter is not None and not record_filter.accepts(msg):
+                    continue
+                record = _make_record(msg, value_decoder, record_filter)
+                if record is None:
+                    continue
+                yield {
+                    "topic": msg.topic(),
+                    **record,
+                    "delay_ms": received_ms - record["timestamp"],
                 }
-            )
+                count += 1
+                if max_messages is not None and count >= max_messages:
+                    return
     finally:
         consumer.close()
 
-    return results
+
+def topic_rates(
+    ctxobj: ScriptContext,
+    opts: ListTopicsOpts,
+    windows: list[int],
+    timeout: float = 30.0,
+) -> list[PartitionRate]:
+    """Estimate the message rates of topics from their offsets alone.
+
+    The earliest and latest offsets, and the offsets at the start of every
+    trailing window, are listed for all selected partitions at once. The
+    requests for the different offset specs are in flight together and no
+    message is read. The counts are offset differences, so they include
+    gaps such as transaction markers.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    opts : ListTopicsOpts
+        Topic selection, see `filter_topics`. All topics are selected if no
+        option is set.
+    windows : list[int]
+        The lengths in seconds of the trailing windows.
+    timeout : float
+        Request timeout in seconds.
+
+    Returns
+    -------
+    list[PartitionRate]
+        The offsets and window counts of every selected partition.
+    """
+    client = generate_admin_client(ctxobj["site"])
+    md = client.list_topics()
+    topics = select_names(md.topics, opts, default_all=True)
+    tps = [
+        TopicPartition(topic, p)
+        for topic in topics
+        for p in sorted(md.topics[topic].partitions)
+    ]
+    if not tps:
+        return []
+
+    now_ms = int(time.time() * 1000)
+    specs: dict[Any, OffsetSpec] = {
+        "earliest": OffsetSpec.earliest(),
+        "latest": OffsetSpec.latest(),
+    }
+    for window in windows:
+        specs[window] = OffsetSpec.for_timestamp(now_ms - window * 1000)
+    futures = {
+        name: client.list_offsets({tp: spec for tp in tps}, request_timeout=timeout)
+        for name, spec in specs.items()
+    }
+    offsets = {
+        name: {(tp.topic, tp.partition): f.result().offset for tp, f in fs.items()}
+        for name, fs in futures.items()
+    }
+
+    rates = []
+    for tp in tps:
+        key = (tp.topic, tp.partition)
+        latest = offsets["latest"][key]
+        window_counts = {}
+        for window in windows:
+            # A negative offset means no message since the window start.
+            start = offsets[window][key]
+            window_counts[window] = max(0, latest - start) if start >= 0 else 0
+        rates.append(
+            PartitionRate(
+                topic=tp.topic,
+                partition=tp.partition,
+                earliest_offset=offsets["earliest"][key],
+                latest_offset=latest,
+                window_counts=window_counts,
+            )
+        )
+    return rates
+
+
+def _committed_groups_by_topic(client: AdminClient) -> dict[str, list[str]]:
+    """Map every topic to the consumer groups with committed offsets on it.
+
+    The offsets of all consumer groups are requested before any of them is
+    awaited.
+    """
+    groups_task = client.list_consumer_groups()
+    group_ids = sorted(x.group_id for x in groups_task.result().valid)
+    futures = {}
+    for gid in group_ids:
+        fut_map = client.list_consumer_group_offsets(
+            [_ConsumerGroupTopicPartitions(gid)]
+        )
+        futures[gid] = fut_map[gid]
+
+    readers: dict[str, list[str]] = {}
+    for gid, fut in futures.items():
+        topics = {
+            tp.topic
+            for tp in fut.result().topic_partitions
+            if tp.offset is not None and tp.offset >= 0
+        }
+        for topic in topics:
+            readers.setdefault(topic, []).append(gid)
+    return readers
+
+
+def find_idle_topics(
+    ctxobj: ScriptContext,
+    older_than: int,
+    opts: ListTopicsOpts | None = None,
+    timeout: float = 30.0,
+) -> list[IdleTopic]:
+    """Find the topics without any message newer than a threshold.
+
+    The offsets at the threshold time and the earliest and latest offsets
+    of all selected partitions are listed with one request per offset spec.
+    A partition is idle if no message has a timestamp at or after the
+    threshold, and holds the messages between its earliest and latest
+    offsets. The committed offsets of all consumer groups show which
+    idle topics are still read. Internal topics are skipped.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    older_than : int
+        The threshold age in seconds.
+    opts : ListTopicsOpts, optional
+        Topic selection, see `filter_topics`. All topics by default.
+    timeout : float
+        Request timeout in seconds.
+
+    Returns
+    -------
+    list[IdleTopic]
+        The idle topics sorted by name.
+    """
+    client = generate_admin_client(ctxobj["site"])
+    md = client.list_topics()
+    topics = [
+        x
+        for x in select_names(md.topics, opts, default_all=True)
+        if not x.startswith("__")
+    ]
+    tps = [
+        TopicPartition(topic, p)
+        for topic in topics
+        for p in sorted(md.topics[topic].partitions)
+    ]
+    if not tps:
+        return []
+
+    threshold_ms = int(time.time() * 1000) - older_than * 1000
+    since_futures = client.list_offsets(
+        {tp: OffsetSpec.for_timestamp(threshold_ms) for tp in tps},
+        request_timeout=timeout,
+    )
+    earliest_futures = client.list_offsets(
+        {tp: OffsetSpec.earliest() for tp in tps}, request_timeout=timeout
+    )
+    latest_futures = client.list_offsets(
+        {tp: OffsetSpec.latest() for tp in tps}, request_timeout=timeout
+    )
+    readers = _committed_groups_by_topic(client)
+
+    active: set[str] = set()
+    num_messages: dict[str, int] = {}
+    for tp, fut in since_futures.items():
+        # A negative offset means no message at or after the threshold.
+        if fut.result().offset >= 0:
+            active.add(tp.topic)
+    for tp, fut in latest_futures.items():
+        # Retention moves the earliest offset, so the latest offset alone
+        # overcounts the messages still in the log.
+        earliest = earliest_futures[tp].result().offset
+        num_messages[tp.topic] = num_messages.get(tp.topic, 0) + max(
+            0, fut.result().offset - max(0, earliest)
+        )
+
+    return [
+        IdleTopic(
+            topic=topic,
+            num_partitions=len(md.topics[topic].partitions),
+            num_messages=num_messages.get(topic, 0),
+            consumer_groups=readers.get(topic, []),
+        )
+        for topic in topics
+        if topic not in active
+    ]
+
+
+def describe_topics(
+    ctxobj: ScriptContext,
+    opts: ListTopicsOpts | None = None,
+    timeout: float = 30.0,
+) -> list[PartitionDescription]:
+    """Describe the partitions of topics.
+
+    The leaders, replicas and in-sync replicas come from one metadata
+    fetch, and the earliest and latest offsets of all selected partitions
+    from one list offsets request per spec, both in flight together.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    opts : ListTopicsOpts, optional
+        Topic selection, see `filter_topics`. All topics by default.
+    timeout : float
+        Request timeout in seconds.
+
+    Returns
+    -------
+    list[PartitionDescription]
+        The description of every selected partition, ordered by topic and
+        partition.
+    """
+    client = generate_admin_client(ctxobj["site"])
+    md = client.list_topics()
+    pms = [
+        (topic, md.topics[topic].partitions[p])
+        for topic in select_names(md.topics, opts, default_all=True)
+        for p in sorted(md.topics[topic].partitions)
+    ]
+    if not pms:
+        return []
+
+    tps = [TopicPartition(topic, pm.id) for topic, pm in pms]
+    earliest_futures = client.list_offsets(
+        {tp: OffsetSpec.earliest() for tp in tps}, request_timeout=timeout
+    )
+    latest_futures = client.list_offsets(
+        {tp: OffsetSpec.latest() for tp in tps}, request_timeout=timeout
+    )
+    return [
+        PartitionDescription(
+            topic=topic,
+            partition=pm.id,
+            leader=pm.leader,
+            replicas=list(pm.replicas),
+            isrs=list(pm.isrs),
+            earliest_offset=earliest_futures[tp].result().offset,
+            latest_offset=latest_futures[tp].result().offset,
+        )
+        for (topic, pm), tp in zip(pms, tps)
+    ]
+
+
+def _create_producer_config(
+    site: str,
+    compression: str = COPY_COMPRESSION,
+    linger_ms: int = COPY_LINGER_MS,
+    max_buffer_kbytes: int = COPY_MAX_BUFFER_KBYTES,
+) -> dict[str, Any]:
+    """Create the configuration for a bulk copy producer.
+
+    The producer is idempotent, so retries neither duplicate nor reorder
+    messages, and batches messages for up to ``linger_ms``. The bytes
+    waiting for delivery are bounded by ``max_buffer_kbytes``.
+
+    Parameters
+    ----------
+    site : str
+        The name of the site to write to.
+    compression : str
+        The compression codec of the produced batches.
+    linger_ms : int
+        Maximum time in milliseconds to wait for a batch to fill.
+    max_buffer_kbytes : int
+        Maximum size in kilobytes of the messages waiting for delivery.
+
+    Returns
+    -------
+    dict[str, Any]
+        The producer configuration.
+    """
+    conf: dict[str, Any] = {
+        str(key): str(prop.data) for key, prop in create_config(site).items()
+    }
+    conf.update(
+        {
+            "enable.idempotence": True,
+            "compression.type": compression,
+            "linger.ms": linger_ms,
+            "batch.size": COPY_BATCH_BYTES,
+            "queue.buffering.max.kbytes": max_buffer_kbytes,
+        }
+    )
+    return conf
+
+
+def _copy_partition(
+    conf: dict[str, Any],
+    prange: PartitionRange,
+    start_ms: int,
+    end_ms: int,
+    batch_size: int,
+    producer: Producer,
+    topic: str,
+    partition: int | None,
+    on_delivery: Callable[[Any, Message], None],
+    stats: CopyStats,
+    lock: threading.Lock,
+) -> None:
+    """Produce the messages in the planned offset range of a partition.
+
+    Keys, values, headers and timestamps are passed on unchanged. Without
+    a partition, the producer partitions by key. When the producer queue is
+    full, delivery reports are served until there is room again.
+    """
+    kwargs: dict[str, Any] = {"on_delivery": on_delivery}
+    if partition is not None:
+        kwargs["partition"] = partition
+    with contextlib.closing(
+        _iter_partition_messages(conf, prange, start_ms, end_ms, batch_size)
+    ) as msgs:
+        for msg in msgs:
+            _, ts = msg.timestamp()
+            while True:
+                try:
+                    producer.produce(
+                        topic,
+                        value=msg.value(),
+                        key=msg.key(),
+                        timestamp=ts,
+                        headers=msg.headers(),
+                        **kwargs,
+                    )
+                    break
+                except BufferError:
+                    producer.poll(0.1)
+            with lock:
+                stats.read += 1
+            producer.poll(0)
+
+
+def copy_topic_time_range(
+    ctxobj: ScriptContext,
+    topic: str,
+    start_str: str,
+    end_str: str,
+    dest_site: str,
+    dest_topic: str | None = None,
+    keep_partitions: bool = True,
+    compression: str = COPY_COMPRESSION,
+    linger_ms: int = COPY_LINGER_MS,
+    max_buffer_kbytes: int = COPY_MAX_BUFFER_KBYTES,
+    max_workers: int | None = None,
+    fetch: FetchOpts | None = None,
+) -> CopyStats:
+    """Copy the messages of a time range into a topic on another site.
+
+    The time range is planned and read per partition as in
+    `query_topic_time_range`, without decoding. All partitions feed one
+    batching, compressing and idempotent producer. The destination topic
+    must already exist. Timestamps are kept unless the destination topic
+    uses log append time.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context, its site is the source.
+    topic : str
+        Source topic name.
+    start_str : str
+        Start time (YYYY-MM-DD-HH:MM).
+    end_str : str
+        End time (YYYY-MM-DD-HH:MM).
+    dest_site : str
+        The site to write to.
+    dest_topic : str, optional
+        Destination topic name. Defaults to the source topic name.
+    keep_partitions : bool
+        Write every message to the partition it was read from, if the
+        destination topic has it. Otherwise the producer partitions by key.
+    compression : str
+        The compression codec of the produced batches.
+    linger_ms : int
+        Maximum time in milliseconds to wait for a batch to fill.
+    max_buffer_kbytes : int
+        Maximum size in kilobytes of the messages waiting for delivery.
+    max_workers : int, optional
+        Maximum number of partitions read concurrently. Defaults to
+        ``QUERY_MAX_WORKERS``.
+    fetch : FetchOpts, optional
+        Batch and fetch sizing for bulk reads.
+
+    Returns
+    -------
+    CopyStats
+        The number of read, delivered and failed messages.
+
+    Raises
+    ------
+    ValueError
+        If the source and destination are the same topic.
+    RuntimeError
+        If the destination topic does not exist.
+    """
+    if dest_topic is None:
+        dest_topic = topic
+    if dest_site == ctxobj["site"] and dest_topic == topic:
+        raise ValueError(f"Cannot copy topic {topic} onto itself.")
+    if fetch is None:
+        fetch = FetchOpts()
+
+    producer = Producer(
+        _create_producer_config(dest_site, compression, linger_ms, max_buffer_kbytes)
+    )
+    dest_md = producer.list_topics(dest_topic, timeout=10)
+    dest_tm = dest_md.topics.get(dest_topic)
+    if dest_tm is None or dest_tm.error is not None or not dest_tm.partitions:
+        raise RuntimeError(f"Topic {dest_topic} does not exist on {dest_site}.")
+    num_dest_partitions = len(dest_tm.partitions)
+
+    conf = _create_consumer_config(ctxobj, fetch)
+    plan = _plan_time_range(
+        conf, topic, _parse_query_time(start_str), _parse_query_time(end_str)
+    )
+    ranges = [x for x in plan.partitions if x.num_messages]
+
+    stats = CopyStats()
+    lock = threading.Lock()
+
+    def on_delivery(err: Any, msg: Message) -> None:
+        with lock:
+            if err is not None:
+                stats.failed += 1
+                if stats.first_error is None:
+                    stats.first_error = str(err)
+            else:
+                stats.delivered += 1
+                stats.delivered_bytes += len(msg)
+
+    if ranges:
+        workers = min(len(ranges), max_workers or QUERY_MAX_WORKERS)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _copy_partition,
+                    conf,
+                    x,
+                    plan.start_ms,
+                    plan.end_ms,
+                    fetch.batch_size,
+                    producer,
+                    dest_topic,
+                    (
+                        x.partition
+                        if keep_partitions and x.partition < num_dest_partitions
+                        else None
+                    ),
+                    on_delivery,
+                    stats,
+                    lock,
+                )
+                for x in ranges
+            ]
+            for f in futures:
+                f.result()
+    producer.flush(COPY_FLUSH_TIMEOUT)
+    return stats
+
+
+def _parse_topic_spec(entry: Any, defaults: dict[str, Any]) -> TopicSpec:
+    """Turn a topic entry of a spec file into a topic spec."""
+    if isinstance(entry, str):
+        entry = {"name": entry}
+    if not isinstance(entry, dict) or not entry.get("name"):
+        raise ValueError(f"Invalid topic entry {entry!r}, a name is required.")
+    unknown = set(entry) - {"name", "partitions", "replication_factor", "config"}
+    if unknown:
+        raise ValueError(f"Unknown keys {sorted(unknown)} for topic {entry['name']}.")
+    partitions = entry.get("partitions", defaults.get("partitions", 1))
+    replication_factor = entry.get(
+        "replication_factor", defaults.get("replication_factor", -1)
+    )
+    if not isinstance(partitions, int) or partitions < 1:
+        raise ValueError(f"Invalid partitions {partitions!r} for {entry['name']}.")
+    if not isinstance(replication_factor, int) or replication_factor == 0:
+        raise ValueError(
+            f"Invalid replication factor {replication_factor!r} for {entry['name']}."
+        )
+    config = dict(defaults.get("config") or {})
+    config.update(entry.get("config") or {})
+    return TopicSpec(
+        name=str(entry["name"]),
+        partitions=partitions,
+        replication_factor=replication_factor,
+        config={str(k): str(v) for k, v in config.items()},
+    )
+
+
+def load_topic_specs(spec_file: pathlib.Path) -> list[TopicSpec]:
+    """Read the topics to create from a spec file.
+
+    The file holds a ``topics`` list and optional ``defaults``. A topic is
+    either a name or a mapping with ``name`` and optional ``partitions``,
+    ``replication_factor`` and ``config``, which fall back to the defaults.
+    JSON files are read directly, any other file as YAML.
+
+    Parameters
+    ----------
+    spec_file : pathlib.Path
+        The spec file.
+
+    Returns
+    -------
+    list[TopicSpec]
+        The topics in file order.
+
+    Raises
+    ------
+    ValueError
+        If the spec is invalid or names a topic twice.
+    RuntimeError
+        If a YAML file is given and PyYAML is not installed.
+    """
+    text = spec_file.expanduser().read_text()
+    if spec_file.suffix == ".json":
+        spec = json.loads(text)
+    else:
+        try:
+            import yaml
+        except ImportError as e:
+            raise RuntimeError(
+                "Reading YAML spec files requires PyYAML, install kafka_tools[yaml]."
+            ) from e
+        spec = yaml.safe_load(text)
+
+    if not isinstance(spec, dict) or not isinstance(spec.get("topics"), list):
+        raise ValueError(f"The spec file {spec_file} has no topics list.")
+    defaults = spec.get("defaults") or {}
+    specs = [_parse_topic_spec(x, defaults) for x in spec["topics"]]
+    counts = collections.Counter(x.name for x in specs)
+    duplicates = sorted(name for name, count in counts.items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Topics listed more than once: {', '.join(duplicates)}.")
+    return specs
+
+
+def split_existing_topics(
+    ctxobj: ScriptContext, specs: list[TopicSpec]
+) -> tuple[list[TopicSpec], list[str]]:
+    """Separate the topics to create from those that already exist.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    specs : list[TopicSpec]
+        The requested topics.
+
+    Returns
+    -------
+    tuple[list[TopicSpec], list[str]]
+        The specs of the missing topics and the names of the existing ones.
+    """
+    client = generate_admin_client(ctxobj["site"])
+    existing = client.list_topics().topics
+    missing = [x for x in specs if x.name not in existing]
+    return missing, [x.name for x in specs if x.name in existing]
+
+
+def create_topics(
+    ctxobj: ScriptContext,
+    specs: list[TopicSpec],
+    chunk_size: int = CREATE_CHUNK_SIZE,
+    max_in_flight: int = CREATE_MAX_IN_FLIGHT,
+    timeout: float = 60.0,
+) -> Generator[CreateChunkResult, None, None]:
+    """Create topics in chunks with a bounded number of requests in flight.
+
+    Every chunk is one ``create_topics`` request. When ``max_in_flight``
+    requests are pending, the oldest one is awaited before the next is
+    sent, so results arrive in chunk order.
+
+    Parameters
+    ----------
+    ctxobj : ScriptContext
+        CLI context.
+    specs : list[TopicSpec]
+        The topics to create, see `split_existing_topics`.
+    chunk_size : int
+        Maximum number of topics per request.
+    max_in_flight : int
+        Maximum number of pending requests.
+    timeout : float
+        Request and operation timeout in seconds.
+
+    Yields
+    ------
+    CreateChunkResult
+        The created and failed topics of every chunk.
+    """
+    client = generate_admin_client(ctxobj["site"])
+    chunks = []
+    for start in range(0, len(specs), chunk_size):
+        end = start + chunk_size
+        chunks.append(specs[start:end])
+    pending: collections.deque[tuple[int, dict[str, concurrent.futures.Future]]] = (
+        collections.deque()
+    )
+
+    def finish() -> CreateChunkResult:
+        index, futures = pending.popleft()
+        created = []
+        failed = {}
+        for name, future in futures.items():
+            try:
+                future.result()
+                created.append(name)
+            except Exception as e:
+                failed[name] = str(e)
+        return CreateChunkResult(index, len(chunks), created, failed)
+
+    for index, chunk in enumerate(chunks):
+        if len(pending) >= max_in_flight:
+            yield finish()
+        new_topics = [
+            NewTopic(
+                x.name,
+                num_partitions=x.partitions,
+                replication_factor=x.replication_factor,
+                config=x.config,
+            )
+            for x in chunk
+        ]
+        pending.append(
+            (
+                index,
+                client.create_topics(
+                    new_topics, operation_timeout=timeout, request_timeout=timeout
+                ),
+            )
+        )
+    while pending:
+        yield finish()
+    _topics_changed(ctxobj["site"])
@@ -22,16 +22,19 @@
 from __future__ import annotations
 
 import concurrent.futures
-from typing import Any, TypedDict
+from typing import Any, Callable, NotRequired, TypedDict
 
-__all__ = ["DoneAndNotDoneFutures", "ScriptContext", "ScriptOptions"]
+__all__ = ["DoneAndNotDoneFutures", "ScriptContext", "ScriptOptions", "ValueDecoder"]
 
 ScriptOptions = dict[str, Any]
 DoneAndNotDoneFutures = tuple[
     set[concurrent.futures.Future], set[concurrent.futures.Future]
 ]
+ValueDecoder = Callable[[bytes], Any]
 
 
 class ScriptContext(TypedDict):
     site: str
     timeout: int
+    refresh: NotRequired[bool]
+    metadata_ttl: NotRequired[float]
@@ -0,0 +1,129 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pathlib
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from click.testing import CliRunner
+from lsst.ts.kafka_tools.agent import Agent, agent_socket_path, request_agent
+from lsst.ts.kafka_tools.cli import main
+from lsst.ts.kafka_tools.consumers import consumer_group_lag
+from lsst.ts.kafka_tools.mocks.mock_admin_client import MockAdminClient
+from lsst.ts.kafka_tools.mocks.topic_responses import list_topics
+
+
+def wait_for(condition: object, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():  # type: ignore[operator]
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
+@patch("lsst.ts.kafka_tools.consumers.generate_admin_client", spec=True)
+@patch("lsst.ts.kafka_tools.agent.generate_admin_client", spec=True)
+def test_agent(
+    mock_agent_client: MagicMock,
+    mock_consumers_client: MagicMock,
+    mock_topics_client: MagicMock,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    client = MockAdminClient()
+    mock_agent_client.return_value = client
+    mock_consumers_client.return_value = client
+    runner = CliRunner()
+
+    # Without an agent the commands go to the site, with no connect attempt.
+    with patch("lsst.ts.kafka_tools.agent.socket.socket") as mock_socket:
+        assert request_agent("local", "ping") is None
+        mock_topics_client.return_value = client
+        result = runner.invoke(main, ["topics", "local", "list"])
+        assert result.exit_code == 0
+        assert result.stdout == list_topics
+        mock_socket.assert_not_called()
+    mock_topics_client.reset_mock(return_value=True)
+    result = runner.invoke(main, ["agent", "local", "status"])
+    assert result.exit_code == 1
+    assert result.stdout == "No agent running for local.\n"
+
+    agent = Agent("local")
+    thread = threading.Thread(target=agent.serve)
+    thread.start()
+    try:
+        wait_for(
+            lambda: (request_agent("local", "ping") or {}).get("lag_age") is not None
+        )
+        assert agent_socket_path("local").stat().st_mode & 0o777 == 0o600
+
+        result = runner.invoke(main, ["agent", "local", "start", "--foreground"])
+        assert result.exit_code == 1
+        assert "already running" in result.output
+
+        result = runner.invoke(main, ["agent", "local", "status"])
+        assert result.exit_code == 0
+        assert "Metadata age: " in result.stdout
+        assert "stale" not in result.stdout
+
+        # Answered from memory, the site is not asked.
+        mock_topics_client.side_effect = RuntimeError("no broker")
+        mock_consumers_client.reset_mock()
+        result = runner.invoke(main, ["topics", "--metadata-ttl", "0", "local", "list"])
+        assert result.exit_code == 1
+        result = runner.invoke(main, ["topics", "local", "list"])
+        assert result.exit_code == 0
+        assert result.stdout == list_topics
+        assert mock_topics_client.call_count == 1
+
+        expected = consumer_group_lag({"site": "local", "timeout": 1000}, "consumer1")
+        mock_consumers_client.reset_mock()
+        result = runner.invoke(main, ["consumers", "local", "lag", "consumer1"])
+        assert result.exit_code == 0
+        assert result.stdout.endswith("Total lag: 5\n")
+        assert request_agent("local", "lag", group="consumer1")["data"] == expected
+        result = runner.invoke(main, ["consumers", "local", "lag", "--telegraf"])
+        assert result.exit_code == 0
+        assert "Combined lag for 'telegraf-kafka-consumer*': 0" in result.stdout
+        assert mock_consumers_client.call_count == 0
+
+        # Unknown groups are left to the site.
+        assert request_agent("local", "lag", group="new-group") is None
+
+        # Changing topics makes the agent fetch the metadata again.
+        before = mock_agent_client.call_count
+        assert request_agent("local", "invalidate") is not None
+        wait_for(lambda: mock_agent_client.call_count > before)
+        wait_for(lambda: request_agent("local", "metadata") is not None)
+
+        result = runner.invoke(main, ["agent", "local", "stop"])
+        assert result.stdout == "Stopped the agent for local.\n"
+        thread.join(5)
+        assert not thread.is_alive()
+    finally:
+        agent.stop()
+        thread.join(5)
+    assert not agent_socket_path("local").exists()
+    result = runner.invoke(main, ["agent", "local", "stop"])
+    assert result.stdout == "No agent running for local.\n"
@@ -119,6 +119,24 @@ def test_list_consumers(mock_gen_admin_client: MagicMock) -> None:
     assert result.exit_code == 0
     assert result.stdout == mcr.list_regex_inclusive
 
+    # Group names match like topic names.
+    args = ["consumers", "--timeout", 1, "local", "list", "--regex-inclusive"]
+    result = runner.invoke(
+        main, args + ["--name-list", "consumer1,consumer2", "--name-mode", "exact"]
+    )
+    assert result.exit_code == 0
+    assert [x.split()[0] for x in result.stdout.splitlines()] == [
+        "consumer1",
+        "consumer2",
+    ]
+    result = runner.invoke(main, args + ["--name", "consumer1?", "--name-mode", "glob"])
+    assert result.exit_code == 0
+    assert sorted(x.split()[0] for x in result.stdout.splitlines()) == [
+        "consumer10",
+        "consumer11",
+        "consumer13",
+    ]
+
 
 @patch("lsst.ts.kafka_tools.consumers.generate_admin_client", spec=True)
 def test_delete_consumers(mock_gen_admin_client: MagicMock) -> None:
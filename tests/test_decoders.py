@@ -0,0 +1,130 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import base64
+import json
+import pathlib
+from unittest.mock import MagicMock, patch
+
+import pytest
+from click.testing import CliRunner
+from lsst.ts.kafka_tools.cli import main
+from lsst.ts.kafka_tools.decoders import AvroDecoder, SchemaRegistry, decode_utf8
+from lsst.ts.kafka_tools.mocks.mock_consumer import MockConsumer, create_topic_log
+from lsst.ts.kafka_tools.mocks.schema_registry import (
+    create_file_registry,
+    encode_avro,
+    heartbeat_schema,
+)
+
+pytest.importorskip("fastavro")
+
+# 2026-01-13T05:32:00 UTC
+WINDOW_START_TS = 1768282320000
+
+
+def test_decode_utf8() -> None:
+    assert decode_utf8(b"\xc3\xa9t\xc3\xa9") == "été"
+    assert decode_utf8(b"\xff\x00") == b"\xff\x00"
+
+
+def test_avro_decoder(tmp_path: pathlib.Path) -> None:
+    url = create_file_registry(tmp_path / "registry", {7: heartbeat_schema})
+    registry = SchemaRegistry(url, cache_dir=tmp_path / "cache")
+    decoder = AvroDecoder(registry)
+
+    for i in range(100):
+        record = {"private_sndStamp": 1.5, "private_seqNum": i, "heartbeat": True}
+        assert decoder(encode_avro(7, heartbeat_schema, record)) == record
+    assert registry.fetch_count == 1
+    assert (tmp_path / "cache" / "7.json").exists()
+
+    # A new process finds the schema in the on-disk cache.
+    (tmp_path / "registry" / "schemas" / "ids" / "7").unlink()
+    registry = SchemaRegistry(url, cache_dir=tmp_path / "cache")
+    record = {"private_sndStamp": 2.5, "private_seqNum": 1, "heartbeat": False}
+    assert AvroDecoder(registry)(encode_avro(7, heartbeat_schema, record)) == record
+    assert registry.fetch_count == 0
+
+    # Payloads that are not framed Avro are kept as raw bytes.
+    assert decoder(b"\x00\x00") == b"\x00\x00"
+    assert decoder(b"{}\x00\x00\x00\x00") == b"{}\x00\x00\x00\x00"
+    assert decoder(b"\x00\x00\x00\x00\x07\x01") == b"\x00\x00\x00\x00\x07\x01"
+
+
+@patch("lsst.ts.kafka_tools.topics.create_config")
+def test_query_avro(mock_create_config: MagicMock, tmp_path: pathlib.Path) -> None:
+    mock_create_config.return_value = {}
+    topic = "lsst.sal.ATAOS.logevent_heartbeat"
+    url = create_file_registry(tmp_path / "registry", {3: heartbeat_schema})
+    logs = {
+        topic: create_topic_log(
+            topic,
+            [
+                [
+                    (
+                        WINDOW_START_TS + i,
+                        encode_avro(
+                            3,
+                            heartbeat_schema,
+                            {
+                                "private_sndStamp": 1.0,
+                                "private_seqNum": i,
+                                "heartbeat": True,
+                            },
+                        ),
+                    )
+                    for i in range(3)
+                ]
+                # A payload from another producer and a tombstone.
+                + [(WINDOW_START_TS + 3, b"plain"), (WINDOW_START_TS + 4, None)]
+            ],
+        )
+    }
+
+    runner = CliRunner(env={"XDG_CACHE_HOME": str(tmp_path / "cache")})
+    with patch(
+        "lsst.ts.kafka_tools.topics.Consumer",
+        side_effect=lambda conf: MockConsumer(conf, logs),
+    ):
+        args = ["topics", "local", "query", "2026-01-13-05:32", "2026-01-13-05:33"]
+        result = runner.invoke(
+            main, args + [topic, "--value-format", "avro", "--schema-registry", url]
+        )
+        assert result.exit_code == 0
+        assert "'private_seqNum': 2" in result.stdout
+        assert "Returned 5 message(s)" in result.stdout
+
+        result = runner.invoke(
+            main,
+            args
+            + [topic, "--value-format", "avro", "--schema-registry", url, "--stream"],
+        )
+        assert result.exit_code == 0
+        lines = [x for x in result.stdout.splitlines() if x.startswith("{")]
+        records = [json.loads(x) for x in lines]
+        assert [r["value"] for r in records[3:]] == [
+            base64.b64encode(b"plain").decode(),
+            None,
+        ]
+
+        result = runner.invoke(main, args + [topic, "--value-format", "avro"])
+        assert result.exit_code == 2
@@ -0,0 +1,134 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pathlib
+from unittest.mock import MagicMock, patch
+
+import pytest
+from click.testing import CliRunner
+from lsst.ts.kafka_tools.cli import main
+from lsst.ts.kafka_tools.dump import DumpReader, DumpWriter
+from lsst.ts.kafka_tools.mocks.mock_consumer import MockConsumer, create_topic_log
+from lsst.ts.kafka_tools.mocks.mock_message import MockMessage
+
+# 2026-01-13T05:32:00 UTC
+WINDOW_START_TS = 1768282320000
+
+
+def test_dump_round_trip(tmp_path: pathlib.Path) -> None:
+    msgs = [
+        MockMessage(
+            1000,
+            b"\x00\x01\xffbinary",
+            key=b"key-1",
+            topic="lsst.sal.ATAOS.timestamp",
+            partition=2,
+            offset=17,
+            headers=[("source", b"summit"), ("empty", None)],
+        ),
+        MockMessage(1001, None, topic="lsst.sal.ATAOS.timestamp", offset=18),
+        MockMessage(1002, b"", key=b"", topic="other", offset=0),
+    ]
+    dump_file = tmp_path / "messages.ktdump"
+    with dump_file.open("wb") as ofile:
+        assert DumpWriter(ofile).write_all(msgs) == 3
+
+    with DumpReader(dump_file) as reader:
+        records = list(reader)
+        assert len(records) == 3
+        first = records[0]
+        assert first.topic == "lsst.sal.ATAOS.timestamp"
+        assert (first.partition, first.offset, first.timestamp) == (2, 17, 1000)
+        assert isinstance(first.value, memoryview)
+        assert bytes(first.value) == b"\x00\x01\xffbinary"
+        assert bytes(first.key) == b"key-1"
+        assert [(n, v if v is None else bytes(v)) for n, v in first.headers] == [
+            ("source", b"summit"),
+            ("empty", None),
+        ]
+        assert records[1].key is None and records[1].value is None
+        assert records[2].topic == "other"
+        assert bytes(records[2].key) == b"" and bytes(records[2].value) == b""
+
+        assert not reader.truncated
+
+    # An interrupted dump ends in a partial record.
+    data = dump_file.read_bytes()
+    torn_file = tmp_path / "torn.ktdump"
+    for cut in (3, 40):
+        torn_file.write_bytes(data[:-cut])
+        with DumpReader(torn_file) as reader:
+            assert [r.offset for r in reader] == [17, 18]
+            assert reader.truncated
+
+    # Header entries that overrun their record are corrupt.
+    torn_file.write_bytes(data[:42] + b"\x05\x00" + data[44:])
+    with DumpReader(torn_file) as reader:
+        with pytest.raises(ValueError, match="Corrupt record at offset 8"):
+            list(reader)
+
+    bad_file = tmp_path / "bad.ktdump"
+    bad_file.write_bytes(b"not a dump")
+    with pytest.raises(ValueError):
+        DumpReader(bad_file)
+
+
+@patch("lsst.ts.kafka_tools.topics.create_config")
+def test_query_dump(mock_create_config: MagicMock, tmp_path: pathlib.Path) -> None:
+    mock_create_config.return_value = {}
+    topic = "lsst.s3.raw.lsstcam"
+    logs = {
+        topic: create_topic_log(
+            topic,
+            [
+                [(WINDOW_START_TS + i, bytes([i, 0xFF])) for i in range(5)],
+                [(WINDOW_START_TS + 10 + i, bytes([i, 0xFE])) for i in range(5)],
+            ],
+        )
+    }
+    dump_file = tmp_path / "query.ktdump"
+
+    runner = CliRunner()
+    with patch(
+        "lsst.ts.kafka_tools.topics.Consumer",
+        side_effect=lambda conf: MockConsumer(conf, logs),
+    ):
+        result = runner.invoke(
+            main,
+            [
+                "topics",
+                "local",
+                "query",
+                "2026-01-13-05:32",
+                "2026-01-13-05:33",
+                topic,
+                "--dump",
+                str(dump_file),
+            ],
+        )
+    assert result.exit_code == 0
+    assert "Dumped 10 message(s)" in result.output
+
+    with DumpReader(dump_file) as reader:
+        records = sorted(reader, key=lambda x: (x.partition, x.offset))
+        assert [(x.partition, x.offset) for x in records][:2] == [(0, 0), (0, 1)]
+        assert bytes(records[-1].value) == b"\x04\xfe"
+        assert records[-1].timestamp == WINDOW_START_TS + 14
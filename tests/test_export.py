@@ -0,0 +1,256 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pathlib
+from unittest.mock import MagicMock, patch
+
+import pytest
+from click.testing import CliRunner
+from lsst.ts.kafka_tools.cli import main
+from lsst.ts.kafka_tools.export import export_records
+from lsst.ts.kafka_tools.mocks.mock_consumer import MockConsumer, create_topic_log
+from lsst.ts.kafka_tools.mocks.schema_registry import (
+    create_file_registry,
+    encode_avro,
+    heartbeat_schema,
+)
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+# 2026-01-13T05:32:00 UTC
+WINDOW_START_TS = 1768282320000
+ARGS = ["topics", "local", "export", "2026-01-13-05:32", "2026-01-13-05:33"]
+
+
+@patch("lsst.ts.kafka_tools.topics.create_config")
+def test_export_parquet(mock_create_config: MagicMock, tmp_path: pathlib.Path) -> None:
+    mock_create_config.return_value = {}
+    topic = "lsst.s3.raw.lsstcam"
+    logs = {
+        topic: create_topic_log(
+            topic,
+            [[(WINDOW_START_TS + i, f"{i}".encode()) for i in range(10)]],
+        )
+    }
+    output = tmp_path / "export.parquet"
+
+    runner = CliRunner()
+    with patch(
+        "lsst.ts.kafka_tools.topics.Consumer",
+        side_effect=lambda conf: MockConsumer(conf, logs),
+    ):
+        result = runner.invoke(
+            main, ARGS + [topic, str(output), "--row-group-size", "4"]
+        )
+    assert result.exit_code == 0
+    assert "Exported 10 message(s)" in result.stdout
+
+    pfile = pq.ParquetFile(output)
+    assert pfile.metadata.num_row_groups == 3
+    table = pfile.read()
+    assert table.column_names == ["timestamp", "partition", "offset", "key", "value"]
+    assert table.schema.field("timestamp").type == pa.timestamp("ms", tz="UTC")
+    assert table.column("offset").to_pylist() == list(range(10))
+    assert table.column("value").to_pylist()[-1] == "9"
+
+    with patch(
+        "lsst.ts.kafka_tools.topics.Consumer",
+        side_effect=lambda conf: MockConsumer(conf, logs),
+    ):
+        result = runner.invoke(
+            main, ARGS + [topic, str(output), "--row-group-size", "0"]
+        )
+        assert result.exit_code == 2
+
+        empty = tmp_path / "empty.parquet"
+        args = ["topics", "local", "export", "2026-01-13-06:00", "2026-01-13-06:01"]
+        result = runner.invoke(main, args + [topic, str(empty)])
+        assert result.exit_code == 0
+        assert "No messages in the time range" in result.stdout
+        assert not empty.exists()
+
+        with patch.dict("sys.modules", {"pyarrow": None}):
+            result = runner.invoke(main, ARGS + [topic, str(output)])
+        assert result.exit_code == 1
+        assert "install kafka_tools[export]" in result.output
+        assert "Traceback" not in result.output
+
+
+@patch("lsst.ts.kafka_tools.topics.create_config")
+def test_export_arrow_avro(
+    mock_create_config: MagicMock, tmp_path: pathlib.Path
+) -> None:
+    pytest.importorskip("fastavro")
+    mock_create_config.return_value = {}
+    topic = "lsst.sal.ATAOS.logevent_heartbeat"
+    url = create_file_registry(tmp_path / "registry", {1: heartbeat_schema})
+    records = [
+        {"private_sndStamp": 0.5 * i, "private_seqNum": i, "heartbeat": i % 2 == 0}
+        for i in range(6)
+    ]
+    logs = {
+        topic: create_topic_log(
+            topic,
+            [
+                [
+                    (WINDOW_START_TS + i, encode_avro(1, heartbeat_schema, r))
+                    for i, r in enumerate(records[:3])
+                ],
+                [
+                    (WINDOW_START_TS + i, encode_avro(1, heartbeat_schema, r))
+                    for i, r in enumerate(records[3:])
+                ],
+            ],
+        )
+    }
+    output = tmp_path / "export.arrow"
+
+    runner = CliRunner(env={"XDG_CACHE_HOME": str(tmp_path / "cache")})
+    with patch(
+        "lsst.ts.kafka_tools.topics.Consumer",
+        side_effect=lambda conf: MockConsumer(conf, logs),
+    ):
+        result = runner.invoke(
+            main,
+            ARGS
+            + [
+                topic,
+                str(output),
+                "--format",
+                "arrow",
+                "--value-format",
+                "avro",
+                "--schema-registry",
+                url,
+            ],
+        )
+    assert result.exit_code == 0
+
+    with pa.ipc.open_file(output) as reader:
+        table = reader.read_all()
+    assert table.column_names == [
+        "timestamp",
+        "partition",
+        "offset",
+        "key",
+        "value.private_sndStamp",
+        "value.private_seqNum",
+        "value.heartbeat",
+    ]
+    assert sorted(table.column("value.private_seqNum").to_pylist()) == list(range(6))
+
+
+@patch("lsst.ts.kafka_tools.topics.create_config")
+def test_export_parquet_avro_columns(
+    mock_create_config: MagicMock, tmp_path: pathlib.Path
+) -> None:
+    pytest.importorskip("fastavro")
+    mock_create_config.return_value = {}
+    topic = "lsst.sal.MTMount.azimuth"
+    schema = {
+        "type": "record",
+        "name": "azimuth",
+        "namespace": "lsst.sal.MTMount",
+        "fields": [
+            {"name": "timestamp", "type": "double"},
+            {"name": "actualPosition", "type": "double"},
+            {"name": "note", "type": ["null", "string"], "default": None},
+        ],
+    }
+    url = create_file_registry(tmp_path / "registry", {1: schema})
+    records = [
+        {
+            "timestamp": 1768282320.5 + i,
+            "actualPosition": 0.25 * i,
+            "note": "moving" if i >= 4 else None,
+        }
+        for i in range(6)
+    ]
+    logs = {
+        topic: create_topic_log(
+            topic,
+            [
+                [
+                    (WINDOW_START_TS + i, encode_avro(1, schema, r))
+                    for i, r in enumerate(records)
+                ]
+            ],
+        )
+    }
+    output = tmp_path / "export.parquet"
+
+    runner = CliRunner(env={"XDG_CACHE_HOME": str(tmp_path / "cache")})
+    with patch(
+        "lsst.ts.kafka_tools.topics.Consumer",
+        side_effect=lambda conf: MockConsumer(conf, logs),
+    ):
+        result = runner.invoke(
+            main,
+            ARGS
+            + [
+                topic,
+                str(output),
+                "--row-group-size",
+                "2",
+                "--value-format",
+                "avro",
+                "--schema-registry",
+                url,
+            ],
+        )
+    assert result.exit_code == 0
+
+    table = pq.read_table(output)
+    assert table.schema.field("timestamp").type == pa.timestamp("ms", tz="UTC")
+    assert table.schema.field("key").type == pa.string()
+    assert table.schema.field("value.timestamp").type == pa.float64()
+    assert table.schema.field("value.note").type == pa.string()
+    assert table.column("value.timestamp").to_pylist() == [
+        r["timestamp"] for r in records
+    ]
+    assert table.column("value.note").to_pylist() == [r["note"] for r in records]
+
+
+def test_export_changing_columns(tmp_path: pathlib.Path) -> None:
+    def records(values: list) -> list[dict]:
+        return [
+            dict(
+                timestamp=WINDOW_START_TS + i, partition=0, offset=i, key=None, value=v
+            )
+            for i, v in enumerate(values)
+        ]
+
+    output = tmp_path / "export.parquet"
+    # A field added by a later writer schema would be dropped silently.
+    values = [{"a": 1}] * 2 + [{"a": 2, "b": 0.5}] * 2
+    with pytest.raises(ValueError, match="value.b first appear .* offset 2"):
+        export_records(records(values), output, "parquet", 2)
+
+    values = [{"a": 1}] * 2 + [{"a": "text"}] * 2
+    with pytest.raises(ValueError, match="does not match the column types"):
+        export_records(records(values), output, "arrow", 2)
+
+    # Integers and floats of one union field share a float column.
+    schema = {"fields": [{"name": "a", "type": ["null", "long", "double"]}]}
+    values = [{"a": 1}] * 2 + [{"a": 1.5}] * 2
+    assert export_records(records(values), output, "parquet", 2, lambda: [schema]) == 4
+    assert pq.read_table(output).column("value.a").to_pylist() == [1.0, 1.0, 1.5, 1.5]
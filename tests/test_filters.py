@@ -0,0 +1,246 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import pathlib
+from unittest.mock import MagicMock, patch
+
+import pytest
+from click.testing import CliRunner
+from lsst.ts.kafka_tools.cli import main
+from lsst.ts.kafka_tools.filters import (
+    RecordFilter,
+    compile_where,
+    parse_header_match,
+)
+from lsst.ts.kafka_tools.mocks.mock_consumer import MockConsumer, create_topic_log
+from lsst.ts.kafka_tools.mocks.mock_message import MockMessage
+from lsst.ts.kafka_tools.mocks.schema_registry import (
+    create_file_registry,
+    encode_avro,
+    heartbeat_schema,
+)
+from lsst.ts.kafka_tools.topics import iter_topic_time_range
+
+# 2026-01-13T05:32:00 UTC
+WINDOW_START_TS = 1768282320000
+
+
+def test_compile_where() -> None:
+    value = {"a": 5, "b": {"c": "x"}, "flag": True}
+    assert compile_where("a > 3 and flag")(0, 0, 0, None, value)
+    assert compile_where("1 < a <= 5")(0, 0, 0, None, value)
+    assert compile_where("b.c == 'x' or missing > 1")(0, 0, 0, None, value)
+    assert compile_where("partition in (1, 2) and offset % 2 == 0")(
+        0, 2, 4, None, value
+    )
+    assert compile_where("key == 'k1'")(0, 0, 0, "k1", value)
+    assert not compile_where("missing > 1")(0, 0, 0, None, value)
+    assert not compile_where("b.c.d > 1")(0, 0, 0, None, value)
+    assert not compile_where("a > 'text'")(0, 0, 0, None, value)
+    assert not compile_where("a > 3")(0, 0, 0, None, "not a dict")
+    assert not compile_where("a / zero > 1")(0, 0, 0, None, {**value, "zero": 0})
+    assert not compile_where("offset % partition == 0")(0, 0, 4, None, value)
+
+    for expression in (
+        "__import__('os')",
+        "a.__class__ == 1",
+        "[x for x in value]",
+        "a >",
+        "lambda: 1",
+    ):
+        with pytest.raises(ValueError):
+            compile_where(expression)
+
+
+def test_record_filter_project() -> None:
+    record_filter = RecordFilter(fields=["a", "missing"])
+    assert record_filter.matches(0, 0, 0, None, {"a": 1})
+    assert record_filter.project({"a": 1, "b": 2}) == {"a": 1, "missing": None}
+    assert record_filter.project("text") == "text"
+
+
+def test_record_filter_accepts() -> None:
+    assert parse_header_match("source=MTM1M3") == ("source", b"MTM1M3")
+    assert parse_header_match("source") == ("source", None)
+    assert parse_header_match("empty=") == ("empty", b"")
+    with pytest.raises(ValueError):
+        parse_header_match("=x")
+
+    msg = MockMessage(0, b"v", key=b"k1", headers=[("source", b"MTM1M3")])
+    assert RecordFilter(key=b"k1").accepts(msg)
+    assert not RecordFilter(key=b"k2").accepts(msg)
+    assert RecordFilter(headers=[("source", None)]).accepts(msg)
+    assert RecordFilter(headers=[("source", b"MTM1M3")]).accepts(msg)
+    assert not RecordFilter(headers=[("source", b"MTM2")]).accepts(msg)
+    assert not RecordFilter(headers=[("source", b"MTM1M3"), ("site", None)]).accepts(
+        msg
+    )
+    assert not RecordFilter(headers=[("source", None)]).accepts(MockMessage(0, b"v"))
+    assert not RecordFilter(headers=[("source", b"MTM1M3")]).needs_value
+
+
+@patch("lsst.ts.kafka_tools.topics.create_config")
+def test_query_header_prefilter(mock_create_config: MagicMock) -> None:
+    mock_create_config.return_value = {}
+    topic = "lsst.sal.MTM1M3.forceActuatorData"
+    logs = {
+        topic: [
+            [
+                MockMessage(
+                    WINDOW_START_TS + i,
+                    b"value",
+                    key=b"k%d" % (i % 2),
+                    topic=topic,
+                    offset=i,
+                    headers=[("source", b"A" if i % 10 == 0 else b"B")],
+                )
+                for i in range(100)
+            ]
+        ]
+    }
+    decoded: list[bytes] = []
+
+    def decoder(value: bytes) -> str:
+        decoded.append(value)
+        return value.decode()
+
+    with patch(
+        "lsst.ts.kafka_tools.topics.Consumer",
+        side_effect=lambda conf: MockConsumer(conf, logs),
+    ):
+        records = list(
+            iter_topic_time_range(
+                {"site": "local"},
+                topic,
+                "2026-01-13-05:32",
+                "2026-01-13-05:33",
+                value_decoder=decoder,
+                record_filter=RecordFilter(headers=[("source", b"A")]),
+            )
+        )
+        assert sorted(r["offset"] for r in records) == list(range(0, 100, 10))
+        assert len(decoded) == 10
+
+        runner = CliRunner()
+        args = ["topics", "local", "query", "2026-01-13-05:32", "2026-01-13-05:33"]
+        result = runner.invoke(
+            main, args + [topic, "--header", "source=A", "--key", "k1"]
+        )
+        assert result.exit_code == 0
+        assert "Returned 0 message(s)" in result.stdout
+
+        result = runner.invoke(
+            main, args + [topic, "--header", "source=B", "--key", "k1"]
+        )
+        assert result.exit_code == 0
+        assert "Returned 50 message(s)" in result.stdout
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(
+                main, args + [topic, "--header", "source=A", "--dump", "out.bin"]
+            )
+            assert result.exit_code == 0
+            assert "Dumped 10 message(s)" in result.output
+
+            result = runner.invoke(
+                main, args + [topic, "--where", "offset > 1", "--dump", "out.bin"]
+            )
+            assert result.exit_code == 2
+
+
+@patch("lsst.ts.kafka_tools.topics.create_config")
+def test_query_where_fields(
+    mock_create_config: MagicMock, tmp_path: pathlib.Path
+) -> None:
+    pytest.importorskip("fastavro")
+    mock_create_config.return_value = {}
+    topic = "lsst.sal.ATAOS.logevent_heartbeat"
+    url = create_file_registry(tmp_path / "registry", {3: heartbeat_schema})
+    logs = {
+        topic: create_topic_log(
+            topic,
+            [
+                [
+                    (
+                        WINDOW_START_TS + i * 1000 + p,
+                        encode_avro(
+                            3,
+                            heartbeat_schema,
+                            {
+                                "private_sndStamp": 1.0,
+                                "private_seqNum": i,
+                                "heartbeat": i % 2 == 0,
+                            },
+                        ),
+                    )
+                    for i in range(10)
+                ]
+                for p in range(2)
+            ],
+        )
+    }
+
+    runner = CliRunner(env={"XDG_CACHE_HOME": str(tmp_path / "cache")})
+    args = ["topics", "local", "query", "2026-01-13-05:32", "2026-01-13-05:33"]
+    args += [topic, "--value-format", "avro", "--schema-registry", url]
+    with patch(
+        "lsst.ts.kafka_tools.topics.Consumer",
+        side_effect=lambda conf: MockConsumer(conf, logs),
+    ):
+        result = runner.invoke(
+            main,
+            args
+            + [
+                "--where",
+                "heartbeat and private_seqNum >= 4",
+                "--fields",
+                "private_seqNum",
+                "--stream",
+            ],
+        )
+        assert result.exit_code == 0
+        records = [
+            json.loads(x) for x in result.stdout.splitlines() if x.startswith("{")
+        ]
+        assert all(list(r["value"]) == ["private_seqNum"] for r in records)
+        assert sorted(r["value"]["private_seqNum"] for r in records) == [
+            4,
+            4,
+            6,
+            6,
+            8,
+            8,
+        ]
+        assert "Returned 6 message(s)" in result.output
+
+        result = runner.invoke(
+            main, args + ["--where", "private_seqNum > 2", "--max-messages", "3"]
+        )
+        assert result.exit_code == 0
+        assert "Returned 3 message(s)" in result.stdout
+
+        result = runner.invoke(main, args + ["--where", "partition == 1"])
+        assert result.exit_code == 0
+        assert "Returned 10 message(s)" in result.stdout
+
+        result = runner.invoke(main, args + ["--where", "open('x')"])
+        assert result.exit_code == 2
@@ -0,0 +1,121 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pathlib
+from unittest.mock import MagicMock, patch
+
+import pytest
+from click.testing import CliRunner
+from lsst.ts.kafka_tools.cli import main
+from lsst.ts.kafka_tools.constants import ListTopicsOpts
+from lsst.ts.kafka_tools.matchers import NameMatcher, select_names
+from lsst.ts.kafka_tools.mocks.mock_admin_client import MockAdminClient
+
+NAMES = [
+    "lsst.sal.ATAOS.logevent_heartbeat",
+    "lsst.sal.ATAOS.logevent_summaryState",
+    "lsst.sal.ATDome.logevent_heartbeat",
+    "lsst.sal.MTM1M3.forceActuatorData",
+    "topic1.attribute1",
+]
+
+
+def matching(patterns: list[str], mode: str) -> list[str]:
+    matcher = NameMatcher(patterns, mode)
+    return [x for x in NAMES if matcher.matches(x)]
+
+
+def test_name_matcher() -> None:
+    assert matching(["heartbeat", "M1M3"], "substring") == [
+        "lsst.sal.ATAOS.logevent_heartbeat",
+        "lsst.sal.ATDome.logevent_heartbeat",
+        "lsst.sal.MTM1M3.forceActuatorData",
+    ]
+    # Overlapping patterns and patterns ending inside others.
+    assert matching(
+        ["ATAOS.logevent_x", "S.logevent_s", "ent_heartbeaty"], "substring"
+    ) == ["lsst.sal.ATAOS.logevent_summaryState"]
+    assert matching(["lsst.sal.AT", "lsst.sal.ATAOS", "topic"], "prefix") == [
+        "lsst.sal.ATAOS.logevent_heartbeat",
+        "lsst.sal.ATAOS.logevent_summaryState",
+        "lsst.sal.ATDome.logevent_heartbeat",
+        "topic1.attribute1",
+    ]
+    assert matching(
+        ["lsst.sal.ATAOS.logevent_z", "lsst.sal.ATAOS.logevent_h"], "prefix"
+    ) == ["lsst.sal.ATAOS.logevent_heartbeat"]
+    assert matching(["topic1", "topic1.attribute1"], "exact") == ["topic1.attribute1"]
+    assert matching(["lsst.sal.AT*.logevent_heartbeat", "*.attribute?"], "glob") == [
+        "lsst.sal.ATAOS.logevent_heartbeat",
+        "lsst.sal.ATDome.logevent_heartbeat",
+        "topic1.attribute1",
+    ]
+    for mode in ("substring", "prefix", "exact", "glob"):
+        assert matching(["", "  "], mode) == []
+    with pytest.raises(ValueError):
+        NameMatcher(["a"], "fuzzy")
+
+
+def test_select_names(tmp_path: pathlib.Path) -> None:
+    name_file = tmp_path / "names.txt"
+    name_file.write_text("heartbeat\nATAOS\n\n")
+    opts = ListTopicsOpts(None, None, None, name_file)
+    # Matching two entries selects a topic once, the blank line nothing.
+    assert select_names(NAMES, opts) == [
+        "lsst.sal.ATAOS.logevent_heartbeat",
+        "lsst.sal.ATAOS.logevent_summaryState",
+        "lsst.sal.ATDome.logevent_heartbeat",
+    ]
+    opts = ListTopicsOpts("Data$", "topic", None, None)
+    assert select_names(NAMES, opts) == [
+        "lsst.sal.MTM1M3.forceActuatorData",
+        "topic1.attribute1",
+    ]
+    opts = ListTopicsOpts(None, None, "topic1,ATAOS", None, "prefix")
+    assert select_names(NAMES, opts) == ["topic1.attribute1"]
+    assert select_names(NAMES, None) == []
+    assert select_names(NAMES, None, default_all=True) == sorted(NAMES)
+
+
+@patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
+def test_delete_name_mode(
+    mock_gen_admin_client: MagicMock, tmp_path: pathlib.Path
+) -> None:
+    mock_gen_admin_client.return_value = MockAdminClient()
+
+    runner = CliRunner(env={"XDG_CACHE_HOME": str(tmp_path / "cache")})
+    with runner.isolated_filesystem():
+        pathlib.Path("names.txt").write_text("topic1.attribute1\ntopic2.attribute\n")
+        result = runner.invoke(
+            main,
+            [
+                "topics",
+                "local",
+                "delete",
+                "--name-file",
+                "names.txt",
+                "--name-mode",
+                "exact",
+            ],
+            input="y",
+        )
+        assert result.exit_code == 0
+        assert "Found 1 topics to delete" in result.stdout
@@ -0,0 +1,110 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import pathlib
+import time
+from unittest.mock import MagicMock, patch
+
+from click.testing import CliRunner
+from lsst.ts.kafka_tools.cli import main
+from lsst.ts.kafka_tools.metadata import metadata_cache_file
+from lsst.ts.kafka_tools.mocks.mock_admin_client import MockAdminClient
+from lsst.ts.kafka_tools.mocks.topic_responses import list_topics
+
+
+@patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
+def test_metadata_cache(
+    mock_gen_admin_client: MagicMock, tmp_path: pathlib.Path
+) -> None:
+    client = MockAdminClient()
+    pm = client.cluster_md.topics["topic1.attribute1"].partitions[0]
+    pm.leader = 2
+    pm.replicas = [2, 1]
+    pm.isrs = [2]
+    mock_gen_admin_client.return_value = client
+    env = {"XDG_CACHE_HOME": str(tmp_path / "cache")}
+    runner = CliRunner(env=env)
+
+    result = runner.invoke(main, ["topics", "local", "list"])
+    assert result.exit_code == 0
+    assert result.stdout == list_topics
+    assert mock_gen_admin_client.call_count == 1
+
+    with patch.dict(os.environ, env):
+        cache_file = metadata_cache_file("local")
+    assert cache_file.exists()
+    assert not list(cache_file.parent.glob("*.tmp"))
+
+    # Served from the cache, including the partition layout.
+    del client.cluster_md.topics["topic2.attribute3"]
+    result = runner.invoke(main, ["topics", "local", "list", "--regex", "3$"])
+    assert result.exit_code == 0
+    assert "topic2.attribute3" in result.stdout
+    assert mock_gen_admin_client.call_count == 1
+    with patch.dict(os.environ, env):
+        from lsst.ts.kafka_tools.topics import get_topics
+
+        md = get_topics({"site": "local", "timeout": 0})
+    cached_pm = md.topics["topic1.attribute1"].partitions[0]
+    assert (cached_pm.leader, cached_pm.replicas, cached_pm.isrs) == (2, [2, 1], [2])
+
+    result = runner.invoke(main, ["topics", "--refresh", "local", "list"])
+    assert result.exit_code == 0
+    assert "topic2.attribute3" not in result.stdout
+    assert mock_gen_admin_client.call_count == 2
+
+    # An expired cache is fetched again.
+    old = time.time() - 600
+    os.utime(cache_file, (old, old))
+    client.cluster_md.topics.pop("topic2.attribute2")
+    result = runner.invoke(main, ["topics", "local", "list", "--name", "topic2"])
+    assert "topic2.attribute2" not in result.stdout
+    assert mock_gen_admin_client.call_count == 3
+
+    result = runner.invoke(main, ["topics", "--metadata-ttl", "0", "local", "list"])
+    assert mock_gen_admin_client.call_count == 4
+
+    # Deleting selects from the site even while the cache is fresh.
+    result = runner.invoke(main, ["topics", "local", "list"])
+    assert "topic2.attribute1" in result.stdout
+    client.cluster_md.topics.pop("topic2.attribute1")
+    calls = mock_gen_admin_client.call_count
+
+    # Changing topics drops the cache.
+    result = runner.invoke(
+        main,
+        [
+            "topics",
+            "local",
+            "delete",
+            "--name",
+            "topic2",
+            "--journal",
+            str(tmp_path / "journal.jsonl"),
+        ],
+        input="y",
+    )
+    assert result.exit_code == 0
+    assert mock_gen_admin_client.call_count > calls
+    journal = (tmp_path / "journal.jsonl").read_text()
+    assert "topic2.attribute1" not in journal
+    assert not cache_file.exists()
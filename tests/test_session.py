@@ -0,0 +1,84 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from lsst.ts.kafka_tools.helpers import create_config, generate_admin_client
+from lsst.ts.kafka_tools.session import (
+    Session,
+    close_sessions,
+    get_session,
+    reset_session,
+)
+
+ENVVARS = {
+    "LSST_KAFKA_SECURITY_PROTOCOL": "SASL_PLAINTEXT",
+    "LSST_KAFKA_SECURITY_MECHANISM": "SCRAM-SHA-512",
+    "LSST_KAFKA_SECURITY_USERNAME": "admin",
+    "LSST_KAFKA_SECURITY_PASSWORD": "secret",
+    "LSST_KAFKA_BROKER_ADDR": "localhost:9092",
+}
+
+
+@patch("lsst.ts.kafka_tools.session.AdminClient", spec=True)
+def test_shared_session(
+    mock_admin_client: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for key, value in ENVVARS.items():
+        monkeypatch.setenv(key, value)
+    mock_admin_client.side_effect = lambda conf: MagicMock()
+    close_sessions()
+
+    session = get_session("envvar")
+    assert get_session("envvar") is session
+    assert get_session("local") is not session
+
+    client = generate_admin_client("envvar")
+    assert generate_admin_client("envvar") is client
+    assert mock_admin_client.call_count == 1
+    assert mock_admin_client.call_args.args[0]["bootstrap.servers"] == "localhost:9092"
+
+    # The configuration is read once per session.
+    monkeypatch.setenv("LSST_KAFKA_BROKER_ADDR", "other:9092")
+    assert create_config("envvar")["bootstrap.servers"].data == "localhost:9092"
+
+    close_sessions()
+    assert get_session("envvar") is not session
+    assert create_config("envvar")["bootstrap.servers"].data == "other:9092"
+    generate_admin_client("envvar")
+    assert mock_admin_client.call_count == 2
+
+    # Resetting one site reads its configuration again.
+    local = get_session("local")
+    monkeypatch.setenv("LSST_KAFKA_BROKER_ADDR", "third:9092")
+    session = get_session("envvar")
+    reset_session("envvar")
+    assert session._config is None
+    assert get_session("envvar") is not session
+    assert get_session("local") is local
+    assert create_config("envvar")["bootstrap.servers"].data == "third:9092"
+    reset_session("tts")
+
+    with Session("envvar") as own:
+        assert own.admin_client is not client
+    assert own._admin_client is None
+    close_sessions()
@@ -0,0 +1,118 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import io
+import pathlib
+from unittest.mock import MagicMock, patch
+
+import pytest
+from lsst.ts.kafka_tools.cli import main
+from lsst.ts.kafka_tools.mocks.mock_admin_client import MockAdminClient
+from lsst.ts.kafka_tools.mocks.topic_responses import list_topics
+from lsst.ts.kafka_tools.shell import KafkaShell
+
+
+def make_shell(lines: list[str]) -> KafkaShell:
+    shell = KafkaShell("local", main, stdin=io.StringIO("\n".join(lines) + "\n"))
+    shell.prompt = ""
+    return shell
+
+
+@patch("lsst.ts.kafka_tools.consumers.generate_admin_client", spec=True)
+@patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
+def test_shell(
+    mock_topics_client: MagicMock,
+    mock_consumers_client: MagicMock,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    mock_topics_client.return_value = MockAdminClient()
+    mock_consumers_client.return_value = MockAdminClient()
+
+    shell = make_shell(
+        [
+            "",
+            "topics list",
+            "topics list --name 'topic2'",
+            "topics --refresh list --name topic1",
+            "topics list --bad-option",
+            "nonsense",
+            "exit",
+            "topics list",
+        ]
+    )
+    shell.cmdloop(intro="")
+    captured = capsys.readouterr()
+    lines = list_topics.splitlines()
+    topic1 = [x for x in lines if x.startswith("topic1")]
+    topic2 = [x for x in lines if x.startswith("topic2")]
+    assert captured.out == "".join(
+        x + "\n"
+        for x in lines + topic2 + topic1 + ["Unknown command 'nonsense', type help."]
+    )
+    assert "No such option: --bad-option" in captured.err
+    # Only the first and the refreshing command fetch the metadata.
+    assert mock_topics_client.call_count == 2
+
+    assert shell.completenames("to") == ["topics"]
+    assert shell.completedefault("", "topics ", 7, 7)[:2] == ["copy", "create"]
+    assert shell.completedefault("--na", "topics list --na", 12, 16) == ["--name"]
+    assert shell.completedefault("topic2.", "topics tail topic2.", 12, 19) == [
+        x for x in lines if x.startswith("topic2.")
+    ]
+    assert shell.completedefault(
+        "consumer1", "consumers describe consumer1", 19, 28
+    ) == [
+        "consumer1",
+        "consumer10",
+        "consumer11",
+        "consumer13",
+    ]
+    assert shell.completedefault("l", "help topics l", 12, 13) == ["list"]
+
+
+@patch("lsst.ts.kafka_tools.shell.reset_session", spec=True)
+def test_shell_site(
+    mock_reset_session: MagicMock, capsys: pytest.CaptureFixture[str]
+) -> None:
+    shell = make_shell(["site", "site nowhere", "site envvar", "site", "refresh"])
+    shell.cmdloop(intro="")
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == [
+        "local",
+        "Unknown site 'nowhere', one of tts, bts, summit, local, envvar.",
+        "envvar",
+    ]
+    assert shell.ctxobj["site"] == "envvar"
+    interactive = KafkaShell("local", main)
+    interactive.do_site("bts")
+    assert interactive.prompt == "kt bts> "
+    # Switching, refreshing and leaving start over with new sessions.
+    assert [x.args[0] for x in mock_reset_session.call_args_list] == [
+        "local",
+        "envvar",
+        "envvar",
+        "envvar",
+        "local",
+        "bts",
+    ]
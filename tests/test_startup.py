@@ -0,0 +1,93 @@
+# This file is part of kafka_tools.
+#
+# Developed for the Rubin Observatory.
+# This product includes software developed by the Rubin Observatory Project
+# (https://rubinobservatory.org/).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import subprocess
+import sys
+
+import click
+import pytest
+from click.testing import CliRunner
+from lsst.ts.kafka_tools.cli import LAZY_COMMANDS, LazyGroup, main
+
+CHECK_IMPORTS = """
+import sys
+from lsst.ts.kafka_tools.cli import main
+for args in {args!r}:
+    try:
+        main(args, standalone_mode=False)
+    except SystemExit:
+        pass
+print(" ".join(sorted(m for m in sys.modules if m.startswith("confluent_kafka"))))
+"""
+
+
+def loaded_kafka_modules(*args: list[str]) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_IMPORTS.format(args=list(args))],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.splitlines()[-1] if result.stdout else ""
+
+
+def test_startup_imports() -> None:
+    # Help and auth commands must not pay for the Kafka client import.
+    assert loaded_kafka_modules(["--help"], ["auth", "--help"]) == ""
+    assert "confluent_kafka" in loaded_kafka_modules(["topics", "--help"])
+
+
+def test_command_exports() -> None:
+    from lsst.ts.kafka_tools import cli
+    from lsst.ts.kafka_tools.commands import auth, topics
+
+    assert cli.auth is auth.auth
+    assert cli.auth_create_prop_files is auth.auth_create_prop_files
+    assert cli.topics is topics.topics
+    assert cli.topics_list is topics.topics_list
+    with pytest.raises(AttributeError):
+        cli.missing
+
+
+def test_lazy_commands() -> None:
+    group = LazyGroup(
+        "kt",
+        lazy_commands={"auth": LAZY_COMMANDS["auth"]},
+        commands=[click.Command("x")],
+    )
+    ctx = click.Context(group)
+    assert group.list_commands(ctx) == ["auth", "x"]
+    assert not group.commands.get("auth")
+    assert group.get_command(ctx, "auth") is group.commands["auth"]
+    assert group.get_command(ctx, "missing") is None
+
+    # The short help shown without importing matches the commands.
+    for name, (_, short_help) in LAZY_COMMANDS.items():
+        command = main.get_command(click.Context(main), name)
+        assert command is not None
+        assert command.get_short_help_str(100) == short_help
+
+    result = CliRunner().invoke(main, ["--help"])
+    assert result.exit_code == 0
+    for name in LAZY_COMMANDS:
+        assert f"  {name} " in result.stdout
+    items = main.shell_complete(click.Context(main), "co")
+    assert [x.value for x in items] == ["config", "consumers"]
@@ -19,16 +19,29 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import json
 import os
 import pathlib
+import threading
+import time
+from typing import Any, Iterator
 from unittest.mock import MagicMock, patch
 
+import pytest
 from click.testing import CliRunner
-from confluent_kafka import TopicPartition
+from confluent_kafka import KafkaError, KafkaException, TopicPartition
 from lsst.ts.kafka_tools.cli import main
+from lsst.ts.kafka_tools.constants import FetchOpts, ListTopicsOpts
+from lsst.ts.kafka_tools.filters import RecordFilter
 from lsst.ts.kafka_tools.mocks.ceph_events import ceph_event_single_put
 from lsst.ts.kafka_tools.mocks.mock_admin_client import MockAdminClient
+from lsst.ts.kafka_tools.mocks.mock_consumer import (
+    MockConsumer,
+    MockConsumerFactory,
+    create_topic_log,
+)
 from lsst.ts.kafka_tools.mocks.mock_message import MockMessage
+from lsst.ts.kafka_tools.mocks.mock_producer import MockProducer
 from lsst.ts.kafka_tools.mocks.topic_responses import (
     csc_filtered_topics,
     list_topics,
@@ -36,9 +49,43 @@ from lsst.ts.kafka_tools.mocks.topic_responses import (
     name_file_delete,
     name_list_delete,
     partition_expansion,
+    query_plan,
     regex_delete,
     regex_filtered_topics,
 )
+from lsst.ts.kafka_tools.topics import (
+    copy_topic_time_range,
+    create_topics,
+    describe_topics,
+    find_idle_topics,
+    iter_topic_time_range,
+    iter_topics_time_range,
+    load_topic_specs,
+    plan_topic_time_range,
+    plan_topics_time_range,
+    query_topic_time_range,
+    sample_topic_time_range,
+    split_existing_topics,
+    tail_topics,
+    topic_histogram,
+    topic_rates,
+)
+
+# 2026-01-13T05:32:00 UTC
+WINDOW_START_TS = 1768282320000
+M1M3_TOPIC = "lsst.sal.MTM1M3.forceActuatorData"
+M2_TOPIC = "lsst.sal.MTM2.axialForce"
+
+
+@pytest.fixture
+def mock_consumers(request: pytest.FixtureRequest) -> Iterator[MockConsumerFactory]:
+    """Read topic queries from the partition logs given as parameter."""
+    factory = MockConsumerFactory(request.param)
+    with (
+        patch("lsst.ts.kafka_tools.topics.create_config", return_value={}),
+        patch("lsst.ts.kafka_tools.topics.Consumer", side_effect=factory),
+    ):
+        yield factory
 
 
 def test_top_group() -> None:
@@ -49,10 +96,10 @@ def test_top_group() -> None:
 
 
 @patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
-def test_topics_list(mock_gen_admin_client: MagicMock) -> None:
+def test_topics_list(mock_gen_admin_client: MagicMock, tmp_path: pathlib.Path) -> None:
     mock_gen_admin_client.return_value = MockAdminClient()
 
-    runner = CliRunner()
+    runner = CliRunner(env={"XDG_CACHE_HOME": str(tmp_path / "cache")})
     with runner.isolated_filesystem():
         result = runner.invoke(main, ["topics", "local", "list"])
         assert result.exit_code == 0
@@ -73,10 +120,12 @@ def test_topics_list(mock_gen_admin_client: MagicMock) -> None:
 
 
 @patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
-def test_topics_delete(mock_gen_admin_client: MagicMock) -> None:
+def test_topics_delete(
+    mock_gen_admin_client: MagicMock, tmp_path: pathlib.Path
+) -> None:
     mock_gen_admin_client.return_value = MockAdminClient()
 
-    runner = CliRunner()
+    runner = CliRunner(env={"XDG_CACHE_HOME": str(tmp_path / "cache")})
     with runner.isolated_filesystem():
         result = runner.invoke(
             main, ["topics", "local", "delete", "--regex", "3$"], input="N"
@@ -124,9 +173,11 @@ def test_topics_delete(mock_gen_admin_client: MagicMock) -> None:
 
 
 @patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
-def test_topics_partitions(mock_gen_admin_client: MagicMock) -> None:
+def test_topics_partitions(
+    mock_gen_admin_client: MagicMock, tmp_path: pathlib.Path
+) -> None:
     mock_gen_admin_client.return_value = MockAdminClient()
-    runner = CliRunner()
+    runner = CliRunner(env={"XDG_CACHE_HOME": str(tmp_path / "cache")})
     with runner.isolated_filesystem():
         result = runner.invoke(
             main, ["topics", "local", "set-partitions", "ATAOS", "8"]
@@ -151,17 +202,21 @@ def test_topics_query(
     consumer.list_topics.return_value.topics = {
         "lsst.s3.raw.lsstcam": MagicMock(partitions={0: partition})
     }
-    consumer.offsets_for_times.return_value = [
-        TopicPartition("lsst.s3.raw.lsstcam", 0, 0)
+    consumer.offsets_for_times.side_effect = [
+        [TopicPartition("lsst.s3.raw.lsstcam", 0, 0)],
+        [TopicPartition("lsst.s3.raw.lsstcam", 0, 1)],
     ]
+    consumer.get_watermark_offsets.return_value = (0, 2)
 
     inside_window_ts = 1768282330000  # 2026-01-13T05:32:10 UTC
     after_window_ts = inside_window_ts + 10 * 60 * 1000  # +10 minutes
 
-    consumer.poll.side_effect = [
-        MockMessage(inside_window_ts, ceph_event_single_put),  # should be included
-        MockMessage(after_window_ts, ceph_event_single_put),  # should not
-        None,  # end of messages
+    consumer.consume.side_effect = [
+        [
+            MockMessage(inside_window_ts, ceph_event_single_put),  # should be included
+            MockMessage(after_window_ts, ceph_event_single_put, offset=1),  # should not
+        ],
+        [],  # end of messages
     ]
 
     runner = CliRunner()
@@ -183,3 +238,991 @@ def test_topics_query(
         # only one message should appear
         assert result.stdout.count("ObjectCreated:Put") == 1
         assert "LSSTCam/file.fits" in result.stdout
+
+
+@pytest.mark.parametrize(
+    "mock_consumers",
+    [
+        {
+            M1M3_TOPIC: create_topic_log(
+                M1M3_TOPIC,
+                [
+                    # Partition 0 passes the end of the window first.
+                    [
+                        (WINDOW_START_TS + 1000, b"p0-0"),
+                        (WINDOW_START_TS + 120000, b"p0-1"),
+                    ],
+                    [
+                        (WINDOW_START_TS + 2000, b"p1-0"),
+                        (WINDOW_START_TS + 3000, b"p1-1"),
+                        (WINDOW_START_TS + 4000, b"p1-2"),
+                    ],
+                    # Partition 2 has nothing after the start time.
+                    [(WINDOW_START_TS - 1000, b"p2-0")],
+                ],
+            )
+        }
+    ],
+    indirect=True,
+)
+def test_query_partitions_independently(mock_consumers: MockConsumerFactory) -> None:
+    topic = M1M3_TOPIC
+    consumers = mock_consumers.consumers
+
+    records = query_topic_time_range(
+        {"site": "local", "timeout": 1000},
+        topic,
+        "2026-01-13-05:32",
+        "2026-01-13-05:33",
+    )
+
+    assert [r["value"] for r in records] == ["p0-0", "p1-0", "p1-1", "p1-2"]
+    assert [r["partition"] for r in records] == [0, 1, 1, 1]
+    # One consumer for the offset lookup and one per non-empty partition.
+    assert len(consumers) == 3
+    assert all(c.closed for c in consumers)
+
+    records = query_topic_time_range(
+        {"site": "local", "timeout": 1000},
+        topic,
+        "2026-01-13-05:32",
+        "2026-01-13-05:33",
+        max_messages=2,
+        max_workers=1,
+    )
+
+    assert [r["value"] for r in records] == ["p0-0", "p1-0"]
+
+
+@pytest.mark.parametrize(
+    "mock_consumers",
+    [
+        {
+            M1M3_TOPIC: create_topic_log(
+                M1M3_TOPIC,
+                [
+                    [
+                        (WINDOW_START_TS - 1000, b"p0-0"),
+                        (WINDOW_START_TS + 1000, b"p0-1"),
+                        (WINDOW_START_TS + 60000, b"p0-2"),
+                        (WINDOW_START_TS + 60001, b"p0-3"),
+                    ],
+                    [(WINDOW_START_TS + 2000, b"p1-0")],
+                ],
+            )
+        }
+    ],
+    indirect=True,
+)
+def test_query_plan(
+    mock_consumers: MockConsumerFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    topic = M1M3_TOPIC
+    consumers = mock_consumers.consumers
+
+    # The watermarks of both partitions are looked up at the same time.
+    barrier = threading.Barrier(2, timeout=5)
+    get_watermark_offsets = MockConsumer.get_watermark_offsets
+
+    def concurrent_watermarks(self: MockConsumer, *args: Any, **kwargs: Any) -> Any:
+        barrier.wait()
+        return get_watermark_offsets(self, *args, **kwargs)
+
+    with monkeypatch.context() as m:
+        m.setattr(MockConsumer, "get_watermark_offsets", concurrent_watermarks)
+        plan = plan_topic_time_range(
+            {"site": "local", "timeout": 1000},
+            topic,
+            "2026-01-13-05:32",
+            "2026-01-13-05:33",
+        )
+    assert [(x.start_offset, x.end_offset) for x in plan.partitions] == [
+        (1, 3),
+        (0, 1),
+    ]
+    assert [x.high_watermark for x in plan.partitions] == [4, 1]
+    assert plan.expected_messages == 3
+    assert all(c.poll_calls == 0 for c in consumers)
+
+    consumers.clear()
+    records = query_topic_time_range(
+        {"site": "local", "timeout": 1000},
+        topic,
+        "2026-01-13-05:32",
+        "2026-01-13-05:33",
+    )
+    assert [r["value"] for r in records] == ["p0-1", "p1-0", "p0-2"]
+    # Reading stops at the last planned offset without an idle call.
+    assert sum(c.consume_calls for c in consumers) == 2
+
+    runner = CliRunner()
+    result = runner.invoke(
+        main,
+        [
+            "topics",
+            "local",
+            "query",
+            "2026-01-13-05:32",
+            "2026-01-13-05:33",
+            topic,
+            "--plan",
+        ],
+    )
+    assert result.exit_code == 0
+    assert result.stdout == query_plan
+
+
+@pytest.mark.parametrize(
+    "mock_consumers",
+    [
+        {
+            M1M3_TOPIC: create_topic_log(
+                M1M3_TOPIC,
+                [
+                    [
+                        (WINDOW_START_TS + i * 10, f"p{p}-{i}".encode())
+                        for i in range(50)
+                    ]
+                    for p in range(2)
+                ],
+            )
+        }
+    ],
+    indirect=True,
+)
+def test_query_stream(mock_consumers: MockConsumerFactory) -> None:
+    topic = M1M3_TOPIC
+    consumers = mock_consumers.consumers
+
+    ctxobj = {"site": "local", "timeout": 1000}
+    records = list(
+        iter_topic_time_range(
+            ctxobj, topic, "2026-01-13-05:32", "2026-01-13-05:33", queue_size=4
+        )
+    )
+    assert len(records) == 100
+    p0 = [r["offset"] for r in records if r["partition"] == 0]
+    assert p0 == list(range(50))
+
+    # Stopping early shuts the partition readers down.
+    consumers.clear()
+    stream = iter_topic_time_range(
+        ctxobj, topic, "2026-01-13-05:32", "2026-01-13-05:33", queue_size=4
+    )
+    first = next(stream)
+    assert first["value"].startswith("p")
+    stream.close()
+    assert all(c.closed for c in consumers)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        args = ["topics", "local", "query", "2026-01-13-05:32", "2026-01-13-05:33"]
+        result = runner.invoke(main, args + [topic, "--stream"])
+        assert result.exit_code == 0
+        lines = [x for x in result.stdout.splitlines() if x.startswith("{")]
+        assert len(lines) == 100
+        assert json.loads(lines[0])["timestamp_ms"] == "2026-01-13T05:32:00"
+
+        result = runner.invoke(
+            main,
+            args + [topic, "--output", "out.jsonl", "--max-messages", "10"],
+        )
+        assert result.exit_code == 0
+        lines = pathlib.Path("out.jsonl").read_text().splitlines()
+        assert len(lines) == 10
+
+
+@pytest.mark.parametrize(
+    "mock_consumers",
+    [
+        {
+            M1M3_TOPIC: create_topic_log(
+                M1M3_TOPIC,
+                [[(WINDOW_START_TS + i, f"{i}".encode()) for i in range(1000)]],
+            )
+        }
+    ],
+    indirect=True,
+)
+def test_query_batched_fetch(mock_consumers: MockConsumerFactory) -> None:
+    topic = M1M3_TOPIC
+    consumers = mock_consumers.consumers
+
+    ctxobj = {"site": "local", "timeout": 1000}
+    records = query_topic_time_range(
+        ctxobj,
+        topic,
+        "2026-01-13-05:32",
+        "2026-01-13-05:33",
+        max_messages=1000,
+        fetch=FetchOpts(batch_size=300, fetch_max_bytes=1048576),
+    )
+    assert len(records) == 1000
+    reader = consumers[-1]
+    assert reader.consume_calls == 4
+    assert reader.poll_calls == 0
+    assert reader.conf["fetch.max.bytes"] == 1048576
+    assert "fetch.min.bytes" not in reader.conf
+
+    consumers.clear()
+    runner = CliRunner()
+    result = runner.invoke(
+        main,
+        [
+            "topics",
+            "local",
+            "query",
+            "2026-01-13-05:32",
+            "2026-01-13-05:33",
+            topic,
+            "--batch-size",
+            "100",
+            "--queued-max-messages-kbytes",
+            "2048",
+        ],
+    )
+    assert result.exit_code == 0
+    assert "Returned 1000 message(s)" in result.stdout
+    assert consumers[-1].consume_calls == 10
+    assert consumers[-1].conf["queued.max.messages.kbytes"] == 2048
+
+
+@pytest.mark.parametrize(
+    "mock_consumers",
+    [
+        {
+            M1M3_TOPIC: create_topic_log(
+                M1M3_TOPIC,
+                [
+                    [(WINDOW_START_TS + 3 * i, f"{i}".encode()) for i in range(50)],
+                    [(WINDOW_START_TS + 3 * i + 1, f"{i}".encode()) for i in range(50)],
+                ],
+            ),
+            M2_TOPIC: create_topic_log(
+                M2_TOPIC,
+                [
+                    [(WINDOW_START_TS + 3 * i + 2, f"{i}".encode()) for i in range(50)]
+                    + [(WINDOW_START_TS + 120000, b"late")]
+                ],
+            ),
+            "lsst.sal.ATDome.position": create_topic_log(
+                "lsst.sal.ATDome.position", [[(WINDOW_START_TS, b"dome")]]
+            ),
+        }
+    ],
+    indirect=True,
+)
+def test_query_regex_merge(mock_consumers: MockConsumerFactory) -> None:
+    m1m3 = M1M3_TOPIC
+    m2 = M2_TOPIC
+    consumers = mock_consumers.consumers
+
+    ctxobj = {"site": "local"}
+    args = ("lsst.sal.MTM", "2026-01-13-05:32", "2026-01-13-05:33")
+    plans = plan_topics_time_range(ctxobj, *args)
+    assert [p.topic for p in plans] == [m1m3, m2]
+    assert [p.expected_messages for p in plans] == [100, 50]
+
+    consumers.clear()
+    records = list(iter_topics_time_range(ctxobj, *args, buffer_size=2))
+    assert len(consumers) == 2
+    assert all(c.closed for c in consumers)
+    assert len(records) == 150
+    assert [r["timestamp"] for r in records] == [
+        WINDOW_START_TS + i for i in range(150)
+    ]
+    assert [r["topic"] for r in records[:3]] == [m1m3, m1m3, m2]
+    assert [r["partition"] for r in records[:3]] == [0, 1, 0]
+
+    records = list(iter_topics_time_range(ctxobj, *args, max_messages=4))
+    assert [r["timestamp"] - WINDOW_START_TS for r in records] == [0, 1, 2, 3]
+
+    runner = CliRunner()
+    query = ["topics", "local", "query", "2026-01-13-05:32", "2026-01-13-05:33"]
+    result = runner.invoke(
+        main, query + ["lsst.sal.MTM", "--regex", "--max-messages", "3"]
+    )
+    assert result.exit_code == 0
+    lines = [x for x in result.stdout.splitlines() if x.startswith("lsst")]
+    assert [x.split()[0] for x in lines] == [m1m3, m1m3, m2]
+    assert "Returned 3 message(s)" in result.stdout
+
+    result = runner.invoke(
+        main, query + ["lsst.sal.MTM", "--regex", "--max-workers", "2"]
+    )
+    assert result.exit_code == 2
+    assert "--max-workers does not apply to --regex" in result.output
+
+    result = runner.invoke(main, query + ["ATDome|MTM2", "--regex", "--plan"])
+    assert result.exit_code == 0
+    assert "Query plan for lsst.sal.ATDome.position" in result.stdout
+    assert "Query plan for lsst.sal.MTM2.axialForce" in result.stdout
+
+    # Empty fetches must not drop partitions from the merge.
+    mock_consumers.empty_consumes = 3
+    records = list(iter_topics_time_range(ctxobj, *args, buffer_size=2))
+    assert len(records) == 150
+
+
+@pytest.mark.parametrize(
+    "mock_consumers",
+    [
+        {
+            M1M3_TOPIC: create_topic_log(
+                M1M3_TOPIC,
+                [
+                    [
+                        (WINDOW_START_TS + 10000, b"a" * 5),
+                        (WINDOW_START_TS + 20000, b"a" * 10),
+                        (WINDOW_START_TS + 90000, b"a"),
+                        (WINDOW_START_TS + 120000, b"a" * 3),
+                        (WINDOW_START_TS + 180000, b"a" * 3),
+                    ],
+                    [(WINDOW_START_TS + 61000, b"a" * 7)],
+                ],
+            )
+        }
+    ],
+    indirect=True,
+)
+def test_topics_histogram(mock_consumers: MockConsumerFactory) -> None:
+    topic = M1M3_TOPIC
+    consumers = mock_consumers.consumers
+
+    ctxobj = {"site": "local"}
+    args = (topic, "2026-01-13-05:32", "2026-01-13-05:34")
+    histograms = topic_histogram(ctxobj, *args)
+    assert [list(h.counts) for h in histograms] == [[2, 1, 1], [0, 1, 0]]
+    assert histograms[0].total_bytes is not None
+    assert list(histograms[0].total_bytes) == [15, 1, 3]
+    assert histograms[0].min_bytes is not None
+    assert list(histograms[0].min_bytes) == [5, 1, 3]
+    assert histograms[0].max_bytes is not None
+    assert list(histograms[0].max_bytes) == [10, 1, 3]
+    assert histograms[0].bucket_start(1) == WINDOW_START_TS + 60000
+
+    consumers.clear()
+    fast = topic_histogram(ctxobj, *args, counts_only=True)
+    assert [list(h.counts) for h in fast] == [[2, 1, 1], [0, 1, 0]]
+    assert fast[0].total_bytes is None
+    assert len(consumers) == 1
+    assert consumers[0].consume_calls == 0
+
+    histograms = topic_histogram(ctxobj, *args, bucket_seconds=30)
+    assert list(histograms[0].counts) == [2, 0, 0, 1, 1]
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["topics", "local", "histogram", *args[1:], topic])
+    assert result.exit_code == 0
+    assert "Histogram for lsst.sal.MTM1M3.forceActuatorData (60 s buckets)" in (
+        result.stdout
+    )
+    assert "        0  2026-01-13T05:32:00           2            15         5" in (
+        result.stdout
+    )
+    assert "Counted 5 message(s) in 2 partition(s)" in result.stdout
+
+    result = runner.invoke(
+        main,
+        ["topics", "local", "histogram", *args[1:], topic, "--counts-only"],
+    )
+    assert result.exit_code == 0
+    assert "bytes" not in result.stdout
+
+
+@pytest.mark.parametrize(
+    "mock_consumers",
+    [
+        {
+            M1M3_TOPIC: create_topic_log(
+                M1M3_TOPIC,
+                [
+                    [(WINDOW_START_TS + 50 * i, f"{i}".encode()) for i in range(1000)],
+                    [(WINDOW_START_TS + 100 * i, f"{i}".encode()) for i in range(500)],
+                ],
+            )
+        }
+    ],
+    indirect=True,
+)
+def test_query_sample(mock_consumers: MockConsumerFactory) -> None:
+    topic = M1M3_TOPIC
+    consumers = mock_consumers.consumers
+
+    ctxobj = {"site": "local"}
+    args = (topic, "2026-01-13-05:32", "2026-01-13-05:33")
+    consumers.clear()
+    records = sample_topic_time_range(ctxobj, *args, num_samples=30)
+    assert len(records) == 30
+    offsets = {p: [r["offset"] for r in records if r["partition"] == p] for p in (0, 1)}
+    assert sorted(offsets[0]) == list(range(0, 1000, 50))
+    assert sorted(offsets[1]) == list(range(0, 500, 50))
+    readers = consumers[1:]
+    assert sorted(c.consume_calls for c in readers) == [10, 20]
+    assert all(c.closed for c in consumers)
+    timestamps = [r["timestamp"] for r in records]
+    assert timestamps == sorted(timestamps)
+
+    records = sample_topic_time_range(ctxobj, *args, num_samples=3, sample_batch=4)
+    assert len(records) == 12
+
+    records = sample_topic_time_range(
+        ctxobj,
+        *args,
+        num_samples=10,
+        method="reservoir",
+        seed=1,
+        record_filter=RecordFilter(where="partition == 1"),
+    )
+    # The last time slice holds no message.
+    slices = [(r["timestamp"] - WINDOW_START_TS) * 10 // 60001 for r in records]
+    assert slices == list(range(9))
+    assert all(r["partition"] == 1 for r in records)
+    assert records == sample_topic_time_range(
+        ctxobj,
+        *args,
+        num_samples=10,
+        method="reservoir",
+        seed=1,
+        record_filter=RecordFilter(where="partition == 1"),
+    )
+
+    runner = CliRunner()
+    query = ["topics", "local", "query", *args[1:], topic]
+    result = runner.invoke(main, query + ["--sample", "5"])
+    assert result.exit_code == 0
+    assert "Returned 5 message(s)" in result.stdout
+
+    result = runner.invoke(main, query + ["--sample", "5", "--regex"])
+    assert result.exit_code == 2
+
+    result = runner.invoke(main, query + ["--sample", "5", "--max-messages", "3"])
+    assert result.exit_code == 2
+    assert "--max-messages does not apply to --sample" in result.output
+
+
+@pytest.mark.parametrize(
+    "mock_consumers",
+    [
+        {
+            M1M3_TOPIC: create_topic_log(
+                M1M3_TOPIC,
+                [
+                    [(WINDOW_START_TS + 50 * i, f"{i}".encode()) for i in range(100)],
+                    [(WINDOW_START_TS + 100 * i, f"{i}".encode()) for i in range(50)],
+                ],
+            )
+        }
+    ],
+    indirect=True,
+)
+def test_query_slow_fetch(
+    mock_consumers: MockConsumerFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    topic = M1M3_TOPIC
+    # The first fetches of a new consumer come back empty.
+    mock_consumers.empty_consumes = 3
+
+    ctxobj = {"site": "local"}
+    args = (topic, "2026-01-13-05:32", "2026-01-13-05:33")
+    records = query_topic_time_range(ctxobj, *args, max_messages=1000)
+    assert len(records) == 150
+    records = sample_topic_time_range(ctxobj, *args, num_samples=10)
+    assert len(records) == 10
+
+    # A stalled partition that still holds messages is an error rather
+    # than the end of its range.
+    monkeypatch.setattr("lsst.ts.kafka_tools.topics.QUERY_STALL_TIMEOUT", 0.0)
+    mock_consumers.empty_consumes = 1000
+    with pytest.raises(RuntimeError, match=r"\[0\] stalled at offset 0 .* offset 100"):
+        query_topic_time_range(ctxobj, *args)
+
+    # Only the stall check asks for uncached watermarks explicitly.
+    get_watermark_offsets = MockConsumer.get_watermark_offsets
+
+    def stall_watermarks(watermarks: tuple[int, int] | None) -> None:
+        monkeypatch.setattr(
+            MockConsumer,
+            "get_watermark_offsets",
+            lambda self, tp, timeout=None, **kwargs: (
+                watermarks
+                if "cached" in kwargs
+                else get_watermark_offsets(self, tp, timeout)
+            ),
+        )
+
+    # Offsets that are gone from the log end the range.
+    stall_watermarks((0, 0))
+    assert query_topic_time_range(ctxobj, *args) == []
+    stall_watermarks(None)
+    with pytest.raises(RuntimeError, match="Timed out reading"):
+        query_topic_time_range(ctxobj, *args)
+
+
+@patch("lsst.ts.kafka_tools.topics.create_config")
+def test_topics_tail(mock_create_config: MagicMock) -> None:
+    mock_create_config.return_value = {}
+    topic = "lsst.sal.MTM1M3.forceActuatorData"
+    logs = {
+        topic: create_topic_log(
+            topic,
+            [
+                [(WINDOW_START_TS + i, f"p0-{i}".encode()) for i in range(10)],
+                [(WINDOW_START_TS + i, f"p1-{i}".encode()) for i in range(10)],
+            ],
+        )
+    }
+
+    ctxobj = {"site": "local"}
+    with patch(
+        "lsst.ts.kafka_tools.topics.Consumer",
+        side_effect=lambda conf: MockConsumer(conf, logs),
+    ):
+        tail = tail_topics(
+            ctxobj, topic, lookback=2, idle_timeout=0.3, refresh_interval=0
+        )
+        records = []
+        for record in tail:
+            if record is None:
+                continue
+            records.append(record)
+            if len(records) == 4:
+                # New messages and a new partition show up while following.
+                logs[topic][0].append(
+                    MockMessage(WINDOW_START_TS, b"p0-10", topic=topic, offset=10)
+                )
+                logs[topic].append(
+                    [MockMessage(WINDOW_START_TS, b"p2-0", topic=topic, partition=2)]
+                )
+        assert sorted(r["value"] for r in records) == [
+            "p0-10",
+            "p0-8",
+            "p0-9",
+            "p1-8",
+            "p1-9",
+            "p2-0",
+        ]
+        assert all(r["topic"] == topic for r in records)
+        assert all(r["delay_ms"] > 0 for r in records)
+
+        runner = CliRunner()
+        result = runner.invoke(
+            main,
+            [
+                "topics",
+                "local",
+                "tail",
+                "MTM1M3",
+                "--regex",
+                "--lookback",
+                "1",
+                "--json",
+                "--idle-timeout",
+                "0.2",
+            ],
+        )
+        assert result.exit_code == 0
+        lines = [x for x in result.stdout.splitlines() if x.startswith("{")]
+        assert sorted(json.loads(x)["value"] for x in lines) == [
+            "p0-10",
+            "p1-9",
+            "p2-0",
+        ]
+        assert "Received 3 message(s), delay mean=" in result.output
+
+        result = runner.invoke(
+            main,
+            [
+                "topics",
+                "local",
+                "tail",
+                topic,
+                "--lookback",
+                "1",
+                "--max-messages",
+                "2",
+            ],
+        )
+        assert result.exit_code == 0
+        assert "Received 2 message(s)" in result.output
+        assert f"{topic} ts=2026-01-13T05:32:00 delay=" in result.stdout
+
+
+@patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
+def test_topics_rate(mock_gen_admin_client: MagicMock) -> None:
+    client = MockAdminClient()
+    mock_gen_admin_client.return_value = client
+    topic = "lsst.sal.ATAOS.logevent_heartbeat"
+    now_ms = int(time.time() * 1000)
+    client.partition_logs[(topic, 0)] = (
+        100,
+        [now_ms - 5 * 3600000] * 360 + [now_ms - 1800000] * 60 + [now_ms - 30000] * 120,
+    )
+
+    opts = ListTopicsOpts("heartbeat", None, None, None)
+    rates = topic_rates({"site": "local"}, opts, [60, 3600, 86400])
+    assert client.list_offsets_calls == 5
+    assert len(rates) == 1
+    assert rates[0].earliest_offset == 100
+    assert rates[0].retained_messages == 540
+    assert rates[0].window_counts == {60: 120, 3600: 180, 86400: 540}
+    assert rates[0].rate(60) == 2.0
+
+    runner = CliRunner()
+    result = runner.invoke(
+        main,
+        ["topics", "local", "rate", "--regex", "heartbeat", "--windows", "1m,1h"],
+    )
+    assert result.exit_code == 0
+    assert result.stdout.splitlines()[1].split() == [topic, "540", "2.000", "0.050"]
+
+    result = runner.invoke(main, ["topics", "local", "rate", "--partitions"])
+    assert result.exit_code == 0
+    assert "  partition 0" in result.stdout
+    assert "topic1.attribute1" in result.stdout
+
+    result = runner.invoke(main, ["topics", "local", "rate", "--windows", "1x"])
+    assert result.exit_code == 2
+
+
+@patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
+def test_topics_idle(mock_gen_admin_client: MagicMock, tmp_path: pathlib.Path) -> None:
+    client = MockAdminClient()
+    client._mock_committed = {
+        "consumer1": [("topic1.attribute1", 0, 5), ("topic2.attribute1", 0, -1001)],
+        "consumer2": [("topic1.attribute1", 0, 8)],
+    }
+    mock_gen_admin_client.return_value = client
+    now_ms = int(time.time() * 1000)
+    day_ms = 86400000
+    client.partition_logs[("topic1.attribute1", 0)] = (0, [now_ms - 40 * day_ms] * 5)
+    client.partition_logs[("topic2.attribute1", 0)] = (10, [now_ms - 31 * day_ms] * 3)
+    client.partition_logs[("topic1.attribute2", 0)] = (
+        0,
+        [now_ms - 40 * day_ms, now_ms - day_ms],
+    )
+
+    opts = ListTopicsOpts(None, None, "attribute1,attribute2", None)
+    idle = find_idle_topics({"site": "local"}, 30 * 86400, opts)
+    assert client.list_offsets_calls == 3
+    assert [x.topic for x in idle] == [
+        "topic1.attribute1",
+        "topic2.attribute1",
+        "topic2.attribute2",
+    ]
+    assert idle[0].consumer_groups == ["consumer1", "consumer2"]
+    assert idle[0].num_messages == 5
+    assert not idle[1].is_read
+    assert idle[1].num_messages == 3
+
+    runner = CliRunner(env={"XDG_CACHE_HOME": str(tmp_path / "cache")})
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            main,
+            ["topics", "local", "idle", "--older-than", "30d", "--regex", "topic"],
+        )
+        assert result.exit_code == 0
+        names = [x for x in result.stdout.splitlines() if not x.startswith("Found")]
+        assert "topic1.attribute2" not in names
+        assert "topic1.attribute1" in names
+        assert "Found 5 idle topic(s), 4 not read" in result.output
+
+        result = runner.invoke(
+            main,
+            [
+                "topics",
+                "local",
+                "idle",
+                "--older-than",
+                "30d",
+                "--regex",
+                "attribute1",
+                "--unread-only",
+            ],
+        )
+        assert result.exit_code == 0
+        names = [x for x in result.stdout.splitlines() if x.startswith("topic")]
+        assert names == ["topic2.attribute1"]
+
+        pathlib.Path("idle.txt").write_text(names[0] + "\n")
+        result = runner.invoke(
+            main,
+            ["topics", "local", "delete", "--name-file", "idle.txt"],
+            input="y",
+        )
+        assert result.exit_code == 0
+        assert "Found 1 topics to delete" in result.stdout
+
+        result = runner.invoke(main, ["topics", "local", "idle", "--older-than", "30x"])
+        assert result.exit_code == 2
+
+
+@patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
+def test_topics_describe(mock_gen_admin_client: MagicMock) -> None:
+    client = MockAdminClient()
+    mock_gen_admin_client.return_value = client
+    topic = "lsst.sal.ATAOS.logevent_heartbeat"
+    pm = client.cluster_md.topics[topic].partitions[0]
+    pm.leader = 1
+    pm.replicas = [1, 2, 3]
+    pm.isrs = [1, 3]
+    client.partition_logs[(topic, 0)] = (100, [WINDOW_START_TS] * 20)
+
+    opts = ListTopicsOpts("ATAOS", None, None, None)
+    descriptions = describe_topics({"site": "local"}, opts)
+    assert client.list_offsets_calls == 2
+    assert len(descriptions) == 4
+    heartbeat = next(x for x in descriptions if x.topic == topic)
+    assert heartbeat.earliest_offset == 100
+    assert heartbeat.retained_messages == 20
+    assert heartbeat.under_replicated
+
+    runner = CliRunner()
+    result = runner.invoke(
+        main, ["topics", "local", "describe", "--name", "heartbeat", "--partitions"]
+    )
+    assert result.exit_code == 0
+    lines = result.stdout.splitlines()
+    assert lines[1].split() == [topic, "1", "3", "2", "1", "20", "1"]
+    assert lines[2].split() == [
+        "partition",
+        "0:",
+        "leader=1",
+        "replicas=[1,2,3]",
+        "isr=[1,3]",
+        "offsets=100..120",
+    ]
+
+    result = runner.invoke(
+        main, ["topics", "local", "describe", "--regex", "heartbeat", "--json"]
+    )
+    assert result.exit_code == 0
+    record = json.loads(result.stdout)
+    assert record["topic"] == topic
+    assert record["partitions"][0]["isr"] == [1, 3]
+
+    result = runner.invoke(
+        main, ["topics", "local", "describe", "--regex", "a", "--name", "b"]
+    )
+    assert result.exit_code == 2
+
+
+@patch("lsst.ts.kafka_tools.topics.create_config")
+def test_topics_copy(mock_create_config: MagicMock) -> None:
+    mock_create_config.return_value = {}
+    topic = "lsst.sal.MTM1M3.forceActuatorData"
+    logs = {
+        topic: [
+            [
+                MockMessage(
+                    WINDOW_START_TS + 1000 * i,
+                    f"{i}".encode(),
+                    key=b"k",
+                    topic=topic,
+                    partition=p,
+                    offset=i,
+                    headers=[("source", b"summit")],
+                )
+                for i in range(30)
+            ]
+            + [MockMessage(WINDOW_START_TS + 600000, b"late", topic=topic, offset=30)]
+            for p in range(2)
+        ]
+    }
+    producers: list[MockProducer] = []
+
+    def make_producer(conf: dict) -> MockProducer:
+        producer = MockProducer(conf, {topic: 2, "copy": 1}, max_queued=8)
+        producers.append(producer)
+        return producer
+
+    ctxobj = {"site": "summit"}
+    args = (topic, "2026-01-13-05:32", "2026-01-13-05:33")
+    with (
+        patch(
+            "lsst.ts.kafka_tools.topics.Consumer",
+            side_effect=lambda conf: MockConsumer(conf, logs),
+        ),
+        patch("lsst.ts.kafka_tools.topics.Producer", side_effect=make_producer),
+    ):
+        stats = copy_topic_time_range(ctxobj, *args, dest_site="tts")
+        assert stats.read == stats.delivered == 60
+        assert stats.pending == 0
+        producer = producers[0]
+        assert producer.conf["enable.idempotence"] is True
+        assert producer.conf["compression.type"] == "lz4"
+        assert producer.buffer_errors > 0
+        copied = producer.logs[(topic, 1)]
+        assert [m.value() for m in copied] == [f"{i}".encode() for i in range(30)]
+        assert copied[5].timestamp()[1] == WINDOW_START_TS + 5000
+        assert copied[5].key() == b"k"
+        assert copied[5].headers() == [("source", b"summit")]
+
+        stats = copy_topic_time_range(
+            ctxobj, *args, dest_site="tts", dest_topic="copy", compression="zstd"
+        )
+        assert stats.delivered == 60
+        assert len(producers[1].logs[("copy", 0)]) == 60
+
+        with pytest.raises(ValueError):
+            copy_topic_time_range(ctxobj, *args, dest_site="summit")
+        with pytest.raises(RuntimeError):
+            copy_topic_time_range(ctxobj, *args, dest_site="tts", dest_topic="none")
+
+        runner = CliRunner()
+        result = runner.invoke(
+            main,
+            ["topics", "summit", "copy", *args[1:], topic, "--to", "tts"],
+        )
+        assert result.exit_code == 0
+        assert "Copied 60 of 60 message(s)" in result.stdout
+
+        result = runner.invoke(
+            main,
+            ["topics", "summit", "copy", *args[1:], topic, "--to", "summit"],
+        )
+        assert result.exit_code == 2
+
+
+@patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
+def test_topics_create(mock_gen_admin_client: MagicMock) -> None:
+    client = MockAdminClient()
+    mock_gen_admin_client.return_value = client
+    spec = """
+defaults:
+  partitions: 2
+  replication_factor: 3
+  config:
+    retention.ms: 604800000
+topics:
+  - topic1.attribute1
+  - name: lsst.sal.MTM1M3.forceActuatorData
+    partitions: 3
+    config:
+      cleanup.policy: compact
+  - name: lsst.sal.MTM2.axialForce
+    replication_factor: 5
+"""
+    names = [f"lsst.sal.Test.logevent_{i}" for i in range(7)]
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        spec_file = pathlib.Path("topics.yaml")
+        spec_file.write_text(spec + "".join(f"  - {x}\n" for x in names))
+        specs = load_topic_specs(spec_file)
+        assert len(specs) == 10
+        assert specs[1].partitions == 3
+        assert specs[1].config == {
+            "retention.ms": "604800000",
+            "cleanup.policy": "compact",
+        }
+        assert specs[3].partitions == 2
+        assert specs[3].replication_factor == 3
+
+        missing, existing = split_existing_topics({"site": "local"}, specs)
+        assert existing == ["topic1.attribute1"]
+        assert len(missing) == 9
+
+        results = list(create_topics({"site": "local"}, missing, 4, max_in_flight=2))
+        assert client.create_topics_calls == [4, 4, 1]
+        assert [x.index for x in results] == [0, 1, 2]
+        assert list(results[0].failed) == ["lsst.sal.MTM2.axialForce"]
+        assert (
+            "larger than available brokers"
+            in results[0].failed["lsst.sal.MTM2.axialForce"]
+        )
+        assert sum(len(x.created) for x in results) == 8
+        assert (
+            len(
+                client.cluster_md.topics["lsst.sal.MTM1M3.forceActuatorData"].partitions
+            )
+            == 3
+        )
+
+        result = runner.invoke(
+            main, ["topics", "local", "create", "--spec", "topics.yaml"]
+        )
+        assert result.exit_code == 1
+        assert "Skipping 9 existing topic(s), 1 to create" in result.stdout
+        assert "Chunk 1/1: 0 created, 1 failed" in result.stdout
+
+        pathlib.Path("bad.json").write_text(
+            json.dumps({"topics": ["a", {"name": "a", "partitions": 2}]})
+        )
+        result = runner.invoke(
+            main, ["topics", "local", "create", "--spec", "bad.json"]
+        )
+        assert result.exit_code == 2
+        assert "more than once" in result.output
+
+
+@patch("lsst.ts.kafka_tools.topics.generate_admin_client", spec=True)
+def test_topics_delete_resume(
+    mock_gen_admin_client: MagicMock, tmp_path: pathlib.Path
+) -> None:
+    client = MockAdminClient()
+    mock_gen_admin_client.return_value = client
+    client.delete_errors["topic1.attribute2"] = KafkaException(
+        KafkaError(KafkaError.TOPIC_AUTHORIZATION_FAILED)
+    )
+    client.delete_errors["topic2.attribute1"] = KafkaException(
+        KafkaError(KafkaError.UNKNOWN_TOPIC_OR_PART)
+    )
+    client.stalled_deletes.add("topic2.attribute3")
+
+    runner = CliRunner(env={"XDG_CACHE_HOME": str(tmp_path / "cache")})
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            main,
+            [
+                "topics",
+                "local",
+                "delete",
+                "--regex",
+                "^topic",
+                "--chunk-size",
+                "4",
+                "--chunk-timeout",
+                "0.01",
+            ],
+            input="y",
+        )
+        assert result.exit_code == 0
+        assert client.delete_topics_calls == [4, 2]
+        assert "Found 6 topics to delete" in result.stdout
+        assert "4 deleted successfully, 2 not successfully deleted" in result.stdout
+        assert "  failed: topic1.attribute2:" in result.stdout
+        assert "  timed out: topic2.attribute3" in result.stdout
+        assert "--resume delete-topics-local.jsonl" in result.stdout
+
+        journal = pathlib.Path("delete-topics-local.jsonl")
+        # A run killed while writing leaves a torn last line.
+        with journal.open("a") as ofile:
+            ofile.write('{"topic": "topic2.att')
+
+        client.delete_errors.clear()
+        client.stalled_deletes.clear()
+        result = runner.invoke(
+            main,
+            ["topics", "local", "delete", "--resume", str(journal)],
+            input="y",
+        )
+        assert result.exit_code == 0
+        assert client.delete_topics_calls == [4, 2, 2]
+        assert "Delete the 2 unfinished topics" in result.stdout
+        assert "4 already deleted by a previous run" in result.stdout
+        assert "2 deleted successfully, 0 not successfully deleted" in result.stdout
+
+        result = runner.invoke(
+            main,
+            ["topics", "bts", "delete", "--resume", str(journal)],
+            input="y",
+        )
+        assert result.exit_code == 2
+
+        result = runner.invoke(
+            main,
+            ["topics", "local", "delete", "--resume", str(journal), "--name", "a"],
+            input="y",
+        )
+        assert result.exit_code == 2